@@ -65,6 +65,7 @@ import signal
 import psutil
 
 from alignak.alignakobject import AlignakObject
+from alignak.misc.serialization import unserialize
 from alignak.property import (BoolProp, IntegerProp, FloatProp, StringProp,
                               DictProp, FULL_STATUS)
 
@@ -106,6 +107,17 @@ ACTION_VALID_STATUS = [ACT_STATUS_SCHEDULED, ACT_STATUS_LAUNCHED,
 ONLY_COPY_PROP = ('uuid', 'status', 'command', 't_to_go', 'timeout', 'env',
                   'module_type', 'execution_time', 'u_time', 's_time')
 
+# Properties of an action result sent back to the scheduler by the satellites
+RESULT_PROP = ('uuid', 'is_a', 'status', 'exit_status', 'output', 'long_output', 'perf_data',
+               'check_time', 'execution_time', 'u_time', 's_time')
+
+# Actions results formats exchanged between the satellites and the schedulers:
+# - serialized, each action is serialized as an Alignak object
+# - compact, only the result properties of each action are sent (see ActionBase.get_result)
+# The daemons understanding the compact format advertise it in their identity.
+RESULTS_FORMAT_SERIALIZED = u'serialized'
+RESULTS_FORMAT_COMPACT = u'compact'
+
 SHELLCHARS = ('!', '$', '^', '&', '*', '(', ')', '~', '[', ']',
               '|', '{', '}', ';', '<', '>', '?', '`')
 
@@ -237,6 +249,62 @@ class ActionBase(AlignakObject):
         # Fill default parameters
         self.fill_default()
 
+    # Object notified when the status or the launch time of the action changes.
+    # The scheduler actions registry uses it to maintain its indexes.
+    # See alignak.scheduler.ActionsRegistry
+    _listener = None
+
+    # The status and the launch time are stored in the instance dictionary,
+    # the properties only notify the listener of their changes
+    @property
+    def status(self):
+        """Action status (scheduled, in_poller, zombie, ...)
+
+        :return: the current action status
+        :rtype: str
+        """
+        try:
+            return self.__dict__['status']
+        except KeyError:
+            raise AttributeError('status')
+
+    @status.setter
+    def status(self, value):
+        old_value = self.__dict__.get('status')
+        self.__dict__['status'] = value
+        if self._listener is not None and value != old_value:
+            self._listener.status_changed(self, old_value)
+
+    @property
+    def t_to_go(self):
+        """Time when the action is to be launched
+
+        :return: the action launch time
+        :rtype: float
+        """
+        try:
+            return self.__dict__['t_to_go']
+        except KeyError:
+            raise AttributeError('t_to_go')
+
+    @t_to_go.setter
+    def t_to_go(self, value):
+        old_value = self.__dict__.get('t_to_go')
+        self.__dict__['t_to_go'] = value
+        if self._listener is not None and value != old_value:
+            self._listener.t_to_go_changed(self)
+
+    def get_result(self):
+        """Get the action result in the compact format sent back to the scheduler
+
+        The scheduler applies the result to its own action, thus it is not necessary to send
+        (and to un-serialize) the whole action.
+
+        :return: the action result properties
+        :rtype: dict
+        """
+        return dict((prop, getattr(self, prop)) for prop in RESULT_PROP)
+
     def is_launchable(self, timestamp):
         """Check if this action can be launched based on current time
 
@@ -703,3 +771,18 @@ else:  # pragma: no cover, not currently tested with Windows...
             """
             # pylint: disable=E1101
             ctypes.windll.kernel32.TerminateProcess(int(self.process._handle), -1)
+
+
+def get_results_from_json(results):
+    """Get the actions results from the decoded JSON data received from a satellite
+
+    The results in the compact format (see ActionBase.get_result) are kept as is, the
+    serialized actions are un-serialized.
+
+    :param results: decoded JSON data
+    :type results: list
+    :return: actions results, compact results or actions
+    :rtype: list
+    """
+    return [result if '__sys_python_module__' not in result else unserialize(result, True)
+            for result in results]
@@ -88,6 +88,29 @@ class AlignakObject(object):
             else:
                 setattr(self, key, value)
 
+    def __getstate__(self):
+        """Get the object state for copy and pickle
+
+        Do not include the listeners notified of the object changes (see the actions and the
+        scheduling items), they only make sense in the daemon that set them. The AutoSlots
+        classes also have a state for their slots (see the pickle protocol).
+
+        :return: the object state without the listeners
+        :rtype: dict | tuple
+        """
+        state = self.__dict__.copy()
+        state.pop('_listener', None)
+        state.pop('_deadlines', None)
+        state.pop('_business_rule_nodes', None)
+        slots = {}
+        for cls in self.__class__.__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                if hasattr(self, slot):
+                    slots[slot] = getattr(self, slot)
+        if slots:
+            return state, slots
+        return state
+
     def serialize(self):
         """This function serializes into a simple dictionary object.
 
@@ -73,7 +73,7 @@ class AutoSlots(type):
         :rtype: object
         """
         # Thanks to Bertrand Mathieu to the set idea
-        slots = dct.get('__slots__', set())
+        slots = set(dct.get('__slots__', ()))
         # Now get properties from properties and running_properties
         if 'properties' in dct:
             props = dct['properties']
@@ -81,5 +81,9 @@ class AutoSlots(type):
         if 'running_properties' in dct:
             props = dct['running_properties']
             slots.update((p for p in props if not props[p].no_slots))
-        dct['__slots__'] = tuple(slots)
+        # A slot would hide the class attributes (default values, python properties, ...)
+        # and the slots already defined by the base classes
+        slots = set(p for p in slots
+                    if p not in dct and not any(hasattr(base, p) for base in bases))
+        dct['__slots__'] = tuple(sorted(slots))
         return type.__new__(mcs, name, bases, dct)
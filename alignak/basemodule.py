@@ -347,6 +347,36 @@ class BaseModule(object):
         brok.prepare()
         return manage(brok)
 
+    def manage_broks(self, broks):
+        """Request the module to manage a batch of broks.
+
+        The default implementation calls `manage_brok` for each brok of the batch. An internal
+        module that is able to process several broks at once (eg. to send metrics by packets)
+        may redefine this function.
+
+        If managing a brok raises an exception, the next broks of the batch are still managed
+        and the first exception is raised once the whole batch is managed.
+
+        :param broks: broks to manage, oldest first
+        :type broks: list
+        :return: number of managed broks
+        :rtype: int
+        """
+        managed = 0
+        first_exception = None
+        for brok in broks:
+            try:
+                if self.manage_brok(brok):
+                    managed += 1
+            except Exception as exp:  # pylint: disable=broad-except
+                logger.warning("The module %s raised an exception for a %s brok: %s",
+                               self.name, brok.type, str(exp))
+                if first_exception is None:
+                    first_exception = exp
+        if first_exception is not None:
+            raise first_exception
+        return managed
+
     def manage_signal(self, sig, frame):  # pylint: disable=unused-argument
         """Generic function to handle signals
 
@@ -51,9 +51,17 @@ Brok are filled depending on their type (check_result, initial_state ...)
 import time
 from datetime import datetime
 
+from six import string_types
+
 from alignak.alignakobject import get_a_new_object_id
 from alignak.misc.serialization import serialize, unserialize
 
+# Broks list format exchanged between the daemons:
+# - serialized, each brok is serialized as an Alignak object and its data is a JSON string
+# - json, each brok is a JSON object and its data is embedded as is, it is not re-encoded
+BROKS_FORMAT_SERIALIZED = u'serialized'
+BROKS_FORMAT_JSON = u'json'
+
 
 class Brok(object):
     """A Brok is a piece of information exported by Alignak to the Broker.
@@ -88,6 +96,11 @@ class Brok(object):
     """
     my_type = 'brok'
 
+    # A lot of broks are living in the daemons, they do not need an instance dictionary.
+    # got, to_send, to_be_sent and sent_to_externals are set by the daemons sending the broks
+    __slots__ = ('uuid', 'prepared', 'creation_time', 'type', 'instance_id', 'data',
+                 'got', 'to_send', 'to_be_sent', 'sent_to_externals')
+
     def __init__(self, params, parsing=True):
         # pylint: disable=unused-argument
         """
@@ -96,9 +109,11 @@ class Brok(object):
         :param parsing: not used but necessary for serialization/unserialization
         :type parsing: bool
         """
-        self.uuid = params.get('uuid', get_a_new_object_id())
+        # Do not get a new identifier nor a new time if they are provided
+        self.uuid = params['uuid'] if 'uuid' in params else get_a_new_object_id()
         self.prepared = params.get('prepared', False)
-        self.creation_time = params.get('creation_time', time.time())
+        self.creation_time = \
+            params['creation_time'] if 'creation_time' in params else time.time()
         self.type = params.get('type', u'unknown')
         self.instance_id = params.get('instance_id', None)
 
@@ -144,6 +159,28 @@ class Brok(object):
             "data": self.data
         }
 
+    def get_json(self):
+        """Get the brok as a JSON object string
+
+        The brok data is embedded as is in the JSON object, thus the brok data that were
+        encoded when the brok was created are not encoded once more.
+
+        :return: JSON representation of the Brok
+        :rtype: str
+        """
+        data = self.data
+        if self.prepared:
+            data = serialize(data)
+        envelope = serialize({
+            "uuid": self.uuid,
+            "type": self.type,
+            "instance_id": self.instance_id,
+            "creation_time": self.creation_time,
+            # Only the data containing some Alignak objects need to be un-serialized
+            "objects": '__sys_python_module__' in data
+        })
+        return u'%s,"data":%s}' % (envelope[:-1], data)
+
     def prepare(self):
         """Un-serialize data from data attribute and add instance_id key if necessary
 
@@ -152,7 +189,46 @@ class Brok(object):
         # Maybe the Brok is a old daemon one or was already prepared
         # if so, the data is already ok
         if hasattr(self, 'prepared') and not self.prepared:
-            self.data = unserialize(self.data)
+            # Data received in the json format are already decoded
+            if isinstance(self.data, string_types):
+                self.data = unserialize(self.data)
             if self.instance_id:
                 self.data['instance_id'] = self.instance_id
         self.prepared = True
+
+
+def get_broks_json(broks):
+    """Get a broks list as a JSON array string (broks json format)
+
+    :param broks: broks to encode
+    :type broks: list
+    :return: JSON array of the broks
+    :rtype: str
+    """
+    return u'[%s]' % u','.join([brok.get_json() for brok in broks])
+
+
+def get_broks_from_json(data):
+    """Get a broks list from the decoded JSON data received from a daemon
+
+    Both broks formats are accepted, thus a daemon that still sends its broks in the
+    serialized format is understood.
+
+    :param data: decoded JSON data
+    :type data: list
+    :return: broks list
+    :rtype: list
+    """
+    if not isinstance(data, list):
+        return unserialize(data, True)
+
+    broks = []
+    for brok in data:
+        if '__sys_python_module__' in brok:
+            broks.append(unserialize(brok, True))
+            continue
+
+        if brok.pop('objects', True):
+            brok['data'] = unserialize(brok['data'], True)
+        broks.append(Brok(brok))
+    return broks
@@ -50,22 +50,22 @@
 """This module provides Check class which is a simple abstraction for monitoring checks
 
 """
+from six import add_metaclass
+
 from alignak.action import Action
 from alignak.property import BoolProp, IntegerProp, ListProp
 from alignak.property import StringProp
+from alignak.autoslots import AutoSlots
 
 
+# AutoSlots create the __slots__ with properties and running_properties names
+@add_metaclass(AutoSlots)
 class Check(Action):  # pylint: disable=too-many-instance-attributes
     """Check class implements monitoring concepts of checks :(status, state, output)
     Check instance are used to store monitoring plugins data (exit status, output)
     and used by schedule to raise alert, reschedule check etc.
 
     """
-    # AutoSlots create the __slots__ with properties and
-    # running_properties names
-
-    # FIXME : re-enable AutoSlots if possible
-    # __metaclass__ = AutoSlots
 
     my_type = 'check'
 
@@ -49,6 +49,8 @@
 (resolve macro, parse commands etc)
 
 """
+from six import add_metaclass
+
 from alignak.autoslots import AutoSlots
 from alignak.alignakobject import AlignakObject
 from alignak.misc.serialization import serialize, unserialize
@@ -56,16 +58,14 @@ from alignak.property import (StringProp, BoolProp, IntegerProp, ListProp, ToGue
                               PythonizeError)
 
 
+# AutoSlots create the __slots__ with properties and running_properties names
+@add_metaclass(AutoSlots)
 class CommandCall(AlignakObject):
     # pylint: disable=too-many-instance-attributes
     """This class is use when a service, contact or host define
     a command with args.
     """
 
-    # AutoSlots create the __slots__ with properties and
-    # running_properties names
-    __metaclass__ = AutoSlots
-
     my_type = 'CommandCall'
 
     properties = {
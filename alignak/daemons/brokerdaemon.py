@@ -61,13 +61,14 @@ import time
 import traceback
 import threading
 import logging
+from collections import deque
 
 # pylint: disable=wildcard-import,unused-wildcard-import
 # This import, despite not used, is necessary to include all Alignak objects modules
 from alignak.objects import *
 from alignak.misc.serialization import unserialize, AlignakClassLookupException
 from alignak.satellite import BaseSatellite
-from alignak.property import IntegerProp, StringProp
+from alignak.property import IntegerProp, FloatProp, StringProp
 from alignak.stats import statsmgr
 from alignak.http.broker_interface import BrokerInterface
 from alignak.objects.satellitelink import SatelliteLink, LinkError
@@ -89,8 +90,13 @@ class Broker(BaseSatellite):
         'type':
             StringProp(default='broker'),
         'port':
-            IntegerProp(default=7772)
-
+            IntegerProp(default=7772),
+        # Number of broks given at once to the internal modules
+        'broks_batch_size':
+            IntegerProp(default=1000),
+        # Maximum duration of the internal modules broks management in a loop turn
+        'broks_management_max_duration':
+            FloatProp(default=0.8)
     })
 
     def __init__(self, **kwargs):
@@ -113,7 +119,7 @@ class Broker(BaseSatellite):
         self.have_modules = False
 
         # All broks to manage
-        self.external_broks = []  # broks to manage
+        self.external_broks = deque()  # broks to manage
 
         # broks raised internally by the broker
         self.internal_broks = []
@@ -191,13 +197,24 @@ class Broker(BaseSatellite):
         :type brok: object
         :return: None
         """
-        # Unserialize the brok before consuming it
-        brok.prepare()
+        self.manage_broks([brok])
+
+    def manage_broks(self, broks):
+        """Get a batch of broks.
+        We put the broks data to the internal modules, each module gets the whole batch
+
+        :param broks: broks to manage
+        :type broks: list
+        :return: None
+        """
+        # Unserialize the broks before consuming them
+        for brok in broks:
+            brok.prepare()
 
         for module in self.modules_manager.get_internal_instances():
             try:
                 _t0 = time.time()
-                module.manage_brok(brok)
+                module.manage_broks(broks)
                 statsmgr.timer('manage-broks.internal.%s' % module.get_name(), time.time() - _t0)
             except Exception as exp:  # pylint: disable=broad-except
                 logger.warning("The module %s raised an exception: %s, "
@@ -392,7 +409,7 @@ class Broker(BaseSatellite):
         self.receivers.clear()
 
         # Clean our internal objects
-        self.external_broks = self.external_broks[:]
+        self.external_broks = deque(self.external_broks)
         self.internal_broks = self.internal_broks[:]
         with self.arbiter_broks_lock:
             self.arbiter_broks = self.arbiter_broks[:]
@@ -402,6 +419,44 @@ class Broker(BaseSatellite):
         # self.have_modules = False
         # self.modules_manager.clear_instances()
 
+    def manage_external_broks(self):
+        """Make the internal modules manage the broks of our backlog
+
+        The broks are given to the internal modules by batches of `broks_batch_size` broks,
+        oldest first. If the management is longer than `broks_management_max_duration` seconds,
+        the remaining broks are postponed to the next loop turn.
+
+        If no internal module is loaded, only the broks not yet sent to the external
+        modules are kept.
+
+        :return: number of managed broks
+        :rtype: int
+        """
+        if not self.modules_manager.get_internal_instances():
+            # Only keep the broks that are still to be sent to the external modules
+            self.external_broks = deque(brok for brok in self.external_broks
+                                        if getattr(brok, 'to_be_sent', False))
+            return 0
+
+        managed = 0
+        batch_size = max(1, self.broks_batch_size)
+        start = time.time()
+        while self.external_broks:
+            # Do not 'manage' for too long, we must get new broks almost every second
+            if time.time() - start > self.broks_management_max_duration:
+                logger.info("I did not yet managed all my broks, still %d broks",
+                            len(self.external_broks))
+                break
+
+            # Get the oldest broks
+            batch = [self.external_broks.popleft()
+                     for _ in range(min(batch_size, len(self.external_broks)))]
+            self.manage_broks(batch)
+            statsmgr.counter('broks.managed', len(batch))
+            managed += len(batch)
+
+        return managed
+
     def do_loop_turn(self):
         # pylint: disable=too-many-branches
         """Loop used to:
@@ -411,8 +466,8 @@ class Broker(BaseSatellite):
          * add broks to the queue of each external module
          * manage broks with each internal module
 
-         If the internal broks management is longer than 0.8 seconds, postpone to hte next
-         loop turn to avoid overloading the broker daemon.
+         If the internal broks management is longer than `broks_management_max_duration`
+         seconds, postpone to the next loop turn to avoid overloading the broker daemon.
 
          :return: None
         """
@@ -486,24 +541,7 @@ class Broker(BaseSatellite):
         logger.debug("Time to send %s broks (%d secs)", len(broks_to_send), time.time() - _t0)
 
         # Make the internal modules manage the broks
-        start = time.time()
-        while self.external_broks:
-            now = time.time()
-            # Do not 'manage' more than 0.8s, we must get new broks almost every second
-            if now - start > 0.8:
-                logger.info("I did not yet managed all my broks, still %d broks",
-                            len(self.external_broks))
-                break
-
-            # Get the first brok in the list
-            brok = self.external_broks.pop(0)
-            if self.modules_manager.get_internal_instances():
-                self.manage_brok(brok)
-                # Make a very short pause to avoid overloading
-                self.make_a_pause(0.01, check_time_change=False)
-            else:
-                if getattr(brok, 'to_be_sent', False):
-                    self.external_broks.append(brok)
+        self.manage_external_broks()
 
         # Maybe our external modules raised 'objects', so get them
         if self.get_objects_from_from_queues():
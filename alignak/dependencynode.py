@@ -83,6 +83,11 @@ class DependencyNode(object):
         self.is_of_mul = False
         self.configuration_errors = []
         self.not_value = False
+        # Running state: when the node watches its hosts and services, its state is cached
+        # until one of them changes (see watch_items)
+        self.watched = False
+        self.parent = None
+        self.cached_state = None
         if params is not None:
             if 'operand' in params:
                 self.operand = params['operand']
@@ -142,6 +147,25 @@ class DependencyNode(object):
     def get_state(self, hosts, services):
         """Get node state by looking recursively over sons and applying operand
 
+        If the node watches its hosts and services, the state is only evaluated if one of
+        them changed since the last evaluation.
+
+        :param hosts: list of available hosts to search for
+        :param services: list of available services to search for
+        :return: Node state
+        :rtype: int
+        """
+        if self.cached_state is not None:
+            return self.cached_state
+
+        state = self.evaluate_state(hosts, services)
+        if self.watched:
+            self.cached_state = state
+        return state
+
+    def evaluate_state(self, hosts, services):
+        """Evaluate node state by looking recursively over sons and applying operand
+
         :param hosts: list of available hosts to search for
         :param services: list of available services to search for
         :return: Node state
@@ -373,6 +397,69 @@ class DependencyNode(object):
         # and returns a list of unique uuids
         return list(set(res))
 
+    def watch_items(self, hosts, services, parent=None):
+        """Watch the hosts and services of the node and below
+
+        The leaf nodes are registered in their host or service, which invalidate the leaf
+        node cached state, and the cached states of its parents, when its state, its
+        acknowledgement or its downtime changes. The hosts and services are thus a reverse
+        index to the business rules that depend on them.
+
+        :param hosts: hosts objects
+        :type hosts: alignak.objects.host.Hosts
+        :param services: services objects
+        :type services: alignak.objects.service.Services
+        :param parent: parent node
+        :type parent: alignak.dependencynode.DependencyNode
+        :return: None
+        """
+        self.watched = True
+        self.parent = parent
+        self.cached_state = None
+
+        if self.operand in ['host', 'service']:
+            item = hosts[self.sons[0]] if self.operand == 'host' else services[self.sons[0]]
+            item.business_rule_nodes_add(self)
+            return
+
+        for son in self.sons:
+            son.watch_items(hosts, services, self)
+
+    def unwatch_items(self, hosts, services):
+        """Stop watching the hosts and services of the node and below
+
+        :param hosts: hosts objects
+        :type hosts: alignak.objects.host.Hosts
+        :param services: services objects
+        :type services: alignak.objects.service.Services
+        :return: None
+        """
+        self.watched = False
+        self.parent = None
+        self.cached_state = None
+
+        if self.operand in ['host', 'service']:
+            items = hosts if self.operand == 'host' else services
+            if self.sons[0] in items:
+                items[self.sons[0]].business_rule_nodes_remove(self)
+            return
+
+        for son in self.sons:
+            son.unwatch_items(hosts, services)
+
+    def invalidate(self):
+        """Forget the cached state of the node and of its parents
+
+        A node state is only cached if the states of its sons are cached, so we can stop
+        as soon as a node has no cached state
+
+        :return: None
+        """
+        node = self
+        while node is not None and node.cached_state is not None:
+            node.cached_state = None
+            node = node.parent
+
     def switch_zeros_of_values(self):
         """If we are a of: rule, we can get some 0 in of_values,
            if so, change them with NB sons instead
@@ -224,6 +224,7 @@ class Downtime(AlignakObject):
                 if downtime_id in service.downtimes:
                     downtime = service.downtimes[downtime_id]
                     broks.extend(downtime.enter(timeperiods, hosts, services))
+        item.deadlines_changed('downtimes')
         return broks
 
     def exit(self, timeperiods, hosts, services):
@@ -274,6 +275,7 @@ class Downtime(AlignakObject):
         # So we should set a flag here which informs the consume_result function
         # to send a notification
         item.in_scheduled_downtime_during_last_check = True
+        item.deadlines_changed('downtimes')
         return broks
 
     def cancel(self, timeperiods, hosts, services):
@@ -303,6 +305,7 @@ class Downtime(AlignakObject):
         self.del_automatic_comment(item)
         self.can_be_deleted = True
         item.in_scheduled_downtime_during_last_check = True
+        item.deadlines_changed('downtimes')
         # Nagios does not notify on canceled downtimes
         # res.extend(self.ref.create_notifications('DOWNTIMECANCELLED'))
         # Also cancel other downtimes triggered by me
@@ -50,21 +50,21 @@
 """
 import time
 
+from six import add_metaclass
+
 from alignak.action import Action
 from alignak.property import StringProp, BoolProp
 from alignak.autoslots import AutoSlots
 
 
+# AutoSlots create the __slots__ with properties and running_properties names
+@add_metaclass(AutoSlots)
 class EventHandler(Action):
     """Notification class, inherits from action class. Used to execute action
     when a host or a service is in a bad state
 
     """
 
-    # AutoSlots create the __slots__ with properties and
-    # running_properties names
-    __metaclass__ = AutoSlots
-
     my_type = 'eventhandler'
 
     properties = Action.properties.copy()
@@ -21,6 +21,7 @@ in order to parse specific HTTP content type
 See http://cherrypy.readthedocs.org/en/latest/pkg/cherrypy.html#module-cherrypy._cpreqbody
 for details about custom processors in Cherrypy
 """
+import io
 import json
 import zlib
 
@@ -29,6 +30,37 @@ from cherrypy._cpcompat import ntou
 
 from alignak.misc.serialization import unserialize, AlignakClassLookupException
 
+# zstd compression is only available if the zstandard package is installed
+try:
+    import zstandard
+except ImportError:  # pragma: no cover, not with unit tests
+    zstandard = None
+
+# Maximum size of a decompressed request body, a bigger body is rejected
+MAX_DECOMPRESSED_SIZE = 256 * 1024 * 1024
+
+
+def zlib_decompress(body, wbits, encoding):
+    """Decompress zlib or gzip data, no more than `MAX_DECOMPRESSED_SIZE` bytes
+
+    :param body: compressed data
+    :type body: bytes
+    :param wbits: zlib window size and header format
+    :type wbits: int
+    :param encoding: data encoding, for the error messages
+    :type encoding: str
+    :return: decompressed data
+    :rtype: bytes
+    """
+    decompressor = zlib.decompressobj(wbits)
+    try:
+        data = decompressor.decompress(body, MAX_DECOMPRESSED_SIZE)
+    except zlib.error:
+        raise cherrypy.HTTPError(400, 'Invalid %s data' % encoding)
+    if decompressor.unconsumed_tail:
+        raise cherrypy.HTTPError(413, 'Decompressed %s data is too large' % encoding)
+    return data
+
 
 def zlib_processor(entity):  # pragma: no cover, not used in the testing environment...
     """Read application/zlib data and put content into entity.params for later use.
@@ -40,11 +72,7 @@ def zlib_processor(entity):  # pragma: no cover, not used in the testing environ
     if not entity.headers.get(ntou("Content-Length"), ntou("")):
         raise cherrypy.HTTPError(411)
 
-    body = entity.fp.read()
-    try:
-        body = zlib.decompress(body)
-    except zlib.error:
-        raise cherrypy.HTTPError(400, 'Invalid zlib data')
+    body = zlib_decompress(entity.fp.read(), zlib.MAX_WBITS, 'zlib')
     try:
         raw_params = json.loads(body)
     except ValueError:
@@ -68,3 +96,70 @@ def zlib_processor(entity):  # pragma: no cover, not used in the testing environ
             entity.params[key].append(value)
         else:
             entity.params[key] = value
+
+
+def decompress(body, encoding):
+    """Decompress a request body according to its content encoding
+
+    :param body: compressed request body
+    :type body: bytes
+    :param encoding: content encoding: gzip, deflate or zstd
+    :type encoding: str
+    :return: decompressed body
+    :rtype: bytes
+    """
+    if encoding == 'zstd':
+        if zstandard is None:
+            raise cherrypy.HTTPError(415, 'zstd encoding is not supported')
+        # Read the data by chunks, the frame content size is not trusted
+        chunks = []
+        size = 0
+        try:
+            reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body))
+            while True:
+                chunk = reader.read(65536)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_DECOMPRESSED_SIZE:
+                    raise cherrypy.HTTPError(413, 'Decompressed zstd data is too large')
+                chunks.append(chunk)
+        except zstandard.ZstdError:
+            raise cherrypy.HTTPError(400, 'Invalid zstd data')
+        return b''.join(chunks)
+
+    if encoding not in ['gzip', 'deflate']:
+        raise cherrypy.HTTPError(415, 'Unsupported content encoding: %s' % encoding)
+    # Automatic header detection, gzip or zlib
+    return zlib_decompress(body, 32 + zlib.MAX_WBITS, encoding)
+
+
+def decompress_request_body():
+    """Decompress the request body if it has a content encoding
+
+    This tool must run before the request body is processed (eg. by the json_in tool),
+    the body processors then get the decompressed body.
+
+    :return: None
+    """
+    request = cherrypy.serving.request
+    encoding = request.headers.get('Content-Encoding', '').strip().lower()
+    if not encoding or encoding == 'identity' or not request.process_request_body:
+        return
+
+    # The body is not yet wrapped in a sized reader, do not read more than its length
+    if request.body.length is None:
+        body = request.body.fp.read()
+    else:
+        body = request.body.fp.read(request.body.length)
+    body = decompress(body, encoding)
+    request.body.fp = io.BytesIO(body)
+    request.body.length = len(body)
+    request.headers['Content-Length'] = str(len(body))
+    request.body.headers['Content-Length'] = str(len(body))
+    del request.headers['Content-Encoding']
+
+
+# Before the json_in tool that has a priority of 30
+cherrypy.tools.decompress = cherrypy.Tool('before_request_body', decompress_request_body,
+                                          priority=20)
@@ -46,14 +46,45 @@
 """This module provides HTTPClient class. Used by daemon to connect to HTTP servers (other daemons)
 
 """
+import json
+import zlib
 import logging
 import requests
 from requests.adapters import HTTPAdapter
 
 from alignak.misc.serialization import serialize
 
+# zstd compression is only available if the zstandard package is installed
+try:
+    import zstandard
+except ImportError:  # pragma: no cover, not with unit tests
+    zstandard = None
+
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+# Content type of the streamed responses: one JSON document per line
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+# Do not compress the small requests
+COMPRESSION_MIN_SIZE = 1024
+
+
+def compress(data, compression):
+    """Compress the data with the given compression algorithm
+
+    :param data: data to compress
+    :type data: bytes
+    :param compression: gzip or zstd
+    :type compression: str
+    :return: compressed data
+    :rtype: bytes
+    """
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor().compress(data)
+    # gzip container, as expected by the Content-Encoding
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
 
 class HTTPClientException(Exception):
     """Simple HTTP Exception - raised for all requests exception except for a timeout"""
@@ -128,7 +159,7 @@ class HTTPClient(object):
 
     """
     def __init__(self, address='', port=0, use_ssl=False, short_timeout=3,
-                 long_timeout=120, uri='', strong_ssl=False, proxy=''):
+                 long_timeout=120, uri='', strong_ssl=False, proxy='', compression=''):
         # pylint: disable=too-many-arguments
         self.address = address
         self.port = port
@@ -141,6 +172,15 @@ class HTTPClient(object):
             uri = "%s://%s:%s/" % (protocol, self.address, self.port)
         self.uri = uri
 
+        # Compression of the requests body: '' (none), gzip or zstd
+        if compression == 'zstd' and zstandard is None:
+            logger.warning("The zstandard package is not installed, using gzip compression")
+            compression = 'gzip'
+        if compression and compression not in ['gzip', 'zstd']:
+            logger.warning("Unknown compression '%s', not using compression", compression)
+            compression = ''
+        self.compression = compression
+
         self._requests_con = requests.Session()
         # self.session = requests.Session()
         self._requests_con.header = {'Content-Type': 'application/json'}
@@ -187,27 +227,38 @@ class HTTPClient(object):
                 'https': proxy,
             }
 
-    def get(self, path, args=None, wait=False):
+    def get(self, path, args=None, wait=False, stream=False):
         """GET an HTTP request to a daemon
 
+        If stream is set, the daemon is requested to stream its response as one JSON
+        document per line. The response is decoded line by line, thus the whole response
+        is never buffered. A daemon that does not stream its response sends a JSON document.
+
         :param path: path to do the request
         :type path: str
         :param args: args to add in the request
         :type args: dict
         :param wait: True for a long timeout
         :type wait: bool
+        :param stream: True to request a streamed response
+        :type stream: bool
         :return: None
         """
         if args is None:
             args = {}
         uri = self.make_uri(path)
         timeout = self.make_timeout(wait)
+        headers = {'Accept': '%s, application/json' % NDJSON_CONTENT_TYPE} if stream else None
         try:
             logger.debug("get: %s, timeout: %s, params: %s", uri, timeout, args)
-            rsp = self._requests_con.get(uri, params=args, timeout=timeout, verify=self.strong_ssl)
-            logger.debug("got: %d - %s", rsp.status_code, rsp.text)
+            rsp = self._requests_con.get(uri, params=args, timeout=timeout, verify=self.strong_ssl,
+                                         headers=headers, stream=stream)
             if rsp.status_code != 200:
                 raise HTTPClientDataException(rsp.status_code, rsp.text, uri)
+            if rsp.headers.get('Content-Type', '').startswith(NDJSON_CONTENT_TYPE):
+                logger.debug("got: %d - streamed response", rsp.status_code)
+                return [json.loads(line) for line in rsp.iter_lines() if line]
+            logger.debug("got: %d - %s", rsp.status_code, rsp.text)
             return rsp.json()
         except (requests.Timeout, requests.ConnectTimeout):
             raise HTTPClientTimeoutException(timeout, uri)
@@ -219,6 +270,8 @@ class HTTPClient(object):
     def post(self, path, args, wait=False):
         """POST an HTTP request to a daemon
 
+        If the client compression is set, the request body is compressed.
+
         :param path: path to do the request
         :type path: str
         :param args: args to add in the request
@@ -234,7 +287,13 @@ class HTTPClient(object):
             args[key] = serialize(value, True)
         try:
             logger.debug("post: %s, timeout: %s, params: %s", uri, timeout, args)
-            rsp = self._requests_con.post(uri, json=args, timeout=timeout, verify=self.strong_ssl)
+            data = json.dumps(args).encode('utf-8')
+            headers = {'Content-Type': 'application/json'}
+            if self.compression and len(data) > COMPRESSION_MIN_SIZE:
+                data = compress(data, self.compression)
+                headers['Content-Encoding'] = self.compression
+            rsp = self._requests_con.post(uri, data=data, headers=headers, timeout=timeout,
+                                          verify=self.strong_ssl)
             logger.debug("got: %d - %s", rsp.status_code, rsp.text)
             if rsp.status_code != 200:
                 raise HTTPClientDataException(rsp.status_code, rsp.text, uri)
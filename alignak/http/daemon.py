@@ -88,7 +88,10 @@ class HTTPDaemon(object):
                                             'multipart': process_multipart,
                                             'application/zlib': zlib_processor},
                 'tools.gzip.on': True,
-                'tools.gzip.mime_types': ['text/*', 'application/json'],
+                'tools.gzip.mime_types': ['text/*', 'application/json', 'application/x-ndjson'],
+
+                # Compressed requests body
+                'tools.decompress.on': True,
 
                 'tools.response_headers.on': True,
                 'tools.response_headers.headers': [('Access-Control-Allow-Origin', '*')],
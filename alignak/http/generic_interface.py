@@ -31,14 +31,63 @@ import inspect
 import logging
 import random
 import time
+import types
 import cherrypy
+from cherrypy._cpcompat import json_encode
 
 from alignak.log import ALIGNAK_LOGGER_NAME
 from alignak.misc.serialization import serialize
+from alignak.brok import Brok, BROKS_FORMAT_SERIALIZED, BROKS_FORMAT_JSON, get_broks_json
+from alignak.action import RESULTS_FORMAT_SERIALIZED
+from alignak.http.client import NDJSON_CONTENT_TYPE
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
 
+def json_encoded_handler(*args, **kwargs):
+    """JSON output handler that do not re-encode an already JSON encoded response
+
+    To be used with the CherryPy json_out tool for the endpoints that may return some
+    JSON encoded bytes or a generator of JSON lines. In this last case, the response
+    is streamed.
+
+    :return: JSON encoded response
+    :rtype: bytes
+    """
+    # pylint: disable=protected-access
+    value = cherrypy.serving.request._json_inner_handler(*args, **kwargs)
+    if isinstance(value, types.GeneratorType):
+        cherrypy.serving.response.stream = True
+        cherrypy.serving.response.headers['Content-Type'] = NDJSON_CONTENT_TYPE
+        return value
+    if isinstance(value, bytes):
+        return value
+    return json_encode(value)
+
+
+def stream_accepted():
+    """Get if the client accepts a streamed response (one JSON document per line)
+
+    :return: True if the client accepts a streamed response
+    :rtype: bool
+    """
+    return NDJSON_CONTENT_TYPE in cherrypy.serving.request.headers.get('Accept', '')
+
+
+def ndjson_stream(items, encode=serialize):
+    """Get a generator of the JSON lines of the provided items
+
+    :param items: items to stream
+    :type items: list
+    :param encode: function used to JSON encode an item
+    :type encode: function
+    :return: generator of JSON lines
+    :rtype: generator
+    """
+    for item in items:
+        yield (u'%s\n' % encode(item)).encode('utf-8')
+
+
 class GenericInterface(object):
     """Interface for inter satellites communications"""
 
@@ -363,35 +412,69 @@ class GenericInterface(object):
         return res
 
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def _results(self, scheduler_instance_id):
+    @cherrypy.tools.json_out(handler=json_encoded_handler)
+    def _results(self, scheduler_instance_id, results_format=RESULTS_FORMAT_SERIALIZED):
         """Get the results of the executed actions for the scheduler which instance id is provided
 
         Calling this method for daemons that are not configured as passive do not make sense.
         Indeed, this service should only be exposed on poller and reactionner daemons.
 
+        The results are streamed if the client accepts it.
+
         :param scheduler_instance_id: instance id of the scheduler
         :type scheduler_instance_id: string
+        :param results_format: results format, serialized (default) or compact
+        :type results_format: str
         :return: serialized list
         :rtype: str
         """
         with self.app.lock:
-            res = self.app.get_results_from_passive(scheduler_instance_id)
+            res = self.app.get_results_from_passive(scheduler_instance_id, results_format)
+        if stream_accepted():
+            return ndjson_stream(res)
         return serialize(res, True)
 
+    @staticmethod
+    def _broks_response(broks, broks_format=BROKS_FORMAT_SERIALIZED):
+        """Get the response for a broks list according to the format requested by the broker
+
+        In the json format, the broks data that were encoded when the broks were created are
+        embedded as is in the response, thus the response is already JSON encoded.
+
+        The broks are streamed, one brok per line, if the client accepts it.
+
+        :param broks: broks to send
+        :type broks: list
+        :param broks_format: requested broks format
+        :type broks_format: str
+        :return: serialized broks list, JSON encoded broks list or JSON lines generator
+        :rtype: list | bytes | generator
+        """
+        if stream_accepted():
+            return ndjson_stream(broks, Brok.get_json if broks_format == BROKS_FORMAT_JSON
+                                 else serialize)
+        if broks_format == BROKS_FORMAT_JSON:
+            return get_broks_json(broks).encode('utf-8')
+        return serialize(broks, True)
+
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def _broks(self, broker_name):  # pylint: disable=unused-argument
+    @cherrypy.tools.json_out(handler=json_encoded_handler)
+    def _broks(self, broker_name, broks_format=BROKS_FORMAT_SERIALIZED):
+        # pylint: disable=unused-argument
         """Get the broks from the daemon
 
         This is used by the brokers to get the broks list of a daemon
 
+        :param broker_name: broker name, used to filter broks
+        :type broker_name: str
+        :param broks_format: broks format, serialized (default) or json
+        :type broks_format: str
         :return: Brok list serialized
-        :rtype: dict
+        :rtype: list | bytes
         """
         with self.app.broks_lock:
             res = self.app.get_broks()
-        return serialize(res, True)
+        return self._broks_response(res, broks_format)
 
     @cherrypy.expose
     @cherrypy.tools.json_out()
@@ -24,8 +24,11 @@ from collections import OrderedDict, Callable
 
 import cherrypy
 
-from alignak.http.generic_interface import GenericInterface
-from alignak.misc.serialization import serialize, unserialize
+from alignak.http.generic_interface import (GenericInterface, json_encoded_handler,
+                                            stream_accepted, ndjson_stream)
+from alignak.misc.serialization import serialize
+from alignak.brok import BROKS_FORMAT_SERIALIZED
+from alignak.action import get_results_from_json
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
@@ -384,16 +387,18 @@ class SchedulerInterface(GenericInterface):
             return self.app.sched.fill_initial_broks(broker_name)
 
     @cherrypy.expose
-    @cherrypy.tools.json_out()
-    def _broks(self, broker_name):
+    @cherrypy.tools.json_out(handler=json_encoded_handler)
+    def _broks(self, broker_name, broks_format=BROKS_FORMAT_SERIALIZED):
         """Get the broks from a scheduler, used by brokers
 
         This is used by the brokers to get the broks list of a scheduler
 
         :param broker_name: broker name, used to filter broks
         :type broker_name: str
-        :return: serialized brok list
-        :rtype: dict
+        :param broks_format: broks format, serialized (default) or json
+        :type broks_format: str
+        :return: serialized brok list or JSON encoded brok list
+        :rtype: dict | list | bytes
         """
         logger.debug("Getting broks for %s from the scheduler", broker_name)
         for broker_link in list(self.app.brokers.values()):
@@ -407,10 +412,10 @@ class SchedulerInterface(GenericInterface):
         with self.app.broks_lock:
             res = self.app.get_broks(broker_name)
 
-        return serialize(res, True)
+        return self._broks_response(res, broks_format)
 
     @cherrypy.expose
-    @cherrypy.tools.json_out()
+    @cherrypy.tools.json_out(handler=json_encoded_handler)
     def _checks(self, do_checks=False, do_actions=False, poller_tags=None,
                 reactionner_tags=None, worker_name='none', module_types=None):
         """Get checks from scheduler, used by poller or reactionner when they are
@@ -419,6 +424,8 @@ class SchedulerInterface(GenericInterface):
         This function is not intended for external use. Let the poller and reactionner
         manage all this stuff by themselves ;)
 
+        The checks are streamed if the client accepts it.
+
         :param do_checks: used for poller to get checks
         :type do_checks: bool
         :param do_actions: used for reactionner to get actions
@@ -445,6 +452,8 @@ class SchedulerInterface(GenericInterface):
         res = self.app.sched.get_to_run_checks(do_checks, do_actions, poller_tags, reactionner_tags,
                                                worker_name, module_types)
 
+        if stream_accepted():
+            return ndjson_stream(res)
         return serialize(res, True)
 
     @cherrypy.expose
@@ -468,7 +477,7 @@ class SchedulerInterface(GenericInterface):
         who_sent = res['from']
         results = res['results']
 
-        results = unserialize(results, no_load=True)
+        results = get_results_from_json(results)
         if results:
             logger.debug("Got some results: %d results from %s", len(results), who_sent)
         else:
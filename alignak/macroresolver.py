@@ -76,6 +76,9 @@ class MacroResolver(Borg):
 
     my_type = 'macroresolver'
 
+    # Maximum number of compiled command lines templates
+    templates_cache_size = 4096
+
     # Global macros
     macros = {
         'TOTALHOSTS':
@@ -173,31 +176,8 @@ class MacroResolver(Borg):
         self.illegal_macro_output_chars = self.my_conf.illegal_macro_output_chars
         self.env_prefix = self.my_conf.env_variables_prefix
 
-    @staticmethod
-    def _get_macros(chain):
-        """Get all macros of a chain
-        Cut '$' char and create a dict with the following structure::
-
-        { 'MacroSTR1' : {'val': '', 'type': 'unknown'}
-          'MacroSTR2' : {'val': '', 'type': 'unknown'}
-        }
-
-        :param chain: chain to parse
-        :type chain: str
-        :return: dict with macro parsed as key
-        :rtype: dict
-        """
-        regex = re.compile(r'(\$)')
-        elts = regex.split(chain)
-        macros = {}
-        in_macro = False
-        for elt in elts:
-            if elt == '$':
-                in_macro = not in_macro
-            elif in_macro:
-                macros[elt] = {'val': '', 'type': 'unknown'}
-
-        return macros
+        # The macros may have changed with the configuration
+        self.templates = collections.OrderedDict()
 
     def _get_value_from_element(self, elt, prop):
         # pylint: disable=too-many-return-statements
@@ -312,6 +292,146 @@ class MacroResolver(Borg):
 
         return env
 
+    def _get_template(self, c_line, data, cached=True):
+        """Get the compiled template of a command line
+
+        The command line is split on the '$' characters and the macros type are found
+        according to the objects in data. The compiled templates are stored in a LRU cache
+        with the command line and the objects classes as a key because the command lines of
+        the checks are almost always the same.
+
+        The template is a tuple with:
+
+        * a list of (text, is_macro) tokens
+        * a dict with the macro names as key and (type, information) tuples as value,
+          the information is the index of the object in data for an object macro and
+          (class, custom macro name) for a custom macro
+
+        :param c_line: command line to compile
+        :type c_line: str
+        :param data: objects list, use to look for a specific macro
+        :type data: list
+        :param cached: use and store the template in the templates cache
+        :type cached: bool
+        :return: compiled template
+        :rtype: tuple
+        """
+        key = (c_line, tuple(obj.__class__ for obj in data))
+        if cached:
+            try:
+                # The most recently used templates are the last ones
+                template = self.templates.pop(key)
+                self.templates[key] = template
+                return template
+            except KeyError:
+                pass
+            except AttributeError:
+                self.templates = collections.OrderedDict()
+
+        elts = c_line.split('$')
+        tokens = []
+        macros = {}
+        for idx, elt in enumerate(elts):
+            if idx % 2 == 0:
+                tokens.append((elt, False))
+            elif idx == len(elts) - 1:
+                # Not terminated macro
+                tokens.append(('$' + elt, False))
+            else:
+                tokens.append((elt, True))
+                macros[elt] = {'val': '', 'type': 'unknown'}
+
+        # Put in the macros the type of macro for all macros
+        self._get_type_of_macro(macros, data)
+        positions = dict((id(obj), idx) for idx, obj in enumerate(data))
+        for macro in macros:
+            info = None
+            if macros[macro]['type'] == 'object':
+                info = positions[id(macros[macro]['object'])]
+            elif macros[macro]['type'] == 'CUSTOM':
+                cls_type = macros[macro]['class']
+                # Beware : only cut the first _HOST or _SERVICE or _CONTACT value,
+                # so the macro name can have it on it..
+                info = (cls_type, re.split('_' + cls_type, macro, 1)[1].upper())
+            macros[macro] = (macros[macro]['type'], info)
+
+        template = (tokens, macros)
+        if cached:
+            self.templates[key] = template
+            if len(self.templates) > self.templates_cache_size:
+                # Forget the least recently used template
+                self.templates.popitem(last=False)
+        return template
+
+    def _resolve_macro(self, macro, macro_type, info, data, args, macromodulations, timeperiods):
+        # pylint: disable=too-many-arguments, too-many-branches, too-many-locals
+        """Get the value of a macro which type is known
+
+        :param macro: macro name
+        :type macro: str
+        :param macro_type: macro type (see _get_type_of_macro)
+        :type macro_type: str
+        :param info: macro type information (see _get_template)
+        :param data: objects list, use to look for a specific macro
+        :type data: list
+        :param args: args given to the command line, used to get "ARGN" macros.
+        :type args:
+        :param macromodulations: the available macro modulations
+        :type macromodulations: dict
+        :param timeperiods: the available timeperiods
+        :type timeperiods: dict
+        :return: macro value, '' if the macro is not resolved
+        :rtype: str
+        """
+        value = ''
+        # If type ARGN, look at ARGN cutting
+        if macro_type == 'ARGN' and args is not None:
+            value = self._resolve_argn(macro, args)
+        # If object type, get value from a property
+        elif macro_type == 'object':
+            obj = data[info]
+            prop = obj.macros[macro]
+            if not prop:
+                return value
+            value = self._get_value_from_element(obj, prop)
+            # Now check if we do not have a 'output' macro. If so, we must
+            # delete all special characters that can be dangerous
+            if macro in self.output_macros:
+                logger.debug("-> macro from: %s, %s = %s", obj, macro, value)
+                value = self._delete_unwanted_caracters(value)
+        # If custom type, get value from an object custom variables
+        elif macro_type == 'CUSTOM':
+            # Ok, we've got the macro like MAC_ADDRESS for _HOSTMAC_ADDRESS
+            cls_type, macro_name = info
+            logger.debug(" ->: %s - %s", cls_type, macro_name)
+            # Now we get the element in data that have the type HOST
+            # and we check if it got the custom value
+            for elt in data:
+                if not elt or elt.__class__.my_type.upper() != cls_type:
+                    continue
+                logger.debug("   : for %s: %s", elt, elt.customs)
+                if not getattr(elt, 'customs'):
+                    continue
+                if '_' + macro_name in elt.customs:
+                    value = elt.customs['_' + macro_name]
+                logger.debug("   : macro %s = %s", macro, value)
+
+                # Then look on the macromodulations, in reverse order, so
+                # the last defined will be the first applied
+                mms = getattr(elt, 'macromodulations', [])
+                for macromodulation_id in mms[::-1]:
+                    macromodulation = macromodulations[macromodulation_id]
+                    if not macromodulation.is_active(timeperiods):
+                        continue
+                    # Look if the modulation got the value,
+                    # but also if it's currently active
+                    if "_%s" % macro_name in macromodulation.customs:
+                        value = macromodulation.customs["_%s" % macro_name]
+        # If on-demand type, get value from an dynamic provided data objects
+        elif macro_type == 'ONDEMAND':
+            value = self._resolve_ondemand(macro, data)
+        return value
+
     def resolve_simple_macros_in_string(self, c_line, data, macromodulations, timeperiods,
                                         args=None):
         # pylint: disable=too-many-locals, too-many-branches, too-many-nested-blocks
@@ -339,87 +459,35 @@ class MacroResolver(Borg):
         # like $USER1$ hiding like a ninja in a $ARG2$ Macro. And if
         # $USER1$ is pointing to $USER34$ etc etc, we should loop
         # until we reach the bottom. So the last loop is when we do
-        # not still have macros :)
-        still_got_macros = True
+        # not still have macros or when nothing changed :)
         nb_loop = 0
-        while still_got_macros:
+        while True:
             nb_loop += 1
-            # Ok, we want the macros in the command line
-            macros = self._get_macros(c_line)
+            # Ok, we want the macros in the command line. Only the first command line is
+            # a template, the next ones are built with the macros values
+            tokens, macros = self._get_template(c_line, data, cached=nb_loop == 1)
             if not macros:
                 break
 
-            # Put in the macros the type of macro for all macros
-            self._get_type_of_macro(macros, data)
-
-            # We can get out if we do not have macros this loop
-            still_got_macros = True if macros else False
-
             # Now we get values from elements
+            values = {}
             for macro in macros:
-                # If type ARGN, look at ARGN cutting
-                if macros[macro]['type'] == 'ARGN' and args is not None:
-                    macros[macro]['val'] = self._resolve_argn(macro, args)
-                    macros[macro]['type'] = 'resolved'
-                # If object type, get value from a property
-                if macros[macro]['type'] == 'object':
-                    obj = macros[macro]['object']
-                    if obj not in data:
-                        continue
-                    prop = obj.macros[macro]
-                    if not prop:
-                        continue
-                    macros[macro]['val'] = self._get_value_from_element(obj, prop)
-                    # Now check if we do not have a 'output' macro. If so, we must
-                    # delete all special characters that can be dangerous
-                    if macro in self.output_macros:
-                        logger.debug("-> macro from: %s, %s = %s", obj, macro, macros[macro])
-                        macros[macro]['val'] = self._delete_unwanted_caracters(macros[macro]['val'])
-                # If custom type, get value from an object custom variables
-                if macros[macro]['type'] == 'CUSTOM':
-                    cls_type = macros[macro]['class']
-                    # Beware : only cut the first _HOST or _SERVICE or _CONTACT value,
-                    # so the macro name can have it on it..
-                    macro_name = re.split('_' + cls_type, macro, 1)[1].upper()
-                    logger.debug(" ->: %s - %s", cls_type, macro_name)
-                    # Ok, we've got the macro like MAC_ADDRESS for _HOSTMAC_ADDRESS
-                    # Now we get the element in data that have the type HOST
-                    # and we check if it got the custom value
-                    for elt in data:
-                        if not elt or elt.__class__.my_type.upper() != cls_type:
-                            continue
-                        logger.debug("   : for %s: %s", elt, elt.customs)
-                        if not getattr(elt, 'customs'):
-                            continue
-                        if '_' + macro_name in elt.customs:
-                            macros[macro]['val'] = elt.customs['_' + macro_name]
-                        logger.debug("   : macro %s = %s", macro, macros[macro]['val'])
-
-                        # Then look on the macromodulations, in reverse order, so
-                        # the last defined will be the first applied
-                        mms = getattr(elt, 'macromodulations', [])
-                        for macromodulation_id in mms[::-1]:
-                            macromodulation = macromodulations[macromodulation_id]
-                            if not macromodulation.is_active(timeperiods):
-                                continue
-                            # Look if the modulation got the value,
-                            # but also if it's currently active
-                            if "_%s" % macro_name in macromodulation.customs:
-                                macros[macro]['val'] = macromodulation.customs["_%s" % macro_name]
-                # If on-demand type, get value from an dynamic provided data objects
-                if macros[macro]['type'] == 'ONDEMAND':
-                    macros[macro]['val'] = self._resolve_ondemand(macro, data)
+                macro_type, info = macros[macro]
+                values[macro] = "%s" % self._resolve_macro(macro, macro_type, info, data, args,
+                                                           macromodulations, timeperiods)
 
             # We resolved all we can, now replace the macros in the command call
-            for macro in macros:
-                c_line = c_line.replace("$%s$" % macro, "%s" % (macros[macro]['val']))
+            new_line = ''.join(values[text] if is_macro else text for text, is_macro in tokens)
 
             # A $$ means we want a $, it's not a macro!
             # We replace $$ by a big dirty thing to be sure to not misinterpret it
-            c_line = c_line.replace("$$", "DOUBLEDOLLAR")
+            new_line = new_line.replace("$$", "DOUBLEDOLLAR")
 
-            if nb_loop > 32:  # too much loop, we exit
-                still_got_macros = False
+            # Nothing changed or too much loop, we exit
+            if new_line == c_line or nb_loop > 32:
+                c_line = new_line
+                break
+            c_line = new_line
 
         # We now replace the big dirty token we made by only a simple $
         c_line = c_line.replace("DOUBLEDOLLAR", "$")
@@ -657,8 +725,8 @@ class MacroResolver(Borg):
         if state is None and state_type is None:
             return len(self.hosts)
         if state_type:
-            return sum(1 for h in self.hosts if h.state == state and h.state_type == state_type)
-        return sum(1 for h in self.hosts if h.state == state)
+            return self.hosts.get_states_counters().count(state=state, state_type=state_type)
+        return self.hosts.get_states_counters().count(state=state)
 
     def _tot_unhandled_hosts_by_state(self, state):
         """Generic function to get the number of unhandled problem hosts in the specified state
@@ -668,8 +736,8 @@ class MacroResolver(Borg):
         :return: number of host in state *state* and which are not acknowledged problems
         :rtype: int
         """
-        return sum(1 for h in self.hosts if h.state == state and h.state_type == u'HARD' and
-                   h.is_problem and not h.problem_has_been_acknowledged)
+        return self.hosts.get_states_counters().count(state=state, state_type=u'HARD',
+                                                      is_problem=True, acknowledged=False)
 
     def _get_total_hosts(self, state_type=None):
         """
@@ -731,7 +799,7 @@ class MacroResolver(Borg):
         :return: number of hosts with is_problem attribute True
         :rtype: int
         """
-        return sum(1 for h in self.hosts if h.is_problem)
+        return self.hosts.get_states_counters().count(is_problem=True)
 
     def _get_total_hosts_problems_unhandled(self):
         """
@@ -740,7 +808,7 @@ class MacroResolver(Borg):
         :return: Number of hosts which are problems and not handled
         :rtype: int
         """
-        return sum(1 for h in self.hosts if h.is_problem and not h.problem_has_been_acknowledged)
+        return self.hosts.get_states_counters().count(is_problem=True, acknowledged=False)
 
     def _get_total_hosts_problems_handled(self):
         """
@@ -749,7 +817,7 @@ class MacroResolver(Borg):
         :return: Number of hosts which are problems and not handled
         :rtype: int
         """
-        return sum(1 for h in self.hosts if h.is_problem and h.problem_has_been_acknowledged)
+        return self.hosts.get_states_counters().count(is_problem=True, acknowledged=True)
 
     def _get_total_hosts_downtimed(self):
         """
@@ -758,7 +826,7 @@ class MacroResolver(Borg):
         :return: Number of hosts which are downtimed
         :rtype: int
         """
-        return sum(1 for h in self.hosts if h.in_scheduled_downtime)
+        return self.hosts.get_states_counters().count(downtimed=True)
 
     def _get_total_hosts_not_monitored(self):
         """
@@ -767,8 +835,7 @@ class MacroResolver(Borg):
         :return: Number of hosts which are not monitored
         :rtype: int
         """
-        return sum(1 for h in self.hosts if not h.active_checks_enabled and
-                   not h.passive_checks_enabled)
+        return self.hosts.get_states_counters().count(monitored=False)
 
     def _get_total_hosts_flapping(self):
         """
@@ -777,7 +844,7 @@ class MacroResolver(Borg):
         :return: Number of hosts which are not monitored
         :rtype: int
         """
-        return sum(1 for h in self.hosts if h.is_flapping)
+        return self.hosts.get_states_counters().count(flapping=True)
 
     def _tot_services_by_state(self, state=None, state_type=None):
         """Generic function to get the number of services in the specified state
@@ -793,8 +860,8 @@ class MacroResolver(Borg):
         if state is None and state_type is None:
             return len(self.services)
         if state_type:
-            return sum(1 for s in self.services if s.state == state and s.state_type == state_type)
-        return sum(1 for s in self.services if s.state == state)
+            return self.services.get_states_counters().count(state=state, state_type=state_type)
+        return self.services.get_states_counters().count(state=state)
 
     def _tot_unhandled_services_by_state(self, state):
         """Generic function to get the number of unhandled problem services in the specified state
@@ -804,8 +871,8 @@ class MacroResolver(Borg):
         :return: number of service in state *state* and which are not acknowledged problems
         :rtype: int
         """
-        return sum(1 for s in self.services if s.state == state and
-                   s.is_problem and not s.problem_has_been_acknowledged)
+        return self.services.get_states_counters().count(state=state, is_problem=True,
+                                                         acknowledged=False)
 
     def _get_total_services(self, state_type=None):
         """
@@ -894,7 +961,7 @@ class MacroResolver(Borg):
         :return: number of services with is_problem attribute True
         :rtype: int
         """
-        return sum(1 for s in self.services if s.is_problem)
+        return self.services.get_states_counters().count(is_problem=True)
 
     def _get_total_services_problems_unhandled(self):
         """Get the number of services that are a problem and that are not acknowledged
@@ -902,7 +969,7 @@ class MacroResolver(Borg):
         :return: number of problem services which are not acknowledged
         :rtype: int
         """
-        return sum(1 for s in self.services if s.is_problem and not s.problem_has_been_acknowledged)
+        return self.services.get_states_counters().count(is_problem=True, acknowledged=False)
 
     def _get_total_services_problems_handled(self):
         """
@@ -911,7 +978,7 @@ class MacroResolver(Borg):
         :return: Number of services which are problems and not handled
         :rtype: int
         """
-        return sum(1 for s in self.services if s.is_problem and s.problem_has_been_acknowledged)
+        return self.services.get_states_counters().count(is_problem=True, acknowledged=True)
 
     def _get_total_services_downtimed(self):
         """
@@ -920,7 +987,7 @@ class MacroResolver(Borg):
         :return: Number of services which are downtimed
         :rtype: int
         """
-        return sum(1 for s in self.services if s.in_scheduled_downtime)
+        return self.services.get_states_counters().count(downtimed=True)
 
     def _get_total_services_not_monitored(self):
         """
@@ -929,8 +996,7 @@ class MacroResolver(Borg):
         :return: Number of services which are not monitored
         :rtype: int
         """
-        return sum(1 for s in self.services if not s.active_checks_enabled and
-                   not s.passive_checks_enabled)
+        return self.services.get_states_counters().count(monitored=False)
 
     def _get_total_services_flapping(self):
         """
@@ -939,7 +1005,7 @@ class MacroResolver(Borg):
         :return: Number of services which are not monitored
         :rtype: int
         """
-        return sum(1 for s in self.services if s.is_flapping)
+        return self.services.get_states_counters().count(flapping=True)
 
     @staticmethod
     def _get_process_start_time():
@@ -104,22 +104,30 @@ class CarbonIface(object):
                 self.__data_lock.release()
             else:
                 return False
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         payload = pickle.dumps(data, protocol=2)
         header = struct.pack("!L", len(payload))
         message = header + payload
+        if self.send_message(message):
+            return True
+        if save_in_error:
+            self.__data.extend(data)
+        return False
+
+    def send_message(self, message):
+        """Send an already encoded message, eg. a pickle protocol header and payload
+        or plaintext protocol lines
+        """
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         s.settimeout(1)
         s.connect((self.host, self.port))
         try:
-            s.send(message)
+            s.sendall(message)
         except:
             # log.exception('Error when sending data to carbon')
-            if save_in_error:
-                self.__data.extend(data)
             return False
         else:
-            # log.debug('Sent data to {host}:{port}: {0} metrics, {1} bytes'.format(len(data),
-            #   len(message), host = self.host, port=self.port))
+            # log.debug('Sent {0} bytes to {host}:{port}'.format(len(message),
+            #   host = self.host, port=self.port))
             return True
         finally:
             s.close()
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+"""This module provides the MetricsBatch class, a columnar store of the metrics
+waiting to be sent to a time series database.
+
+The batch is made of parallel lists rather than a dictionary per metric. It is
+directly encoded to the Graphite pickle and plaintext protocols and to the InfluxDB
+line protocol.
+"""
+
+import struct
+import pickle
+
+from six import text_type
+
+
+def escape_measurement(value):
+    """Escape an InfluxDB line protocol measurement name
+
+    :param value: measurement name
+    :type value: str
+    :return: escaped name
+    :rtype: str
+    """
+    return value.replace('\\', '\\\\').replace(',', '\\,').replace(' ', '\\ ')\
+        .replace('\n', '\\n')
+
+
+def escape_tag(value):
+    """Escape an InfluxDB line protocol tag key or value
+
+    :param value: tag key or value
+    :type value: str
+    :return: escaped key or value
+    :rtype: str
+    """
+    return escape_measurement(value).replace('=', '\\=')
+
+
+def format_field(value):
+    """Format an InfluxDB line protocol field value
+
+    :param value: field value
+    :return: formatted value, None if the value can not be sent
+    :rtype: str
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, int):
+        return '%di' % value
+    if value is None:
+        return None
+    return '"%s"' % text_type(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+class MetricsBatch(object):
+    """Columnar batch of metrics
+
+    An entry is stored for each check result (time, measurement, host, realm and
+    path) with the index of its first point. A point is stored for each metric
+    field (name and value).
+    """
+
+    def __init__(self):
+        # Entries
+        self.times = []
+        self.measurements = []
+        self.hosts = []
+        self.realms = []
+        self.paths = []
+        self.offsets = []
+        # Points
+        self.names = []
+        self.values = []
+
+    def __len__(self):
+        return len(self.times)
+
+    def __repr__(self):  # pragma: no cover
+        return '<MetricsBatch: %d entries, %d points />' % (len(self.times), len(self.names))
+    __str__ = __repr__
+
+    def add(self, ts, measurement, host, realm, path, metrics):
+        """Add an entry and its points
+
+        :param ts: timestamp
+        :type ts: int
+        :param measurement: measurement name (the service)
+        :type measurement: str
+        :param host: host name
+        :type host: str
+        :param realm: realm name
+        :type realm: str
+        :param path: full path (eg. Graphite) of the metrics
+        :type path: str
+        :param metrics: list of the metrics (name, value, uom)
+        :type metrics: list
+        :return: None
+        """
+        self.times.append(ts)
+        self.measurements.append(measurement)
+        self.hosts.append(host)
+        self.realms.append(realm)
+        self.paths.append(path)
+        self.offsets.append(len(self.names))
+        for name, value, _ in metrics:
+            self.names.append(name)
+            self.values.append(value)
+
+    def _points(self, index):
+        """Get the points range of an entry
+
+        :param index: entry index
+        :type index: int
+        :return: first and last + 1 points indexes
+        :rtype: tuple
+        """
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else len(self.names)
+        return self.offsets[index], end
+
+    def drop_oldest(self, count):
+        """Remove the oldest entries and their points
+
+        :param count: number of entries to remove
+        :type count: int
+        :return: None
+        """
+        if count >= len(self.times):
+            self.__init__()
+            return
+        cut = self.offsets[count]
+        for column in (self.times, self.measurements, self.hosts, self.realms, self.paths):
+            del column[:count]
+        del self.names[:cut]
+        del self.values[:cut]
+        self.offsets = [offset - cut for offset in self.offsets[count:]]
+
+    def to_list(self):
+        """Get the entries as a list of lists, eg. to be stored as JSON
+
+        :return: list of [time, measurement, host, realm, path, names, values]
+        :rtype: list
+        """
+        result = []
+        for index in range(len(self.times)):
+            start, end = self._points(index)
+            result.append([self.times[index], self.measurements[index], self.hosts[index],
+                           self.realms[index], self.paths[index],
+                           self.names[start:end], self.values[start:end]])
+        return result
+
+    @classmethod
+    def from_list(cls, entries):
+        """Build a batch from the result of `to_list`
+
+        :param entries: list of [time, measurement, host, realm, path, names, values]
+        :type entries: list
+        :return: a new batch
+        :rtype: MetricsBatch
+        """
+        batch = cls()
+        for ts, measurement, host, realm, path, names, values in entries:
+            batch.times.append(ts)
+            batch.measurements.append(measurement)
+            batch.hosts.append(host)
+            batch.realms.append(realm)
+            batch.paths.append(path)
+            batch.offsets.append(len(batch.names))
+            batch.names.extend(names)
+            batch.values.extend(values)
+        return batch
+
+    def _points_paths(self, prefix):
+        """Get the time, full path and value of each point
+
+        :param prefix: Graphite prefix, None for no prefix
+        :type prefix: str
+        :return: generator of (time, path, value)
+        """
+        names = self.names
+        values = self.values
+        for index in range(len(self.times)):
+            start, end = self._points(index)
+            ts = self.times[index]
+            base = self.paths[index] if prefix is None else '.'.join([prefix, self.paths[index]])
+            for point in range(start, end):
+                yield ts, '.'.join([base, names[point]]), values[point]
+
+    def to_graphite_pickle(self, prefix=''):
+        """Encode the batch for the Graphite/carbon pickle protocol
+
+        :param prefix: Graphite prefix
+        :type prefix: str
+        :return: the message to send, header included
+        :rtype: bytes
+        """
+        payload = pickle.dumps([(path, (ts, value))
+                                for ts, path, value in self._points_paths(prefix)], protocol=2)
+        return struct.pack("!L", len(payload)) + payload
+
+    def to_graphite_plaintext(self, prefix=''):
+        """Encode the batch for the Graphite/carbon plaintext protocol
+
+        Only the numeric values are encoded, carbon rejects the other lines.
+
+        :param prefix: Graphite prefix
+        :type prefix: str
+        :return: the message to send
+        :rtype: bytes
+        """
+        return ''.join(['%s %s %s\n' % (path, value, ts)
+                        for ts, path, value in self._points_paths(prefix)
+                        if isinstance(value, (int, float))]).encode('utf-8')
+
+    def to_influxdb_lines(self, tags=None):
+        """Encode the batch for the InfluxDB line protocol
+
+        The values are sent as float values when they can be converted, except for
+        the units of measure fields. The time precision is the nanosecond.
+
+        :param tags: tags added to each line
+        :type tags: dict
+        :return: list of lines
+        :rtype: list
+        """
+        lines = []
+        names = self.names
+        values = self.values
+        for index in range(len(self.times)):
+            start, end = self._points(index)
+            fields = []
+            for point in range(start, end):
+                name = names[point]
+                value = values[point]
+                if not isinstance(value, float) and not name.startswith('uom_'):
+                    try:
+                        value = float(value)
+                    except (TypeError, ValueError):
+                        pass
+                value = format_field(value)
+                if value is not None:
+                    fields.append('%s=%s' % (escape_tag(name), value))
+            if not fields:
+                continue
+
+            line_tags = {'host': self.hosts[index], 'service': self.measurements[index],
+                         'realm': self.realms[index], 'path': self.paths[index]}
+            if tags:
+                line_tags.update(tags)
+            ts = self.times[index]
+            lines.append('%s%s %s %d' % (
+                escape_measurement(self.measurements[index]),
+                ''.join([',%s=%s' % (escape_tag(key), escape_tag(text_type(value)))
+                         for key, value in sorted(line_tags.items())
+                         if value is not None and value != '']),
+                ','.join(fields),
+                ts * 1000000000 if isinstance(ts, int) else int(round(ts * 1000000000))))
+        return lines
+
+    def to_text(self):
+        """Encode the batch as text lines: time;path.name;value
+
+        :return: the text to write
+        :rtype: str
+        """
+        return ''.join(['%s;%s;%s\n' % (ts, path, value)
+                        for ts, path, value in self._points_paths(None)])
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+"""This module provides the MetricsSender class, a thread sending the metrics
+batches to one time series database target.
+
+The batches are handed off to the thread in a bounded deque: appending and popping
+do not need any lock. A full queue tells the caller to keep its metrics (backpressure).
+"""
+
+import time
+import bisect
+import logging
+import threading
+from collections import deque
+
+from alignak.stats import statsmgr
+
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# Upper bounds of the sending latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class MetricsSender(threading.Thread):
+    """Thread sending the metrics batches to a target, oldest batch first
+
+    A batch that could not be sent stays at the head of the queue and the sending
+    is retried after a pause.
+    """
+
+    def __init__(self, target, send, queue_size=16, retry_pause=10):
+        """
+        :param target: target name, eg. graphite
+        :type target: str
+        :param send: function sending a batch, returns True if the batch was sent
+        :type send: function
+        :param queue_size: maximum number of batches waiting to be sent
+        :type queue_size: int
+        :param retry_pause: delay before sending again after a failure, in seconds
+        :type retry_pause: float
+        """
+        super(MetricsSender, self).__init__(name='metrics-sender-%s' % target)
+        self.daemon = True
+        self.target = target
+        self.send = send
+        self.queue_size = max(1, queue_size)
+        self.retry_pause = retry_pause
+
+        self.queue = deque()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.running = False
+
+        # The last sending failed
+        self.failing = False
+        self.sent = 0
+        self.failures = 0
+        # One more bucket for the latencies greater than the last bound
+        self.latencies = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def __repr__(self):  # pragma: no cover
+        return '<MetricsSender %s: %d batches waiting />' % (self.target, len(self.queue))
+    __str__ = __repr__
+
+    @property
+    def full(self):
+        """The queue is full, the caller must keep its metrics
+
+        :return: True if no batch may be handed off
+        :rtype: bool
+        """
+        return len(self.queue) >= self.queue_size
+
+    def put(self, batch):
+        """Hand off a batch to the sender thread
+
+        :param batch: metrics batch, it must not be modified anymore by the caller
+        :type batch: alignak.misc.metrics_batch.MetricsBatch
+        :return: False if the queue is full and the batch was not handed off
+        :rtype: bool
+        """
+        if self.full:
+            return False
+        self.queue.append(batch)
+        self.wakeup.set()
+        return True
+
+    def start(self):
+        """Start the sender thread
+
+        :return: None
+        """
+        self.running = True
+        super(MetricsSender, self).start()
+
+    def stop(self, timeout=5):
+        """Stop the sender thread, the batches still in the queue are not sent
+
+        :param timeout: maximum time to wait for the thread end
+        :type timeout: float
+        :return: None
+        """
+        self.running = False
+        self.stopping.set()
+        self.wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+
+    def get_latencies(self):
+        """Get the sending latency histogram
+
+        :return: list of (bucket upper bound, count), the last bound is None
+        :rtype: list
+        """
+        return list(zip(LATENCY_BUCKETS + (None, ), self.latencies))
+
+    def run(self):
+        """Send the queued batches until stopped
+
+        :return: None
+        """
+        logger.info("metrics sender for %s started", self.target)
+        while self.running:
+            if not self.queue:
+                self.wakeup.wait(1.0)
+                self.wakeup.clear()
+                continue
+
+            batch = self.queue[0]
+            start = time.time()
+            try:
+                sent = self.send(batch)
+            except Exception as exp:  # pylint: disable=broad-except
+                logger.error("metrics sender for %s, exception: %s", self.target, str(exp))
+                sent = False
+            latency = time.time() - start
+            self.latencies[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            statsmgr.timer('metrics.sender.%s.latency' % self.target, latency)
+
+            if sent:
+                self.queue.popleft()
+                self.sent += len(batch)
+                self.failing = False
+                continue
+
+            self.failing = True
+            self.failures += 1
+            statsmgr.counter('metrics.sender.%s.failures' % self.target, 1)
+            # Do not retry sooner when a new batch is handed off
+            self.stopping.wait(self.retry_pause)
+        logger.info("metrics sender for %s stopped", self.target)
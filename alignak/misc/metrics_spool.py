@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+"""This module provides the MetricsSpool class, an on-disk spool for the metrics
+that could not be sent to a time series database.
+
+The spool is a directory of append-only segment files. Each segment file contains
+at most a configured number of metrics, one JSON document per line. The metrics
+are read back segment by segment, the oldest segment first.
+"""
+
+import os
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+SEGMENT_FILE = re.compile(r'^metrics-(\d+)\.spool$')
+
+
+class MetricsSpool(object):
+    """Append-only on-disk spool of metrics split into rotated segment files
+
+    When more than `max_segments` segments exist, the oldest segment is dropped
+    and its metrics are counted in the `dropped` attribute.
+    """
+
+    def __init__(self, path, segment_size=1000, max_segments=100):
+        self.path = path
+        self.segment_size = max(1, segment_size)
+        self.max_segments = max(1, max_segments)
+
+        # Spooled segments, oldest first, as [sequence, metrics count]
+        self.segments = []
+        # The last segment is closed once it started being read back
+        self.writable = False
+        self.depth = 0
+        self.dropped = 0
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        self._load()
+
+    def __len__(self):
+        return self.depth
+
+    def _segment_file(self, sequence):
+        """Get the file name of a segment
+
+        :param sequence: segment sequence number
+        :type sequence: int
+        :return: segment file full path
+        :rtype: str
+        """
+        return os.path.join(self.path, 'metrics-%010d.spool' % sequence)
+
+    def _load(self):
+        """Get the segments left in the spool directory, e.g. by a previous run
+
+        :return: None
+        """
+        sequences = []
+        for file_name in os.listdir(self.path):
+            match = SEGMENT_FILE.match(file_name)
+            if match:
+                sequences.append(int(match.group(1)))
+
+        for sequence in sorted(sequences):
+            with open(self._segment_file(sequence), 'r') as fp:
+                count = sum(1 for line in fp if line.strip())
+            self.segments.append([sequence, count])
+            self.depth += count
+        if self.segments:
+            logger.info("Metrics spool %s: %d segments, %d metrics",
+                        self.path, len(self.segments), self.depth)
+
+    def append(self, metrics):
+        """Store some metrics at the end of the spool
+
+        :param metrics: metrics to store
+        :type metrics: list
+        :return: None
+        """
+        index = 0
+        while index < len(metrics):
+            if not self.segments or not self.writable \
+                    or self.segments[-1][1] >= self.segment_size:
+                sequence = self.segments[-1][0] + 1 if self.segments else 0
+                self.segments.append([sequence, 0])
+                self.writable = True
+
+            segment = self.segments[-1]
+            chunk = metrics[index:index + self.segment_size - segment[1]]
+            with open(self._segment_file(segment[0]), 'a') as fp:
+                fp.write(''.join([json.dumps(metric) + '\n' for metric in chunk]))
+            segment[1] += len(chunk)
+            self.depth += len(chunk)
+            index += len(chunk)
+
+        while len(self.segments) > self.max_segments:
+            self.dropped += self.segments[0][1]
+            logger.warning("Metrics spool %s is full, dropping %d metrics",
+                           self.path, self.segments[0][1])
+            self.discard_oldest()
+
+    def read_oldest(self):
+        """Get the metrics of the oldest segment
+
+        The segment remains in the spool until `discard_oldest` is called.
+
+        :return: the spooled metrics
+        :rtype: list
+        """
+        if not self.segments:
+            return []
+        if len(self.segments) == 1:
+            # Do not append anymore to the segment that is read back
+            self.writable = False
+
+        metrics = []
+        with open(self._segment_file(self.segments[0][0]), 'r') as fp:
+            for line in fp:
+                try:
+                    metrics.append(json.loads(line))
+                except ValueError:
+                    # A line truncated by a crash
+                    logger.warning("Metrics spool %s: ignoring an invalid line: %s",
+                                   self.path, line)
+        return metrics
+
+    def discard_oldest(self):
+        """Remove the oldest segment from the spool
+
+        :return: None
+        """
+        if not self.segments:
+            return
+        sequence, count = self.segments.pop(0)
+        self.depth -= count
+        if not self.segments:
+            self.writable = False
+        try:
+            os.remove(self._segment_file(sequence))
+        except OSError as exp:
+            logger.error("Metrics spool %s: error when removing a segment: %s",
+                         self.path, str(exp))
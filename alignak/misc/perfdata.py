@@ -51,17 +51,26 @@
 This module provide classes to handle performance data from monitoring plugin output
 """
 import re
-from alignak.util import to_best_int_float
 
 PERFDATA_SPLIT_PATTERN = re.compile(r'([^=]+=\S+)')
 # TODO: Improve this regex to not match strings like this:
 # 'metric=45+e-456.56unit;50;80;0;45+-e45e-'
+# The metrics are parsed by the parse_metric function, this pattern is its reference
 METRIC_PATTERN = \
     re.compile(
         r'^([^=]+)=([\d\.\-\+eE]+)([\w\/%]*)'
         r';?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE:~@]+)?;?([\d\.\-\+eE]+)?;?([\d\.\-\+eE]+)?;?\s*'
     )
 
+# Characters of the values, of the warning/critical ranges and of the units
+NUMBER_CHARACTERS = '0123456789.-+eE'
+RANGE_CHARACTERS = NUMBER_CHARACTERS + ':~@'
+THRESHOLDS_CHARACTERS = (RANGE_CHARACTERS, RANGE_CHARACTERS,
+                         NUMBER_CHARACTERS, NUMBER_CHARACTERS)
+# The plugins use few units, the valid ones are remembered
+KNOWN_UOMS = set()
+KNOWN_UOMS_MAX_COUNT = 1000
+
 
 def sanitize_name(field_name):
     """Sanitize a field name for a TSDB (Graphite or Influx)
@@ -94,7 +103,7 @@ def sanitize_name(field_name):
 
 
 def guess_int_or_float(val):
-    """Wrapper for Util.to_best_int_float
+    """Same as Util.to_best_int_float, inlined for the performance data parsing
     Basically cast into float or int and compare value
     If they are equal then there is no coma so return integer
 
@@ -103,9 +112,109 @@ def guess_int_or_float(val):
     :rtype: int | float | NoneType
     """
     try:
-        return to_best_int_float(val)
-    except (ValueError, TypeError):
+        flt = float(val)
+        integer = int(flt)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    if integer == flt:
+        return integer
+    return flt
+
+
+def is_uom(string):
+    """Check that a string only contains unit of measure characters (words, / and %)
+
+    :param string: string to check
+    :type string: str
+    :return: True if all the characters are allowed
+    :rtype: bool
+    """
+    if string in KNOWN_UOMS:
+        return True
+    valid = string.replace('/', '').replace('%', '').replace('_', '')
+    valid = not valid or valid.isalnum()
+    if valid and len(KNOWN_UOMS) < KNOWN_UOMS_MAX_COUNT:
+        KNOWN_UOMS.add(string)
+    return valid
+
+
+def parse_metric(string):
+    """Parse a stripped metric string as the METRIC_PATTERN regex would do
+
+    All the parts following the name are optional and greedy in the regex, so the
+    string is scanned once from left to right with the string methods.
+
+    :param string: metric string, eg. 'ramused=90%;85;95;;'
+    :type string: str
+    :return: (name, value, uom, warning, critical, min, max), None if no metric is found
+    :rtype: tuple
+    """
+    name, separator, string = string.partition('=')
+    if not name or not separator:
+        return None
+
+    # Value
+    tail = string.lstrip(NUMBER_CHARACTERS)
+    length = len(string) - len(tail)
+    if not length:
         return None
+    value = guess_int_or_float(string[:length])
+    string = tail
+
+    # Unit, then warning, critical, min and max
+    fields = string.split(';', 5)
+    uom = fields[0]
+    if len(fields) < 6 and is_uom(uom) \
+            and not string[len(uom):].lstrip(NUMBER_CHARACTERS + ';'):
+        # Usual case, numbers separated by semicolons
+        thresholds = [guess_int_or_float(field) if field else None for field in fields[1:]]
+        thresholds.extend([None] * (5 - len(fields)))
+    else:
+        if not is_uom(uom):
+            length = 0
+            while is_uom(uom[length]):
+                length += 1
+            uom = uom[:length]
+        string = string[len(uom):]
+
+        thresholds = [None, None, None, None]
+        for index, characters in enumerate(THRESHOLDS_CHARACTERS):
+            if string[:1] == ';':
+                string = string[1:]
+            length = len(string) - len(string.lstrip(characters))
+            if length:
+                thresholds[index] = guess_int_or_float(string[:length])
+                string = string[length:]
+
+    if uom == '%':
+        thresholds[2:] = [0, 100]
+    # Get the name but remove all ' in it
+    return (name.replace("'", ""), value, uom) + tuple(thresholds)
+
+
+def parse_perfdata(string):
+    """Get the metrics of a performance data string
+
+    The string is split on the white spaces unless some metrics names contain
+    quotes or spaces. Then the PERFDATA_SPLIT_PATTERN regex is used.
+
+    :param string: performance data string
+    :type string: str
+    :return: list of the parsed metrics
+    :rtype: list
+    """
+    if not string:
+        return []
+    elts = string.split()
+    if "'" in string or not all([elt[0] != '=' and '=' in elt for elt in elts]):
+        elts = PERFDATA_SPLIT_PATTERN.findall(string)
+
+    metrics = []
+    for elem in elts:
+        metric = Metric(elem)
+        if metric.name is not None:
+            metrics.append(metric)
+    return metrics
 
 
 class Metric(object):
@@ -114,22 +223,8 @@ class Metric(object):
     Class providing a small abstraction for one metric of a Perfdatas class
     """
     def __init__(self, string):
-        self.name = self.value = self.uom = \
-            self.warning = self.critical = self.min = self.max = None
-        string = string.strip()
-        matches = METRIC_PATTERN.match(string)
-        if matches:
-            # Get the name but remove all ' in it
-            self.name = matches.group(1).replace("'", "")
-            self.value = guess_int_or_float(matches.group(2))
-            self.uom = matches.group(3)
-            self.warning = guess_int_or_float(matches.group(4))
-            self.critical = guess_int_or_float(matches.group(5))
-            self.min = guess_int_or_float(matches.group(6))
-            self.max = guess_int_or_float(matches.group(7))
-            if self.uom == '%':
-                self.min = 0
-                self.max = 100
+        (self.name, self.value, self.uom, self.warning, self.critical, self.min, self.max) = \
+            parse_metric(string.strip()) or (None, None, None, None, None, None, None)
 
     def __str__(self):  # pragma: no cover
         string = "%s=%s%s" % (self.name, self.value, self.uom)
@@ -146,14 +241,9 @@ class PerfDatas(object):
     Class providing performance data extracted from a check output
     """
     def __init__(self, string):
-        string = string or ''
-        elts = PERFDATA_SPLIT_PATTERN.findall(string)
-        elts = [e for e in elts if e != '']
         self.metrics = {}
-        for elem in elts:
-            metric = Metric(elem)
-            if metric.name is not None:
-                self.metrics[metric.name] = metric
+        for metric in parse_perfdata(string):
+            self.metrics[metric.name] = metric
 
     def __iter__(self):
         return iter(list(self.metrics.values()))
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+"""This module provides the ResultsRing class, a shared memory ring buffer used by
+a worker process to send the actions results to its satellite.
+
+The ring is made of fixed-size records (uuid, status, exit status and timings) and of
+a side arena for the outputs texts. Both are allocated in shared memory before the
+worker process is started. Writing a record is far cheaper than pickling the whole
+action in a message queue.
+
+The satellite still knows the actions it gave to the worker, a record only carries
+the action result properties. When a result does not fit in the ring (ring full,
+output too long, ...) the worker sends the action in its returns queue as before.
+"""
+
+import struct
+import ctypes
+import logging
+from multiprocessing import Lock, RawArray
+
+from six import string_types, text_type
+
+from alignak.action import ACT_STATUS_DONE, ACT_STATUS_TIMEOUT
+
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+# uuid, status, exit status, check time, execution time, user time, system time,
+# arena position of the texts, output, long output and performance data lengths
+RECORD = struct.Struct('<64sBi4dQ3I')
+
+RESULT_STATUSES = (ACT_STATUS_DONE, ACT_STATUS_TIMEOUT)
+
+# Shared counters indexes
+RECORDS_WRITTEN = 0
+RECORDS_READ = 1
+ARENA_WRITTEN = 2
+ARENA_READ = 3
+OVERFLOWS = 4
+
+
+def _encode(value):
+    """Encode a text for the arena
+
+    :param value: text to encode
+    :type value: str
+    :return: encoded text
+    :rtype: bytes
+    """
+    if not value:
+        return b''
+    if isinstance(value, text_type):
+        return value.encode('utf-8')
+    return value
+
+
+class ResultsRing(object):
+    """Shared memory ring buffer of actions results
+
+    The counters are always increasing, the positions in the records and in the arena
+    are the counters modulo the records count and the arena size. A lock protects the
+    counters: the worker writes and the satellite reads the results by batches.
+    """
+
+    def __init__(self, slots=1024, arena_size=4194304):
+        """
+        :param slots: maximum number of results in the ring
+        :type slots: int
+        :param arena_size: size of the outputs arena, in bytes
+        :type arena_size: int
+        """
+        self.slots = max(1, slots)
+        self.arena_size = max(1024, arena_size)
+        # A longer output would prevent too many other results to be written
+        self.max_output_length = self.arena_size // 4
+
+        self.counters = RawArray(ctypes.c_ulonglong, 5)
+        self.records = RawArray(ctypes.c_char, self.slots * RECORD.size)
+        self.arena = RawArray(ctypes.c_char, self.arena_size)
+        self.lock = Lock()
+
+    def __len__(self):
+        return self.counters[RECORDS_WRITTEN] - self.counters[RECORDS_READ]
+
+    def __repr__(self):  # pragma: no cover
+        return '<ResultsRing: %d/%d results />' % (len(self), self.slots)
+    __str__ = __repr__
+
+    @property
+    def overflows(self):
+        """Number of results that could not be written in the ring
+
+        :return: results count
+        :rtype: int
+        """
+        return self.counters[OVERFLOWS]
+
+    def put(self, action):
+        """Write the result of an action in the ring
+
+        :param action: a finished action
+        :type action: alignak.action.Action
+        :return: False if the result could not be written, the action must be sent
+                 in the returns queue
+        :rtype: bool
+        """
+        uuid = action.uuid
+        if not isinstance(uuid, string_types) or action.status not in RESULT_STATUSES:
+            return False
+        uuid = _encode(uuid)
+
+        texts = [_encode(action.output), _encode(action.long_output),
+                 _encode(action.perf_data)]
+        size = sum([len(text) for text in texts])
+
+        with self.lock:
+            counters = self.counters
+            written = counters[RECORDS_WRITTEN]
+            start = counters[ARENA_WRITTEN]
+            position = start % self.arena_size
+            if position + size > self.arena_size:
+                # The texts are never split, skip the end of the arena
+                start += self.arena_size - position
+                position = 0
+
+            if len(uuid) > 64 or size > self.max_output_length \
+                    or written - counters[RECORDS_READ] >= self.slots \
+                    or start + size - counters[ARENA_READ] > self.arena_size:
+                counters[OVERFLOWS] += 1
+                return False
+
+            self.arena[position:position + size] = b''.join(texts)
+            RECORD.pack_into(self.records, (written % self.slots) * RECORD.size,
+                             uuid, RESULT_STATUSES.index(action.status),
+                             action.exit_status, action.check_time, action.execution_time,
+                             action.u_time, action.s_time, start,
+                             len(texts[0]), len(texts[1]), len(texts[2]))
+            counters[ARENA_WRITTEN] = start + size
+            counters[RECORDS_WRITTEN] = written + 1
+        return True
+
+    def _read_record(self, index):
+        """Read a result record and its texts in the arena
+
+        :param index: record counter
+        :type index: int
+        :return: the result properties and the arena counter after the texts
+        :rtype: tuple
+        """
+        record = RECORD.unpack_from(self.records, (index % self.slots) * RECORD.size)
+        start, lengths = record[7], record[8:]
+        position = start % self.arena_size
+        texts = []
+        for length in lengths:
+            texts.append(self.arena[position:position + length].decode('utf-8', 'replace'))
+            position += length
+        return {
+            'uuid': record[0].rstrip(b'\0').decode('utf-8'),
+            'status': RESULT_STATUSES[record[1]],
+            'exit_status': record[2],
+            'output': texts[0],
+            'long_output': texts[1],
+            'perf_data': texts[2],
+            'check_time': record[3],
+            'execution_time': record[4],
+            'u_time': record[5],
+            's_time': record[6]
+        }, start + sum(lengths)
+
+    def get_results(self, timeout=1.0):
+        """Read all the results written in the ring
+
+        The lock is shared with the worker process. A worker that died while writing
+        a result never releases it, thus the reading gives up after a timeout.
+
+        :param timeout: maximum time to wait for the lock, in seconds
+        :type timeout: float
+        :return: list of the results properties, as returned by `Action.get_result`
+                 but without the action type, None if the lock could not be acquired
+        :rtype: list
+        """
+        if not self.lock.acquire(True, timeout):
+            return None
+
+        results = []
+        try:
+            counters = self.counters
+            read = counters[RECORDS_READ]
+            written = counters[RECORDS_WRITTEN]
+            if read == written:
+                return results
+
+            arena_read = counters[ARENA_READ]
+            while read < written:
+                result, arena_read = self._read_record(read)
+                results.append(result)
+                read += 1
+
+            counters[ARENA_READ] = arena_read
+            counters[RECORDS_READ] = read
+        finally:
+            self.lock.release()
+        return results
@@ -25,11 +25,17 @@ import os
 import re
 import time
 import logging
+import threading
 import traceback
 
 from alignak.misc.carboniface import CarbonIface
+from alignak.misc.metrics_batch import MetricsBatch
+from alignak.misc.metrics_sender import MetricsSender
+from alignak.misc.metrics_spool import MetricsSpool
 from alignak.misc.perfdata import PerfDatas, sanitize_name
 from alignak.basemodule import BaseModule
+from alignak.stats import statsmgr
+from alignak.util import to_bool
 
 # pylint: disable=invalid-name
 influxdb_lib = False
@@ -140,34 +146,32 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
         # Separate performance data multiple values
         self.multiple_values = re.compile(r'_(\d+)$')
 
+        # Sanitized metrics names, indexed by the performance data labels
+        self.metrics_names = {}
+        self.metrics_names_max_count = 10000
+
         # Internal metrics cache
-        self.my_metrics = []
+        self.my_metrics = MetricsBatch()
         self.metrics_flush_count = int(getattr(mod_conf, 'metrics_flush_count', '256'))
         self.last_failure = 0
         self.metrics_flush_pause = int(os.getenv('ALIGNAK_STATS_FLUSH_PAUSE', '10'))
         self.log_metrics_flush_pause = False
 
+        # Bounded internal metrics cache - overflows to an on-disk spool if configured,
+        # else the oldest metrics are dropped
+        self.metrics_max_count = int(getattr(mod_conf, 'metrics_max_count', '10000'))
+        self.metrics_dropped = 0
+        self.metrics_replayed = 0
+        self._init_spool(mod_conf)
+
+        # Send the metrics from a thread for each target rather than from the broks loop
+        self._init_senders(mod_conf)
+
         # Specific filter for host and services names for Graphite
         self.illegal_char_hostname = re.compile(r'[^a-zA-Z0-9_\-]')
 
         # Graphite target
-        self.graphite_host = getattr(mod_conf, 'graphite_host', 'localhost')
-        self.graphite_port = int(getattr(mod_conf, 'graphite_port', '2004'))
-        self.carbon = None
-        logger.info("graphite host/port: %s:%d", self.graphite_host, self.graphite_port)
-        # optional prefix / suffix in graphite for Alignak data source
-        self.graphite_data_source = \
-            sanitize_name(getattr(mod_conf, 'graphite_data_source', ''))
-        self.graphite_prefix = getattr(mod_conf, 'graphite_prefix', '')
-        self.realms_prefix = (getattr(mod_conf, 'realms_prefix', '0') != '0')
-        if isinstance(getattr(mod_conf, 'realms_prefix', '0'), bool):
-            self.realms_prefix = getattr(mod_conf, 'realms_prefix')
-        logger.info("graphite prefix: %s, realm prefix: %s, data source: %s",
-                    self.graphite_prefix, self.realms_prefix, self.graphite_data_source)
-
-        if self.graphite_enabled and not self.graphite_host:
-            logger.warning("Graphite host name is not set, no metrics will be sent to Graphite!")
-            self.graphite_enabled = False
+        self._init_graphite(mod_conf)
 
         # InfluxDB target
         self.influxdb_host = getattr(mod_conf, 'influxdb_host', 'localhost')
@@ -232,6 +236,81 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
             return
         logger.info("metrics module is loaded and enabled")
 
+    def _init_graphite(self, mod_conf):
+        """Initialize the Graphite target settings from the module configuration
+
+        :param mod_conf: module configuration
+        :return: None
+        """
+        self.graphite_host = getattr(mod_conf, 'graphite_host', 'localhost')
+        self.graphite_port = int(getattr(mod_conf, 'graphite_port', '2004'))
+        # Carbon pickle protocol (default port 2004) or plaintext protocol (default port 2003)
+        self.graphite_protocol = getattr(mod_conf, 'graphite_protocol', 'pickle')
+        if self.graphite_protocol not in ['pickle', 'plaintext']:
+            logger.warning("Unknown Graphite protocol '%s', using the pickle protocol",
+                           self.graphite_protocol)
+            self.graphite_protocol = 'pickle'
+        self.carbon = None
+        logger.info("graphite host/port: %s:%d", self.graphite_host, self.graphite_port)
+        # optional prefix / suffix in graphite for Alignak data source
+        self.graphite_data_source = \
+            sanitize_name(getattr(mod_conf, 'graphite_data_source', ''))
+        self.graphite_prefix = getattr(mod_conf, 'graphite_prefix', '')
+        self.realms_prefix = (getattr(mod_conf, 'realms_prefix', '0') != '0')
+        if isinstance(getattr(mod_conf, 'realms_prefix', '0'), bool):
+            self.realms_prefix = getattr(mod_conf, 'realms_prefix')
+        logger.info("graphite prefix: %s, realm prefix: %s, data source: %s",
+                    self.graphite_prefix, self.realms_prefix, self.graphite_data_source)
+
+        if self.graphite_enabled and not self.graphite_host:
+            logger.warning("Graphite host name is not set, no metrics will be sent to Graphite!")
+            self.graphite_enabled = False
+
+    def _init_spool(self, mod_conf):
+        """Initialize the on-disk metrics spool from the module configuration
+
+        :param mod_conf: module configuration
+        :return: None
+        """
+        self.spool = None
+        # Batches not sent to a single target, indexed by target name
+        self.targets_spools = {}
+        self.spool_dir = getattr(mod_conf, 'spool_dir', '')
+        self.spool_replay_segments = int(getattr(mod_conf, 'spool_replay_segments', '1'))
+        if not self.spool_dir:
+            return
+
+        try:
+            self.spool = MetricsSpool(
+                self.spool_dir,
+                segment_size=int(getattr(mod_conf, 'spool_segment_size', '1000')),
+                max_segments=int(getattr(mod_conf, 'spool_max_segments', '100')))
+            # Batches left by a previous run for a single target
+            for dir_name in sorted(os.listdir(self.spool_dir)):
+                if dir_name.startswith('target-'):
+                    self.get_target_spool(dir_name[len('target-'):])
+        except (OSError, IOError) as exp:
+            logger.error("Metrics spool directory %s is not usable, the metrics "
+                         "will only be stored in memory. Error: %s", self.spool_dir, str(exp))
+        else:
+            logger.info("metrics spool: %s, max count in memory: %d",
+                        self.spool_dir, self.metrics_max_count)
+
+    def _init_senders(self, mod_conf):
+        """Initialize the metrics sender threads settings from the module configuration
+
+        :param mod_conf: module configuration
+        :return: None
+        """
+        self.metrics_sender_thread = \
+            to_bool(str(getattr(mod_conf, 'metrics_sender_thread', '0')))
+        self.metrics_sender_queue_size = \
+            int(getattr(mod_conf, 'metrics_sender_queue_size', '16'))
+        self.senders = {}
+        self.backpressure = False
+        # The sender threads share the flush pause state
+        self.flush_pause_lock = threading.Lock()
+
     def init(self):  # pylint: disable=too-many-branches
         """Called by the daemon broker to initialize the module"""
         if not self.enabled:
@@ -292,8 +371,89 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
             except Exception as exp:  # pylint: disable=broad-except
                 logger.error("InfluxDB, DB initialization failed. Error: %s", str(exp))
 
+        if self.metrics_sender_thread:
+            self.start_senders()
+
         return connections
 
+    def start_senders(self):
+        """Start a sender thread for each configured target
+
+        :return: None
+        """
+        self.stop_senders()
+        targets = []
+        if self.graphite_enabled:
+            targets.append('graphite')
+        if self.influxdb_enabled:
+            targets.append('influxdb')
+        if self.output_file:
+            targets.append('file')
+
+        for target in targets:
+            self.senders[target] = MetricsSender(
+                target, lambda batch, target=target: self.send_metrics(batch, targets=[target]),
+                queue_size=self.metrics_sender_queue_size, retry_pause=self.metrics_flush_pause)
+            self.senders[target].start()
+        logger.info("metrics sender threads: %s", ', '.join(targets))
+
+    def stop_senders(self):
+        """Stop the sender threads
+
+        The batches that were not sent by a sender are stored in the spool of its
+        target, if a spool is configured, to be replayed later to this target only.
+        The head batch of a sender that did not stop in time is still being sent and
+        it is not spooled.
+
+        :return: None
+        """
+        for target, sender in sorted(self.senders.items()):
+            sender.stop()
+            unsent = list(sender.queue)
+            if unsent and sender.is_alive():
+                unsent = unsent[1:]
+            if not unsent:
+                continue
+            logger.warning("metrics sender for %s stopped with %d batches not sent",
+                           target, len(unsent))
+            if self.spool is None:
+                continue
+            try:
+                spool = self.get_target_spool(target)
+                dropped = spool.dropped
+                for batch in unsent:
+                    spool.append(batch.to_list())
+                logger.info("Spooled %d metrics batches not sent to %s, spool depth: %d",
+                            len(unsent), target, self.spool_depth)
+                self.metrics_dropped += spool.dropped - dropped
+                statsmgr.counter('metrics.dropped', spool.dropped - dropped)
+                statsmgr.gauge('metrics.spool.depth', self.spool_depth)
+            except (OSError, IOError) as exp:
+                logger.error("Failed spooling the metrics to %s. Error: %s",
+                             self.spool_dir, str(exp))
+        self.senders = {}
+
+    def get_target_spool(self, target):
+        """Get the spool of the batches not sent to a target, create it if needed
+
+        :param target: target name, eg. graphite
+        :type target: str
+        :return: target spool
+        :rtype: MetricsSpool
+        """
+        if target not in self.targets_spools:
+            self.targets_spools[target] = MetricsSpool(
+                os.path.join(self.spool.path, 'target-%s' % target),
+                segment_size=self.spool.segment_size, max_segments=self.spool.max_segments)
+        return self.targets_spools[target]
+
+    def quit(self):
+        """Called by the broker daemon when the module is stopped
+
+        :return: None
+        """
+        self.stop_senders()
+
     def test_connection(self):
         """Called to test the connection
 
@@ -362,6 +522,25 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
         logger.info("In loop...")
         time.sleep(1)
 
+    def get_metric_name(self, label):
+        """Get the sanitized metric name for a performance data label
+
+        The names are cached because the services send the same labels on each check.
+
+        :param label: performance data label
+        :type label: str
+        :return: metric name, empty if the label can not be used
+        :rtype: str
+        """
+        name = "duration" if label == 'time' else label
+        name = sanitize_name(name)
+        name = self.multiple_values.sub(r'.\1', name)
+
+        if len(self.metrics_names) >= self.metrics_names_max_count:
+            self.metrics_names.clear()
+        self.metrics_names[label] = name
+        return name
+
     def get_metrics_from_perfdata(self, service, perf_data):
         """Decode the performance data to build a metrics list"""
         result = []
@@ -370,10 +549,9 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
         for metric in metrics:
             logger.debug("service: %s, metric: %s (%s)", service, metric, metric.__dict__)
 
-            if metric.name in ['time']:
-                metric.name = "duration"
-            name = sanitize_name(metric.name)
-            name = self.multiple_values.sub(r'.\1', name)
+            name = self.metrics_names.get(metric.name)
+            if name is None:
+                name = self.get_metric_name(metric.name)
             if not name:
                 continue
 
@@ -410,20 +588,34 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
         """
         return len(self.my_metrics)
 
-    def flush(self, log=False):  # pylint:disable=too-many-branches, too-many-nested-blocks
+    @property
+    def spool_depth(self):
+        """
+        Number of metrics stored in the on-disk spools
+        :return:
+        """
+        if self.spool is None:
+            return 0
+        return len(self.spool) + sum([len(spool) for spool in self.targets_spools.values()])
+
+    def flush(self, log=False):
         """Send inner stored metrics to the configured Graphite or InfluxDB
 
+        The oldest spooled metrics are replayed before the inner stored metrics are sent.
+
         Returns False if the sending failed with a warning log if log parameter is set
 
         :param log: to log information or not
         :type log: bool
-
         :return: bool
         """
         if not self.my_metrics:
             logger.debug("Flushing - no metrics to send")
             return True
 
+        if self.senders:
+            return self._hand_off()
+
         now = int(time.time())
         if self.last_failure and self.last_failure + self.metrics_flush_pause > now:
             if not self.log_metrics_flush_pause:
@@ -434,102 +626,231 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
                 if not self.test_connection():
                     return False
 
+        # Replay the oldest spooled metrics first, the batches not sent to a target
+        # are only sent to this target
+        spools = [([target], spool) for target, spool in sorted(self.targets_spools.items())]
+        for targets, spool in spools + [(None, self.spool)]:
+            if not self._replay_spool(
+                    lambda batch, targets=targets: self.send_metrics(batch, log=log,
+                                                                     targets=targets),
+                    spool):
+                return False
+
+        if not self.send_metrics(self.my_metrics, log=log):
+            return False
+        self.my_metrics = MetricsBatch()
+
+        return True
+
+    def _hand_off(self):
+        """Hand off the inner stored metrics to the sender threads, after the oldest
+        spooled metrics
+
+        If a sender queue is full, the metrics are kept (backpressure) and
+        `store_metrics` will bound them.
+
+        :return: False if the metrics were kept
+        :rtype: bool
+        """
+        backpressure = any(sender.full for sender in self.senders.values())
+        if backpressure != self.backpressure:
+            self.backpressure = backpressure
+            if backpressure:
+                logger.warning("Metrics senders queues are full, keeping the metrics. "
+                               "Inner stored metric: %d", self.metrics_count)
+            else:
+                logger.warning("Metrics senders restored")
+        for sender in self.senders.values():
+            statsmgr.gauge('metrics.sender.%s.queue' % sender.target, len(sender.queue))
+        if backpressure:
+            return False
+
+        # Replay the oldest spooled metrics first if the targets are available
+        for target, spool in sorted(self.targets_spools.items()):
+            if target in self.senders and not self.senders[target].failing:
+                self._replay_spool(self.senders[target].put, spool)
+        if not any(sender.failing for sender in self.senders.values()):
+            self._replay_spool(self._put_metrics)
+
+        if not self._put_metrics(self.my_metrics):
+            return False
+        self.my_metrics = MetricsBatch()
+
+        return True
+
+    def _put_metrics(self, metrics):
+        """Hand off a metrics batch to all the sender threads, or to none of them
+
+        :param metrics: metrics to send
+        :type metrics: MetricsBatch
+        :return: False if a sender queue is full
+        :rtype: bool
+        """
+        if any(sender.full for sender in self.senders.values()):
+            return False
+        for sender in self.senders.values():
+            sender.put(metrics)
+        return True
+
+    def _replay_spool(self, send, spool=None):
+        """Send the oldest spooled metrics
+
+        :param send: function sending a batch, returns True if the batch was sent
+        :type send: function
+        :param spool: spool to replay, default is the spool of all the targets
+        :type spool: MetricsSpool
+        :return: False if a spooled batch could not be sent
+        :rtype: bool
+        """
+        if spool is None:
+            spool = self.spool
+        sent = True
+        replayed = 0
+        for _ in range(self.spool_replay_segments):
+            if spool is None or not spool:
+                break
+            metrics = MetricsBatch.from_list(spool.read_oldest())
+            if metrics and not send(metrics):
+                sent = False
+                break
+            spool.discard_oldest()
+            replayed += len(metrics)
+        if replayed:
+            logger.info("Replayed %d spooled metrics, remaining: %d", replayed, self.spool_depth)
+            self.metrics_replayed += replayed
+            statsmgr.counter('metrics.spool.replayed', replayed)
+            statsmgr.gauge('metrics.spool.depth', self.spool_depth)
+        return sent
+
+    def store_metrics(self):
+        """Keep the inner stored metrics count under the configured maximum
+
+        If a spool is configured, all the inner stored metrics are moved to the spool,
+        else the oldest metrics are dropped.
+
+        :return: None
+        """
+        if self.metrics_count <= self.metrics_max_count:
+            return
+
+        if self.spool is not None:
+            try:
+                dropped = self.spool.dropped
+                self.spool.append(self.my_metrics.to_list())
+                logger.info("Spooled %d metrics, spool depth: %d",
+                            self.metrics_count, self.spool_depth)
+                self.my_metrics = MetricsBatch()
+                self.metrics_dropped += self.spool.dropped - dropped
+                statsmgr.counter('metrics.dropped', self.spool.dropped - dropped)
+                statsmgr.gauge('metrics.spool.depth', self.spool_depth)
+                return
+            except (OSError, IOError) as exp:
+                logger.error("Failed spooling the metrics to %s. Error: %s",
+                             self.spool_dir, str(exp))
+
+        dropped = self.metrics_count - self.metrics_max_count
+        logger.warning("Inner stored metrics count exceeds %d, dropping the %d oldest metrics",
+                       self.metrics_max_count, dropped)
+        self.my_metrics.drop_oldest(dropped)
+        self.metrics_dropped += dropped
+        statsmgr.counter('metrics.dropped', dropped)
+
+    def send_metrics(self, metrics, log=False, targets=None):
+        # pylint:disable=too-many-branches, too-many-nested-blocks
+        """Send some metrics to the configured Graphite or InfluxDB and/or store them
+        in the output file
+
+        The metrics batch is directly encoded to the configured Graphite protocol
+        and to the InfluxDB line protocol.
+
+        :param metrics: metrics to send
+        :type metrics: MetricsBatch
+        :param log: to log information or not
+        :type log: bool
+        :param targets: targets to use (graphite, influxdb, file), default is all the targets
+        :type targets: list
+        :return: True if the metrics were sent or stored
+        :rtype: bool
+        """
+        now = int(time.time())
         metrics_sent = False
         metrics_saved = False
 
         # Flushing to Graphite
-        if self.graphite_enabled:
+        if self.graphite_enabled and (targets is None or 'graphite' in targets):
             try:
-                logger.debug("Flushing %d metrics to Graphite/carbon", self.metrics_count)
-
-                carbon_data = []
-                for metric in self.my_metrics:
-                    # Get path
-                    path = metric['tags']['path']
-                    for name, value in metric['fields'].items():
-                        carbon_data.append(
-                            ('.'.join([self.graphite_prefix, '.'.join([path, name])]),
-                             (metric['time'], value)))
-                self.carbon.add_data_list(carbon_data)
-                if self.carbon.send_data():
+                logger.debug("Flushing %d metrics to Graphite/carbon", len(metrics))
+
+                if self.graphite_protocol == 'plaintext':
+                    message = metrics.to_graphite_plaintext(self.graphite_prefix)
+                else:
+                    message = metrics.to_graphite_pickle(self.graphite_prefix)
+                if self.carbon.send_message(message):
                     metrics_sent = True
                 else:
                     if log:
                         logger.warning("Failed sending metrics to Graphite/carbon. "
                                        "Inner stored metric: %d", self.metrics_count)
-                if self.log_metrics_flush_pause:
-                    logger.warning("Metrics flush restored. "
-                                   "Remaining stored metric: %d", self.metrics_count)
-                self.last_failure = 0
-                self.log_metrics_flush_pause = False
+                with self.flush_pause_lock:
+                    if self.log_metrics_flush_pause:
+                        logger.warning("Metrics flush restored. "
+                                       "Remaining stored metric: %d", self.metrics_count)
+                    self.last_failure = 0
+                    self.log_metrics_flush_pause = False
             except Exception as exp:  # pylint: disable=broad-except
-                if not self.log_metrics_flush_pause:
-                    logger.warning("Failed sending metrics to Graphite/carbon: %s:%d. "
-                                   "Inner stored metrics count: %d.",
-                                   self.graphite_host, self.graphite_port, self.metrics_count)
-                    logger.warning("Exception: %s / %s", str(exp), traceback.print_exc())
-                else:
-                    logger.warning("Flush paused on connection error (last failed: %d). "
-                                   "Inner stored metric: %d. Trying to send...",
-                                   self.last_failure, self.metrics_count)
+                with self.flush_pause_lock:
+                    if not self.log_metrics_flush_pause:
+                        logger.warning("Failed sending metrics to Graphite/carbon: %s:%d. "
+                                       "Inner stored metrics count: %d.",
+                                       self.graphite_host, self.graphite_port, self.metrics_count)
+                        logger.warning("Exception: %s / %s", str(exp), traceback.print_exc())
+                    else:
+                        logger.warning("Flush paused on connection error (last failed: %d). "
+                                       "Inner stored metric: %d. Trying to send...",
+                                       self.last_failure, self.metrics_count)
 
-                self.last_failure = now
+                    self.last_failure = now
                 return False
 
         # Flushing to InfluxDB
         # pylint: disable=too-many-nested-blocks
-        if self.influxdb_enabled:
+        if self.influxdb_enabled and (targets is None or 'influxdb' in targets):
             try:
-                logger.debug("Flushing %d metrics to InfluxDB", self.metrics_count)
-
-                for metric in self.my_metrics:
-                    metric['time'] *= 1000000000
-                    for name, value in metric['fields'].items():
-                        if name.startswith('uom_'):
-                            continue
-                        # Force set float values
-                        if not isinstance(value, float):
-                            try:
-                                value = float(value)
-                            except Exception:  # pylint: disable=broad-except
-                                pass
-                            metric['fields'][name] = value
-
-                    if self.influxdb_tags is not None and isinstance(self.influxdb_tags, dict):
-                        metric['tags'].update(self.influxdb_tags)
+                logger.debug("Flushing %d metrics to InfluxDB", len(metrics))
 
-                # Write data to InfluxDB
-                metrics_sent = self.influx.write_points(self.my_metrics)
+                lines = metrics.to_influxdb_lines(
+                    self.influxdb_tags if isinstance(self.influxdb_tags, dict) else None)
 
-                if self.log_metrics_flush_pause:
-                    logger.warning("Metrics flush restored. "
-                                   "Remaining stored metric: %d", self.metrics_count)
-                self.last_failure = 0
-                self.log_metrics_flush_pause = False
+                # Write data to InfluxDB
+                metrics_sent = self.influx.write_points(lines, protocol='line')
+
+                with self.flush_pause_lock:
+                    if self.log_metrics_flush_pause:
+                        logger.warning("Metrics flush restored. "
+                                       "Remaining stored metric: %d", self.metrics_count)
+                    self.last_failure = 0
+                    self.log_metrics_flush_pause = False
             except Exception as exp:  # pylint: disable=broad-except
                 logger.warning("*** Exception: %s", str(exp))
-                if not self.log_metrics_flush_pause:
-                    logger.warning("Failed sending metrics to InfluxDB: %s:%d. "
-                                   "Inner stored metrics count: %d.",
-                                   self.influxdb_host, self.influxdb_port, self.metrics_count)
-                    logger.warning("Exception: %s", str(exp))
-                else:
-                    logger.warning("Flush paused on connection error (last failed: %d). "
-                                   "Inner stored metric: %d. Trying to send...",
-                                   self.last_failure, self.metrics_count)
+                with self.flush_pause_lock:
+                    if not self.log_metrics_flush_pause:
+                        logger.warning("Failed sending metrics to InfluxDB: %s:%d. "
+                                       "Inner stored metrics count: %d.",
+                                       self.influxdb_host, self.influxdb_port, self.metrics_count)
+                        logger.warning("Exception: %s", str(exp))
+                    else:
+                        logger.warning("Flush paused on connection error (last failed: %d). "
+                                       "Inner stored metric: %d. Trying to send...",
+                                       self.last_failure, self.metrics_count)
 
-                self.last_failure = now
+                    self.last_failure = now
                 return False
 
-        if self.output_file:
+        if self.output_file and (targets is None or 'file' in targets):
             try:
-                logger.debug("Storing %d metrics to %s", self.metrics_count, self.output_file)
+                logger.debug("Storing %d metrics to %s", len(metrics), self.output_file)
                 with open(self.output_file, 'a') as fp:
-                    for metric in self.my_metrics:
-                        # Get path
-                        path = metric['tags']['path']
-                        for name, value in metric['fields'].items():
-                            fp.write("%s;%s;%s\n" % (metric['time'], '.'.join((path, name)), value))
+                    fp.write(metrics.to_text())
                 metrics_saved = True
 
             except Exception as exp:  # pylint: disable=broad-except
@@ -538,11 +859,8 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
                                self.output_file, self.metrics_count, str(exp))
                 return False
 
-        if ((self.graphite_host or self.influxdb_host) and metrics_sent) or \
-                (self.output_file and metrics_saved):
-            self.my_metrics = []
-
-        return True
+        return bool(((self.graphite_host or self.influxdb_host) and metrics_sent) or
+                    (self.output_file and metrics_saved))
 
     def send_to_tsdb(self, realm, host, service, metrics, ts, path):
         """Send performance data to time series database
@@ -556,7 +874,7 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
         :type: string
         :param service: concerned service
         :type: string
-        :param metrics: list of metrics couple (name, value)
+        :param metrics: list of metrics (name, value, uom)
         :type: list
         :param ts: timestamp
         :type: int
@@ -566,31 +884,17 @@ class InnerMetrics(BaseModule):  # pylint: disable=too-many-instance-attributes
         if ts is None:
             ts = int(time.time())
 
-        data = {
-            "measurement": service,
-            "tags": {
-                "host": host,
-                "service": service,
-                "realm": '.'.join(realm) if isinstance(realm, list) else realm,
-                "path": path
-            },
-            "time": ts,
-            "fields": {}
-        }
-
-        if path is not None:
-            data['tags'].update({"path": path})
-
-        for metric, value, _ in metrics:
-            data['fields'].update({metric: value})
+        if isinstance(realm, list):
+            realm = '.'.join(realm)
 
         # Flush if necessary
-        logger.debug("Metrics data: %s", data)
-        self.my_metrics.append(data)
+        logger.debug("Metrics data: %s/%s (%s): %s", host, service, ts, metrics)
+        self.my_metrics.add(ts, service, host, realm, path, metrics)
 
         if self.metrics_count >= self.metrics_flush_count:
-            # self.carbon.add_data_list(self.my_metrics)
             self.flush()
+        # Do not let the inner stored metrics grow while the TSDB is not available
+        self.store_metrics()
 
     def manage_initial_service_status_brok(self, b):
         """Prepare the known services cache"""
@@ -51,7 +51,7 @@
 Used to define monitoring notifications (email, contacts..)
 
 """
-from six import string_types
+from six import add_metaclass, string_types
 
 from alignak.action import Action
 from alignak.brok import Brok
@@ -59,16 +59,14 @@ from alignak.property import BoolProp, IntegerProp, StringProp, SetProp, ListPro
 from alignak.autoslots import AutoSlots
 
 
+# AutoSlots create the __slots__ with properties and running_properties names
+@add_metaclass(AutoSlots)
 class Notification(Action):  # pylint: disable=too-many-instance-attributes
     """Notification class, inherits from action class. Used to notify contacts
      and execute notification command defined in configuration
 
     """
 
-    # AutoSlots create the __slots__ with properties and
-    # running_properties names
-    __metaclass__ = AutoSlots
-
     my_type = 'notification'
 
     properties = Action.properties.copy()
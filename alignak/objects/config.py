@@ -751,6 +751,13 @@ class Config(Item):  # pylint: disable=too-many-public-methods,too-many-instance
         'cleaning_queues_interval':
             IntegerProp(default=900, fill_brok=[FULL_STATUS]),
 
+        # Broks dropped first and broks never dropped when a broker queue is full
+        'broks_shedding_types':
+            ListProp(default=[u'update_program_status', u'host_next_schedule',
+                              u'service_next_schedule'], fill_brok=[FULL_STATUS]),
+        'broks_kept_types':
+            ListProp(default=[u'monitoring_log'], fill_brok=[FULL_STATUS]),
+
         # Now for problem/impact states changes
         'enable_problem_impacts_states_change':
             BoolProp(default=True, fill_brok=[FULL_STATUS],
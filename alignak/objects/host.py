@@ -71,6 +71,8 @@ import os
 import time
 import logging
 
+from six import add_metaclass
+
 from alignak.objects.schedulingitem import SchedulingItem, SchedulingItems
 
 from alignak.autoslots import AutoSlots
@@ -81,13 +83,12 @@ from alignak.log import make_monitoring_log
 logger = logging.getLogger(__name__)  # pylint:disable=invalid-name
 
 
+# AutoSlots create the __slots__ with properties and running_properties names
+@add_metaclass(AutoSlots)
 class Host(SchedulingItem):  # pylint: disable=too-many-public-methods
     """Host class implements monitoring concepts for host.
     For example it defines parents, check_interval, check_command  etc.
     """
-    # AutoSlots create the __slots__ with properties and
-    # running_properties names
-    __metaclass__ = AutoSlots
 
     ok_up = u'UP'
     my_type = 'host'
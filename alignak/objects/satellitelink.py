@@ -53,6 +53,8 @@ import time
 
 from alignak.util import strip_and_uniq, get_obj_name_two_args_and_void
 from alignak.misc.serialization import unserialize, get_alignak_class
+from alignak.brok import BROKS_FORMAT_SERIALIZED, BROKS_FORMAT_JSON, get_broks_from_json
+from alignak.action import RESULTS_FORMAT_SERIALIZED, RESULTS_FORMAT_COMPACT
 from alignak.objects.item import Item, Items
 from alignak.property import (BoolProp, IntegerProp, FloatProp, StringProp,
                               ListProp, DictProp, AddrProp, FULL_STATUS)
@@ -168,6 +170,9 @@ class SatelliteLink(Item):
             BoolProp(default=False, fill_brok=[FULL_STATUS], to_send=True),
         'hard_ssl_name_check':
             BoolProp(default=True, fill_brok=[FULL_STATUS], to_send=True),
+        # Compression of the requests sent to the daemon: gzip or zstd, empty for none
+        'compression':
+            StringProp(default=u'', fill_brok=[FULL_STATUS], to_send=True),
         'passive':
             BoolProp(default=False, fill_brok=[FULL_STATUS], to_send=True),
     })
@@ -195,6 +200,10 @@ class SatelliteLink(Item):
 
         'running_id':   # The running identifier of my related daemon
             FloatProp(default=0, fill_brok=[FULL_STATUS]),
+        'results_format':   # The actions results format understood by my related daemon
+            StringProp(default=RESULTS_FORMAT_SERIALIZED),
+        'broks_format':   # The broks format understood by my related daemon
+            StringProp(default=BROKS_FORMAT_SERIALIZED),
 
         # the number of poll attempt from the arbiter dispatcher
         'attempt':
@@ -493,7 +502,8 @@ class SatelliteLink(Item):
                                   port=self.satellite_map['port'],
                                   short_timeout=self.short_timeout, long_timeout=self.long_timeout,
                                   use_ssl=self.satellite_map['use_ssl'],
-                                  strong_ssl=self.satellite_map['hard_ssl_name_check'])
+                                  strong_ssl=self.satellite_map['hard_ssl_name_check'],
+                                  compression=self.compression)
             self.uri = self.con.uri
         except HTTPClientException as exp:
             # logger.error("Error with '%s' when creating client: %s", self.name, str(exp))
@@ -662,6 +672,11 @@ class SatelliteLink(Item):
         # An exception is raised in this function if the daemon is not reachable
         self.running_id = self.con.get('identity')
         if isinstance(self.running_id, dict):
+            # A daemon that does not advertise its results or broks format only knows
+            # the serialized one
+            self.results_format = self.running_id.get('results_format',
+                                                      RESULTS_FORMAT_SERIALIZED)
+            self.broks_format = self.running_id.get('broks_format', BROKS_FORMAT_SERIALIZED)
             self.running_id = self.running_id['running_id']
 
         if former_running_id == 0:
@@ -939,16 +954,23 @@ class SatelliteLink(Item):
     def get_broks(self, broker_name):
         """Send a HTTP request to the satellite (GET /_broks)
         Get broks from the satellite.
-        Un-serialize data received.
+        The broks are requested in the json format if the satellite understands it, their
+        data are then decoded only once. Else un-serialize data received.
 
         :param broker_name: the concerned broker link
         :type broker_name: BrokerLink
         :return: Broks list on success, [] on failure
         :rtype: list
         """
-        res = self.con.get('_broks', {'broker_name': broker_name}, wait=False)
+        if self.broks_format != BROKS_FORMAT_JSON:
+            res = self.con.get('_broks', {'broker_name': broker_name}, wait=False)
+            logger.debug("Got broks from %s: %s", self.name, res)
+            return unserialize(res, True)
+
+        res = self.con.get('_broks', {'broker_name': broker_name,
+                                      'broks_format': BROKS_FORMAT_JSON}, wait=False, stream=True)
         logger.debug("Got broks from %s: %s", self.name, res)
-        return unserialize(res, True)
+        return get_broks_from_json(res)
 
     @valid_connection()
     @communicate()
@@ -968,12 +990,17 @@ class SatelliteLink(Item):
         """Send a HTTP request to the satellite (GET /_results)
         Get actions results from satellite (only passive satellites expose this method.
 
+        The results are requested in the compact format if the satellite understands it.
+
         :param scheduler_instance_id: scheduler instance identifier
         :type scheduler_instance_id: str
         :return: Results list on success, [] on failure
         :rtype: list
         """
-        res = self.con.get('_results', {'scheduler_instance_id': scheduler_instance_id}, wait=True)
+        params = {'scheduler_instance_id': scheduler_instance_id}
+        if self.results_format == RESULTS_FORMAT_COMPACT:
+            params['results_format'] = RESULTS_FORMAT_COMPACT
+        res = self.con.get('_results', params, wait=True, stream=True)
         logger.debug("Got %d results from %s: %s", len(res), self.name, res)
         return res
 
@@ -988,7 +1015,7 @@ class SatelliteLink(Item):
         :return: Actions list on success, [] on failure
         :rtype: list
         """
-        res = self.con.get('_checks', params, wait=True)
+        res = self.con.get('_checks', params, wait=True, stream=True)
         logger.debug("Got checks to execute from %s: %s", self.name, res)
         return unserialize(res, True)
 
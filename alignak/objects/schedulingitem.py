@@ -69,6 +69,7 @@ import time
 from datetime import datetime
 import traceback
 import logging
+from collections import namedtuple, Counter
 import numpy
 
 from alignak.misc.serialization import serialize, unserialize
@@ -93,6 +94,112 @@ from alignak.commandcall import CommandCall
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+# The item attributes which are counted by the states counters, see StatesCounters
+COUNTED_PROPERTIES = ('state', 'state_type', 'is_problem', 'problem_has_been_acknowledged',
+                      'in_scheduled_downtime', 'is_flapping',
+                      'active_checks_enabled', 'passive_checks_enabled')
+
+# The key under which an item is counted
+StatesKey = namedtuple('StatesKey', ['state', 'state_type', 'is_problem', 'acknowledged',
+                                     'downtimed', 'flapping', 'monitored'])
+
+
+def counted_property(name, deadlines=None, business_rules=False):
+    """Get a python property for a counted attribute
+
+    The value is stored in the instance dictionary, the property only notifies the
+    item listener (the states counters) of the changes, the named scheduler
+    deadlines heap if the item deadline also depends on the attribute, and the business
+    rules nodes watching the item if their states depend on the attribute.
+
+    :param name: attribute name
+    :type name: str
+    :param deadlines: name of the deadlines heap to notify, if any
+    :type deadlines: str
+    :param business_rules: notify the business rules nodes
+    :type business_rules: bool
+    :return: python property
+    :rtype: property
+    """
+    def getter(self):
+        """Get the attribute value"""
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def setter(self, value):
+        """Set the attribute value and notify the listener"""
+        old_value = self.__dict__.get(name)
+        self.__dict__[name] = value
+        if value != old_value:
+            if self._listener is not None:
+                self._listener.item_changed(self)
+            if deadlines is not None:
+                self.deadlines_changed(deadlines)
+            if business_rules:
+                self.business_rules_changed()
+
+    return property(getter, setter)
+
+
+def business_rule_property(name):
+    """Get a python property for an attribute the business rules states depend on
+
+    The value is stored in the instance dictionary, the property only notifies the
+    business rules nodes watching the item of the changes.
+
+    :param name: attribute name
+    :type name: str
+    :return: python property
+    :rtype: property
+    """
+    def getter(self):
+        """Get the attribute value"""
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def setter(self, value):
+        """Set the attribute value and notify the business rules nodes"""
+        old_value = self.__dict__.get(name)
+        self.__dict__[name] = value
+        if value != old_value:
+            self.business_rules_changed()
+
+    return property(getter, setter)
+
+
+def deadline_property(name, deadlines):
+    """Get a python property for an attribute the item deadline depends on
+
+    The value is stored in the instance dictionary, the property only notifies the
+    scheduler deadlines heap of the changes.
+
+    :param name: attribute name
+    :type name: str
+    :param deadlines: name of the deadlines heap to notify
+    :type deadlines: str
+    :return: python property
+    :rtype: property
+    """
+    def getter(self):
+        """Get the attribute value"""
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def setter(self, value):
+        """Set the attribute value and notify the deadlines heap"""
+        old_value = self.__dict__.get(name)
+        self.__dict__[name] = value
+        if value != old_value:
+            self.deadlines_changed(deadlines)
+
+    return property(getter, setter)
+
 
 class SchedulingItem(Item):  # pylint: disable=too-many-instance-attributes
     """SchedulingItem class provide method for Scheduler to handle Service or Host objects
@@ -103,6 +210,17 @@ class SchedulingItem(Item):  # pylint: disable=too-many-instance-attributes
     current_event_id = 0
     current_problem_id = 0
 
+    # Object notified when a counted attribute of the item changes.
+    # The states counters of the items use it to maintain their counts.
+    # See SchedulingItems.get_states_counters
+    _listener = None
+    # Scheduler heaps (by name) notified when the item deadlines change, eg. when it gets
+    # a downtime or an acknowledgement. See alignak.scheduler.DeadlinesHeap
+    _deadlines = {}
+    # Business rules nodes invalidated when the item state changes.
+    # See alignak.dependencynode.DependencyNode.watch_items
+    _business_rule_nodes = ()
+
     properties = Item.properties.copy()
     properties.update({
         'display_name':
@@ -505,6 +623,41 @@ class SchedulingItem(Item):  # pylint: disable=too-many-instance-attributes
         """Simple property renaming for better API;)"""
         return self.in_scheduled_downtime
 
+    # The counted attributes are stored in the instance dictionary,
+    # the properties only notify the listener of their changes
+    state = counted_property('state')
+    state_type = counted_property('state_type')
+    is_problem = counted_property('is_problem')
+    problem_has_been_acknowledged = counted_property('problem_has_been_acknowledged',
+                                                     business_rules=True)
+    in_scheduled_downtime = counted_property('in_scheduled_downtime', business_rules=True)
+    is_flapping = counted_property('is_flapping')
+    active_checks_enabled = counted_property('active_checks_enabled', 'freshness')
+    passive_checks_enabled = counted_property('passive_checks_enabled', 'freshness')
+
+    # The business rules states are computed from the hard state
+    last_hard_state_id = business_rule_property('last_hard_state_id')
+
+    # Attributes the freshness deadline of the item is computed from
+    check_freshness = deadline_property('check_freshness', 'freshness')
+    freshness_threshold = deadline_property('freshness_threshold', 'freshness')
+    freshness_expired = deadline_property('freshness_expired', 'freshness')
+    last_state_update = deadline_property('last_state_update', 'freshness')
+
+    def get_states_key(self):
+        """Get the key under which the item is counted by the states counters
+
+        :return: the item states key
+        :rtype: StatesKey
+        """
+        return StatesKey(getattr(self, 'state', None), getattr(self, 'state_type', None),
+                         bool(getattr(self, 'is_problem', False)),
+                         bool(getattr(self, 'problem_has_been_acknowledged', False)),
+                         bool(getattr(self, 'in_scheduled_downtime', False)),
+                         bool(getattr(self, 'is_flapping', False)),
+                         bool(getattr(self, 'active_checks_enabled', False) or
+                              getattr(self, 'passive_checks_enabled', False)))
+
     def serialize(self):
         res = super(SchedulingItem, self).serialize()
 
@@ -2612,6 +2765,10 @@ class SchedulingItem(Item):  # pylint: disable=too-many-instance-attributes
 
             self.processed_business_rule = rule
 
+            # The former rule does not need to watch its items anymore
+            if self.business_rule is not None and self.business_rule.watched:
+                self.business_rule.unwatch_items(hosts, services)
+
             fact = DependencyNodeFactory(self)
             self.business_rule = fact.eval_cor_pattern(rule, hosts, services,
                                                        hostgroups, servicegroups, running)
@@ -2767,6 +2924,9 @@ class SchedulingItem(Item):  # pylint: disable=too-many-instance-attributes
                 # be modified by modulation.
                 self.create_business_rules(hosts, services, hostgroups, servicegroups,
                                            macromodulations, timeperiods, running=True)
+                # The rule state is only evaluated again when one of its items changes
+                if not self.business_rule.watched:
+                    self.business_rule.watch_items(hosts, services)
                 state = self.business_rule.get_state(hosts, services)
                 check.output = self.get_business_rule_output(hosts, services,
                                                              macromodulations, timeperiods)
@@ -2992,6 +3152,7 @@ class SchedulingItem(Item):  # pylint: disable=too-many-instance-attributes
                 'end_time': end_time, 'notify': notify
             }
             self.acknowledgement = Acknowledge(data)
+            self.deadlines_changed('acknowledgements')
             if self.my_type == 'host':
                 comment_type = 1
                 self.broks.append(self.acknowledgement.get_raise_brok(self.get_name()))
@@ -3022,6 +3183,58 @@ class SchedulingItem(Item):  # pylint: disable=too-many-instance-attributes
                                                            end_time)
         return comm
 
+    def business_rule_nodes_add(self, node):
+        """Register a business rule node which state depends on the item state
+
+        :param node: business rule leaf node
+        :type node: alignak.dependencynode.DependencyNode
+        :return: None
+        """
+        self._business_rule_nodes = list(self._business_rule_nodes) + [node]
+
+    def business_rule_nodes_remove(self, node):
+        """Unregister a business rule node
+
+        :param node: business rule leaf node
+        :type node: alignak.dependencynode.DependencyNode
+        :return: None
+        """
+        self._business_rule_nodes = [n for n in self._business_rule_nodes if n is not node]
+
+    def business_rules_changed(self):
+        """
+        Invalidate the cached states of the business rules nodes depending on the item
+
+        :return: None
+        """
+        for node in self._business_rule_nodes:
+            node.invalidate()
+
+    def deadlines_changed(self, name=None):
+        """
+        Notify the scheduler deadlines heaps that the item deadlines changed
+
+        :param name: name of the heap to notify, all the heaps if None
+        :type name: str
+        :return: None
+        """
+        if name is None:
+            for deadlines in self._deadlines.values():
+                deadlines.push(self)
+        elif name in self._deadlines:
+            self._deadlines[name].push(self)
+
+    def add_downtime(self, downtime):
+        """
+        Add a downtime in this object and notify the deadlines heaps
+
+        :param downtime: a Downtime object
+        :type downtime: object
+        :return: None
+        """
+        super(SchedulingItem, self).add_downtime(downtime)
+        self.deadlines_changed('downtimes')
+
     def check_for_expire_acknowledge(self):
         """
         If have acknowledge and is expired, delete it
@@ -3361,10 +3574,67 @@ class SchedulingItem(Item):  # pylint: disable=too-many-instance-attributes
         return super(SchedulingItem, self).is_correct() and self.conf_is_correct
 
 
+class StatesCounters(object):
+    """Count the items of a collection by their states key
+
+    The items notify the counters when one of their counted attributes changes,
+    thus the number of items in a given state is got without iterating the items.
+    """
+    def __init__(self, items):
+        self.counts = Counter()
+        self.total = 0
+        for item in items:
+            item._listener = self
+            item._states_key = item.get_states_key()
+            self.counts[item._states_key] += 1
+            self.total += 1
+
+    def item_changed(self, item):
+        """Update the counters when an item counted attribute changed
+
+        :param item: the changed item
+        :type item: alignak.objects.schedulingitem.SchedulingItem
+        :return: None
+        """
+        states_key = item.get_states_key()
+        if states_key == item._states_key:
+            return
+        self.counts[item._states_key] -= 1
+        self.counts[states_key] += 1
+        item._states_key = states_key
+
+    def count(self, **filters):
+        """Get the number of items matching the filters
+
+        The filters are the StatesKey fields, eg. count(state=u'UP', state_type=u'HARD')
+
+        :return: number of items
+        :rtype: int
+        """
+        return sum(count for states_key, count in self.counts.items()
+                   if all(getattr(states_key, field) == value
+                          for field, value in filters.items()))
+
+
 class SchedulingItems(CommandCallItems):
     """Class to handle schedulingitems. It's mainly for configuration
 
     """
+    # States counters of the items, see get_states_counters
+    states_counters = None
+
+    def get_states_counters(self):
+        """Get the states counters of the items
+
+        The counters are built on the first call and then maintained by the items. They
+        are built again if some items were added or removed.
+
+        :return: the items states counters
+        :rtype: StatesCounters
+        """
+        if self.states_counters is None or self.states_counters.total != len(self.items):
+            self.states_counters = StatesCounters(self)
+        return self.states_counters
 
     def find_by_filter(self, filters, all_items):
         """
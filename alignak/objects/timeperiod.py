@@ -121,20 +121,25 @@ action or not if we are in right period
 import logging
 import time
 import re
+from bisect import bisect_right
+from collections import namedtuple
 
 from alignak.objects.item import Item, Items
 
 from alignak.daterange import Daterange, CalendarDaterange
 from alignak.daterange import StandardDaterange, MonthWeekDayDaterange
 from alignak.daterange import MonthDateDaterange, WeekDayDaterange
-from alignak.daterange import MonthDayDaterange
+from alignak.daterange import MonthDayDaterange, get_day
 from alignak.property import IntegerProp, StringProp, ListProp, BoolProp, FULL_STATUS
 from alignak.log import make_monitoring_log
 from alignak.misc.serialization import get_alignak_class
-from alignak.util import merge_periods
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+# The valid [start, end) intervals of a timeperiod computed for the [start, end) time range
+IntervalsTable = namedtuple('IntervalsTable', ['start', 'end', 'starts', 'ends',
+                                               'dateranges', 'exclude'])
+
 
 class Timeperiod(Item):
     """
@@ -172,6 +177,9 @@ class Timeperiod(Item):
     })
     running_properties = Item.running_properties.copy()
 
+    # Duration (seconds) for which the valid intervals table is computed
+    intervals_horizon = 14 * 86400
+
     def __init__(self, params, parsing=True):
         # Get standard params
         standard_params = dict(
@@ -195,8 +203,9 @@ class Timeperiod(Item):
 
         # Handle standard params
         super(Timeperiod, self).__init__(params=standard_params, parsing=parsing)
-        self.cache = {}  # For tuning purpose only
-        self.invalid_cache = {}  # same but for invalid search
+        self.cache = None  # Valid intervals table, see get_intervals_table
+        self.cache_hits = 0
+        self.cache_misses = 0
 
         # We use the uuid presence to assume we are reserializing
         if not parsing:
@@ -271,14 +280,10 @@ class Timeperiod(Item):
         :return: time is valid or not
         :rtype: bool
         """
-        if hasattr(self, 'exclude'):
-            for daterange in self.exclude:
-                if daterange.is_time_valid(timestamp):
-                    return False
-        for daterange in self.dateranges:
-            if daterange.is_time_valid(timestamp):
-                return True
-        return False
+        timestamp = int(timestamp)
+        table = self.get_intervals_table(timestamp)
+        idx = bisect_right(table.ends, timestamp)
+        return idx < len(table.ends) and table.starts[idx] <= timestamp
 
     def get_min_from_t(self, timestamp):
         """
@@ -304,34 +309,6 @@ class Timeperiod(Item):
         """
         pass
 
-    def find_next_valid_time_from_cache(self, timestamp):
-        """
-        Get the next valid time from cache
-
-        :param timestamp: number of seconds
-        :type timestamp: int
-        :return: Nothing or time in seconds
-        :rtype: None or int
-        """
-        try:
-            return self.cache[timestamp]
-        except KeyError:
-            return None
-
-    def find_next_invalid_time_from_cache(self, timestamp):
-        """
-        Get the next invalid time from cache
-
-        :param timestamp: number of seconds
-        :type timestamp: int
-        :return: Nothing or time in seconds
-        :rtype: None or int
-        """
-        try:
-            return self.invalid_cache[timestamp]
-        except KeyError:
-            return None
-
     def check_and_log_activation_change(self):
         """
         Will look for active/un-active change of timeperiod.
@@ -372,99 +349,153 @@ class Timeperiod(Item):
 
     def clean_cache(self):
         """
-        Clean cache with entries older than now because not used in future ;)
+        Clean the valid intervals table if it is not used anymore because in the past ;)
+        and reset the table lookups counters
 
-        :return: None
+        :return: table hits and misses count since the last clean
+        :rtype: tuple
         """
-        now = int(time.time())
-        t_to_del = []
-        for timestamp in self.cache:
-            if timestamp < now:
-                t_to_del.append(timestamp)
-        for timestamp in t_to_del:
-            del self.cache[timestamp]
-
-        # same for the invalid cache
-        t_to_del = []
-        for timestamp in self.invalid_cache:
-            if timestamp < now:
-                t_to_del.append(timestamp)
-        for timestamp in t_to_del:
-            del self.invalid_cache[timestamp]
+        if self.cache and self.cache.end <= int(time.time()):
+            self.cache = None
 
-    def get_next_valid_time_from_t(self, timestamp):
-        # pylint: disable=too-many-branches
+        res = (self.cache_hits, self.cache_misses)
+        self.cache_hits = self.cache_misses = 0
+        return res
+
+    def get_intervals_table(self, timestamp):
         """
-        Get next valid time. If it's in cache, get it, otherwise define it.
-        The limit to find it is 1 year.
+        Get the valid intervals table that contains the timestamp
+
+        The table is (re)built if the timestamp is out of its time range or if the
+        dateranges or the excluded timeperiods changed since it was built.
 
         :param timestamp: number of seconds
-        :type timestamp: int or float
-        :return: Nothing or time in seconds
-        :rtype: None or int
+        :type timestamp: int
+        :return: valid intervals table
+        :rtype: IntervalsTable
+        """
+        table = self.cache
+        if not table or not table.start <= timestamp < table.end \
+                or table.dateranges != len(self.dateranges) or table.exclude is not self.exclude:
+            self.cache_misses += 1
+            table = self.cache = self.build_intervals_table(timestamp)
+        else:
+            self.cache_hits += 1
+        return table
+
+    def build_intervals_table(self, timestamp):
         """
-        timestamp = int(timestamp)
-        original_t = timestamp
+        Build the sorted valid intervals of the timeperiod, excluded periods removed,
+        from the beginning of the timestamp day to the intervals horizon.
 
-        res_from_cache = self.find_next_valid_time_from_cache(timestamp)
-        if res_from_cache is not None:
-            return res_from_cache
+        The last interval is not cut at the horizon; the search limit is 1 year.
 
-        still_loop = True
+        :param timestamp: number of seconds
+        :type timestamp: int
+        :return: valid intervals table
+        :rtype: IntervalsTable
+        """
+        start = get_day(timestamp)
+        end = max(start + self.intervals_horizon, timestamp + 1)
+        limit = timestamp + 3600 * 24 * 366 + 1
+
+        starts = []
+        ends = []
+        cursor = start
+        while not ends or ends[-1] <= end:
+            period = self.get_dateranges_period(cursor, limit)
+            if period is None:
+                break
+            for (p_start, p_end) in self.get_not_excluded_periods(*period):
+                if ends and p_start <= ends[-1]:
+                    ends[-1] = max(ends[-1], p_end)
+                else:
+                    starts.append(p_start)
+                    ends.append(p_end)
+            cursor = max(period[1], period[0] + 1)
 
-        # Loop for all minutes...
-        while still_loop:
-            local_min = None
+        return IntervalsTable(start, end, starts, ends, len(self.dateranges), self.exclude)
 
-            # Ok, not in cache...
-            dr_mins = []
+    def get_dateranges_period(self, timestamp, limit):
+        """
+        Get the first period where at least one of the dateranges is valid,
+        starting from timestamp and before limit
 
-            for daterange in self.dateranges:
-                dr_mins.append(daterange.get_next_valid_time_from_t(timestamp))
+        :param timestamp: number of seconds
+        :type timestamp: int
+        :param limit: search limit
+        :type limit: int
+        :return: (start, end) of the period or None if not found
+        :rtype: None | tuple
+        """
+        starts = [daterange.get_next_valid_time_from_t(timestamp)
+                  for daterange in self.dateranges]
+        starts = [start for start in starts if start is not None]
+        if not starts or min(starts) > limit:
+            return None
 
-            s_dr_mins = sorted([d for d in dr_mins if d is not None])
+        start = end = min(starts)
+        # The period goes on while a daterange is still valid at its end
+        while end <= limit:
+            next_end = max(daterange.get_next_invalid_time_from_t(end)
+                           for daterange in self.dateranges)
+            if next_end <= end:
+                break
+            end = next_end
+        return (start, end)
+
+    def get_not_excluded_periods(self, start, end):
+        """
+        Get the periods between start and end that are not valid in an excluded timeperiod
+
+        :param start: period start
+        :type start: int
+        :param end: period end
+        :type end: int
+        :return: list of (start, end) periods
+        :rtype: list
+        """
+        if not self.exclude:
+            return [(start, end)]
+
+        periods = []
+        while start < end:
+            # Skip the excluded time
+            excluded = [timeperiod for timeperiod in self.exclude
+                        if timeperiod.is_time_valid(start)]
+            if excluded:
+                start = max(timeperiod.get_next_invalid_time_from_t(start)
+                            for timeperiod in excluded)
+                continue
+
+            # Until the next excluded time
+            next_excluded = [timeperiod.get_next_valid_time_from_t(start)
+                             for timeperiod in self.exclude]
+            next_excluded = [t for t in next_excluded if t is not None and t < end]
+            periods.append((start, min(next_excluded) if next_excluded else end))
+            start = periods[-1][1]
+        return periods
 
-            for t01 in s_dr_mins:
-                if not self.exclude and still_loop:
-                    # No Exclude so we are good
-                    local_min = t01
-                    still_loop = False
-                else:
-                    for timeperiod in self.exclude:
-                        if not timeperiod.is_time_valid(t01) and still_loop:
-                            # OK we found a date that is not valid in any exclude timeperiod
-                            local_min = t01
-                            still_loop = False
-
-            if local_min is None:
-                # Looking for next invalid date
-                exc_mins = []
-                if s_dr_mins != []:
-                    for timeperiod in self.exclude:
-                        exc_mins.append(timeperiod.get_next_invalid_time_from_t(s_dr_mins[0]))
-
-                s_exc_mins = sorted([d for d in exc_mins if d is not None])
-
-                if s_exc_mins != []:
-                    local_min = s_exc_mins[0]
-
-            if local_min is None:
-                still_loop = False
-            else:
-                timestamp = local_min
-                # No loop more than one year
-                if timestamp > original_t + 3600 * 24 * 366 + 1:
-                    still_loop = False
-                    local_min = None
-
-        # Ok, we update the cache...
-        self.cache[original_t] = local_min
-        return local_min
+    def get_next_valid_time_from_t(self, timestamp):
+        """
+        Get next valid time from the valid intervals table.
+        The limit to find it is 1 year.
+
+        :param timestamp: number of seconds
+        :type timestamp: int or float
+        :return: Nothing or time in seconds
+        :rtype: None or int
+        """
+        timestamp = int(timestamp)
+        table = self.get_intervals_table(timestamp)
+        idx = bisect_right(table.ends, timestamp)
+        if idx < len(table.ends):
+            return max(table.starts[idx], timestamp)
+        return None
 
     def get_next_invalid_time_from_t(self, timestamp):
-        # pylint: disable=too-many-branches
         """
-        Get the next invalid time
+        Get the next invalid time from the valid intervals table
 
         :param timestamp: timestamp in seconds (of course)
         :type timestamp: int or float
@@ -472,56 +503,11 @@ class Timeperiod(Item):
         :rtype: int or float
         """
         timestamp = int(timestamp)
-        original_t = timestamp
-
-        dr_mins = []
-        for daterange in self.dateranges:
-            timestamp = original_t
-            cont = True
-            while cont:
-                start = daterange.get_next_valid_time_from_t(timestamp)
-                if start is not None:
-                    end = daterange.get_next_invalid_time_from_t(start)
-                    dr_mins.append((start, end))
-                    timestamp = end
-                else:
-                    cont = False
-                if timestamp > original_t + (3600 * 24 * 365):
-                    cont = False
-        periods = merge_periods(dr_mins)
-
-        # manage exclude periods
-        dr_mins = []
-        for exclude in self.exclude:
-            for daterange in exclude.dateranges:
-                timestamp = original_t
-                cont = True
-                while cont:
-                    start = daterange.get_next_valid_time_from_t(timestamp)
-                    if start is not None:
-                        end = daterange.get_next_invalid_time_from_t(start)
-                        dr_mins.append((start, end))
-                        timestamp = end
-                    else:
-                        cont = False
-                    if timestamp > original_t + (3600 * 24 * 365):
-                        cont = False
-        if not dr_mins:
-            periods_exclude = []
-        else:
-            periods_exclude = merge_periods(dr_mins)
-
-        if len(periods) >= 1:
-            # if first valid period is after original timestamp, the first invalid time
-            # is the original timestamp
-            if periods[0][0] > original_t:
-                return original_t
-            # check the first period + first period of exclude
-            if len(periods_exclude) >= 1:
-                if periods_exclude[0][0] < periods[0][1]:
-                    return periods_exclude[0][0]
-            return periods[0][1]
-        return original_t
+        table = self.get_intervals_table(timestamp)
+        idx = bisect_right(table.ends, timestamp)
+        if idx < len(table.ends) and table.starts[idx] <= timestamp:
+            return table.ends[idx]
+        return timestamp
 
     def is_correct(self):
         """Check if this object configuration is correct ::
@@ -77,12 +77,13 @@ from alignak.http.generic_interface import GenericInterface
 
 from alignak.misc.serialization import unserialize, AlignakClassLookupException
 from alignak.property import BoolProp, IntegerProp, ListProp, FULL_STATUS
-from alignak.brok import Brok
+from alignak.brok import Brok, BROKS_FORMAT_JSON
 from alignak.external_command import ExternalCommand
 
-from alignak.action import ACT_STATUS_QUEUED
+from alignak.action import ACT_STATUS_QUEUED, RESULTS_FORMAT_SERIALIZED, RESULTS_FORMAT_COMPACT
 from alignak.message import Message
 from alignak.worker import Worker
+from alignak.misc.results_ring import ResultsRing
 from alignak.daemon import Daemon
 from alignak.stats import statsmgr
 from alignak.check import Check  # pylint: disable=W0611
@@ -172,11 +173,14 @@ class BaseSatellite(Daemon):
         self.external_commands = []
         return res
 
-    def get_results_from_passive(self, scheduler_instance_id):
+    def get_results_from_passive(self, scheduler_instance_id,
+                                 results_format=RESULTS_FORMAT_SERIALIZED):
         """Get executed actions results from a passive satellite for a specific scheduler
 
         :param scheduler_instance_id: scheduler id
         :type scheduler_instance_id: int
+        :param results_format: results format requested by the scheduler
+        :type results_format: str
         :return: Results list
         :rtype: list
         """
@@ -200,6 +204,8 @@ class BaseSatellite(Daemon):
         ret, scheduler_link.wait_homerun = scheduler_link.wait_homerun, {}
         logger.debug("Results: %s" % (list(ret.values())) if ret else "No results available")
 
+        if results_format == RESULTS_FORMAT_COMPACT:
+            return [action.get_result() for action in list(ret.values())]
         return list(ret.values())
 
     def clean_previous_run(self):
@@ -349,6 +355,20 @@ class BaseSatellite(Daemon):
                 for host_name in self.schedulers[link_uuid].managed_hosts_names:
                     self.hosts_schedulers[host_name] = link_uuid
 
+    def get_id(self, details=False):
+        """Get daemon identification information
+
+        The identity also advertises the actions results and broks formats understood
+        by the daemon
+
+        :return: A dict with the daemon identification information
+        :rtype: dict
+        """
+        res = super(BaseSatellite, self).get_id(details=details)
+        res['results_format'] = RESULTS_FORMAT_COMPACT
+        res['broks_format'] = BROKS_FORMAT_JSON
+        return res
+
     def get_events(self):
         """Get event list from satellite
 
@@ -399,6 +419,10 @@ class Satellite(BaseSatellite):  # pylint: disable=too-many-instance-attributes
             IntegerProp(default=256, fill_brok=[FULL_STATUS], to_send=True),
         'worker_polling_interval':
             IntegerProp(default=1, to_send=True),
+        'results_ring_slots':
+            IntegerProp(default=0),
+        'results_ring_arena_size':
+            IntegerProp(default=4194304),
         'poller_tags':
             ListProp(default=['None'], to_send=True),
         'reactionner_tags':
@@ -447,6 +471,9 @@ class Satellite(BaseSatellite):  # pylint: disable=too-many-instance-attributes
         self.pre_log.append(("INFO",
                              "Using minimum %d workers, maximum %d workers, %d processes/worker"
                              % (self.min_workers, self.max_workers, self.processes_by_worker)))
+        if self.results_ring_slots > 0:
+            self.pre_log.append(("INFO", "Workers results rings: %d results, %d bytes outputs"
+                                 % (self.results_ring_slots, self.results_ring_arena_size)))
 
         self.slave_q = None
 
@@ -501,6 +528,28 @@ class Satellite(BaseSatellite):  # pylint: disable=too-many-instance-attributes
             logger.error("KeyError Add home run action: %s / %s - %s",
                          scheduler_uuid, action.uuid, str(exp))
 
+    def _get_worker_results(self, worker):
+        """Get the actions results written by a worker in its results ring
+
+        The result properties are set on the action that was given to the worker
+        and the action is then managed as an action returned in the returns queue
+
+        :param worker: the worker
+        :type worker: alignak.worker.Worker
+        :return: None
+        """
+        for result in worker.get_ring_results():
+            for scheduler_link in list(self.schedulers.values()):
+                action = scheduler_link.actions.get(result['uuid'])
+                if action is not None:
+                    break
+            else:
+                logger.warning("Got a result for an unknown action: %s", result['uuid'])
+                continue
+            for prop, value in list(result.items()):
+                setattr(action, prop, value)
+            self.manage_action_return(action)
+
     def push_results(self):
         """Push the checks/actions results to our schedulers
 
@@ -534,7 +583,11 @@ class Satellite(BaseSatellite):  # pylint: disable=too-many-instance-attributes
             # scheduler level, which shouldn't be a problem given they are
             # indexed by their "action_id".
 
-            scheduler_link.push_results(list(results.values()), self.name)
+            # Only send the results in the compact format if the scheduler understands it
+            actions = list(results.values())
+            if scheduler_link.results_format == RESULTS_FORMAT_COMPACT:
+                actions = [action.get_result() for action in actions]
+            scheduler_link.push_results(actions, self.name)
             results.clear()
 
     def create_and_launch_worker(self, module_name='fork'):
@@ -571,9 +624,12 @@ class Satellite(BaseSatellite):  # pylint: disable=too-many-instance-attributes
         # We give to the Worker the instance name of the daemon (eg. poller-master)
         # and not the daemon type (poller)
         queue = Queue()
+        # Only our own workers write their results in a shared memory ring
+        results_ring = ResultsRing(self.results_ring_slots, self.results_ring_arena_size) \
+            if self.results_ring_slots > 0 and target is None else None
         worker = Worker(module_name, queue, self.returns_queue, self.processes_by_worker,
                         max_plugins_output_length=self.max_plugins_output_length,
-                        target=target, loaded_into=self.name)
+                        target=target, loaded_into=self.name, results_ring=results_ring)
         # worker.module_name = module_name
         # save this worker
         self.workers[worker.get_id()] = worker
@@ -688,6 +744,10 @@ class Satellite(BaseSatellite):  # pylint: disable=too-many-instance-attributes
             # Del the queue of the module queue
             del self.q_by_mod[worker.module_name][worker.get_id()]
 
+            # Get the results that the worker still had in its results ring, the actions
+            # which results are not read are assigned to another worker
+            self._get_worker_results(worker)
+
             for scheduler_uuid in self.schedulers:
                 sched = self.schedulers[scheduler_uuid]
                 for act in list(sched.actions.values()):
@@ -953,6 +1013,10 @@ class Satellite(BaseSatellite):  # pylint: disable=too-many-instance-attributes
         # and launch the new ones if needed
         self.adjust_worker_number_by_load()
 
+        # Get the results written by the workers in their results rings
+        for worker in list(self.workers.values()):
+            self._get_worker_results(worker)
+
         # Manage all messages we've got in the last timeout
         # for queue in self.return_messages:
         try:
@@ -68,13 +68,16 @@ The major part of monitoring "intelligence" is in this module.
 # pylint: disable=too-many-lines
 # pylint: disable=too-many-public-methods
 import time
+import copy
 from datetime import datetime
 import os
 import logging
 import tempfile
 import traceback
 import queue
-from collections import defaultdict
+import heapq
+import itertools
+from collections import defaultdict, deque, OrderedDict
 from six import string_types
 
 from alignak.objects.item import Item
@@ -87,7 +90,7 @@ from alignak.macroresolver import MacroResolver
 from alignak.action import (ACT_STATUS_SCHEDULED, ACT_STATUS_POLLED,
                             ACT_STATUS_TIMEOUT, ACT_STATUS_ZOMBIE,
                             ACT_STATUS_WAIT_CONSUME, ACT_STATUS_WAIT_DEPEND,
-                            ACT_STATUS_WAITING_ME)
+                            ACT_STATUS_WAITING_ME, get_results_from_json)
 from alignak.external_command import ExternalCommand
 from alignak.check import Check
 from alignak.notification import Notification
@@ -97,7 +100,6 @@ from alignak.downtime import Downtime
 from alignak.comment import Comment
 from alignak.util import average_percentile
 from alignak.stats import statsmgr
-from alignak.misc.serialization import unserialize
 from alignak.acknowledge import Acknowledge
 from alignak.log import make_monitoring_log
 from alignak.property import FULL_STATUS
@@ -109,6 +111,525 @@ MULTIPLIER_MAX_ACTIONS = 5
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 
+# Ready queues of the actions that are not launched by a satellite
+ACTIONS_QUEUE_INTERNAL = u'internal'
+ACTIONS_QUEUE_MASTER = u'master'
+
+# The heaps are compacted when they hold more than twice as many entries as up-to-date
+# ones, and at least this count of entries
+HEAP_COMPACTION_MIN_SIZE = 64
+
+
+def compact_heap(heap, is_up_to_date):
+    """Remove the entries which are not up-to-date anymore from a heap
+
+    The last element of a heap entry is the queued object, only one entry is kept
+    for each object
+
+    :param heap: heap to compact, modified in place
+    :type heap: list
+    :param is_up_to_date: function called with a heap entry, returns True if the entry
+                          must be kept
+    :type is_up_to_date: function
+    :return: None
+    """
+    kept = set()
+    entries = []
+    for entry in heap:
+        uuid = entry[-1].uuid
+        if uuid in kept or not is_up_to_date(entry):
+            continue
+        kept.add(uuid)
+        entries.append(entry)
+    heap[:] = entries
+    heapq.heapify(heap)
+
+
+class ActionsRegistry(dict):
+    """A dictionary of the scheduler checks or actions indexed by their uuid
+
+    The registry is notified by the actions it contains when their status or their
+    launch time change. It maintains:
+
+    * ready queues: for each (tag, module type) couple, a heap of the scheduled actions
+      ordered by their launch time. Getting the actions that are launchable only pops the
+      heap top instead of iterating over all the actions.
+    * the actions indexed by their status, so that a recurrent work only iterates over
+      the actions in the status it is interested in (zombies, waiting to be consumed...)
+    * the actions in the scheduler uuid registry, shared with the other objects
+    * the in-flight actions (launched by a satellite) for each satellite, and a heap of
+      the in-flight actions ordered by the time they become orphans. Detecting the orphaned
+      actions only pops the heap top.
+    * for each satellite, a heap of its in-flight actions ordered by their launch time.
+      Getting the oldest in-flight action only drops the stale heap tops.
+
+    The heap entries are not removed when an action changes: they are checked when they
+    are popped and dropped if they are not up-to-date anymore. The heaps are compacted
+    when the stale entries outnumber the up-to-date ones.
+    """
+
+    def __init__(self, tag_property, uuids=None, get_time_to_orphanage=None):
+        """The tag property is the action property used to build the ready queues key,
+        poller_tag for the checks and reactionner_tag for the actions
+
+        :param tag_property: action property name of the satellite tag
+        :type tag_property: str
+        :param uuids: uuid registry (uuid -> object) the actions are added to
+        :type uuids: dict
+        :param get_time_to_orphanage: function to get the time to orphanage of an action,
+                                      the orphaned actions are not tracked if None
+        :type get_time_to_orphanage: function
+        """
+        super(ActionsRegistry, self).__init__()
+        self.tag_property = tag_property
+        self.uuids = uuids if uuids is not None else {}
+        self.get_time_to_orphanage = get_time_to_orphanage
+        self.ready_queues = {}
+        self._counter = itertools.count()
+        # Ordered dictionaries (uuid -> action) of the actions for each status
+        self.by_status = defaultdict(OrderedDict)
+        # Ordered dictionaries (uuid -> action) of the in-flight actions for each satellite
+        self.in_flight = defaultdict(OrderedDict)
+        # Heaps of the in-flight actions ordered by their launch time for each satellite
+        self.in_flight_queues = defaultdict(list)
+        self.orphans_queue = []
+
+    def __setitem__(self, uuid, action):
+        if uuid in self:
+            self._forget(self[uuid])
+        super(ActionsRegistry, self).__setitem__(uuid, action)
+        self.uuids[uuid] = action
+        action._listener = self
+        self.by_status[action.status][uuid] = action
+        self.push(action)
+        if action.status == ACT_STATUS_POLLED:
+            self.take_off(action)
+
+    def __delitem__(self, uuid):
+        action = self[uuid]
+        super(ActionsRegistry, self).__delitem__(uuid)
+        self._forget(action)
+
+    def pop(self, uuid, *args):
+        action = super(ActionsRegistry, self).pop(uuid, *args)
+        if getattr(action, '_listener', None) is self:
+            self._forget(action)
+        return action
+
+    def clear(self):
+        for action in self.values():
+            action._listener = None
+            self.uuids.pop(action.uuid, None)
+        super(ActionsRegistry, self).clear()
+        self.ready_queues.clear()
+        self.by_status.clear()
+        self.in_flight.clear()
+        self.in_flight_queues.clear()
+        del self.orphans_queue[:]
+
+    def _forget(self, action):
+        """Detach an action removed from the registry
+
+        :param action: removed action
+        :type action: alignak.action.ActionBase
+        :return: None
+        """
+        action._listener = None
+        self.by_status[action.status].pop(action.uuid, None)
+        self.uuids.pop(action.uuid, None)
+        if action.status == ACT_STATUS_POLLED:
+            self.in_flight[action.my_worker].pop(action.uuid, None)
+
+    def get_by_status(self, status):
+        """Get the actions that have the provided status
+
+        The actions are returned in the order they got this status
+
+        :param status: searched status
+        :type status: str
+        :return: list of the actions
+        :rtype: list
+        """
+        if status not in self.by_status:
+            return []
+        return list(self.by_status[status].values())
+
+    def count_by_status(self, status):
+        """Get the number of actions that have the provided status
+
+        :param status: searched status
+        :type status: str
+        :return: actions count
+        :rtype: int
+        """
+        if status not in self.by_status:
+            return 0
+        return len(self.by_status[status])
+
+    def get_queue_key(self, action):
+        """Get the ready queue key of an action
+
+        Internal checks and master notifications are not launched by a satellite, they
+        have their own ready queue
+
+        :param action: action to get the key for
+        :type action: alignak.action.ActionBase
+        :return: ready queue key
+        :rtype: tuple | str
+        """
+        if action.internal:
+            return ACTIONS_QUEUE_INTERNAL
+        if action.is_a == u'notification' and not action.contact:
+            return ACTIONS_QUEUE_MASTER
+        return (getattr(action, self.tag_property), action.module_type)
+
+    def push(self, action):
+        """Push a scheduled action in its ready queue
+
+        :param action: action to push
+        :type action: alignak.action.ActionBase
+        :return: None
+        """
+        if action.status != ACT_STATUS_SCHEDULED or action.t_to_go is None:
+            return
+        heapq.heappush(self.ready_queues.setdefault(self.get_queue_key(action), []),
+                       (action.t_to_go, next(self._counter), action))
+
+        entries = sum([len(ready_queue) for ready_queue in self.ready_queues.values()])
+        if entries > max(HEAP_COMPACTION_MIN_SIZE,
+                         2 * self.count_by_status(ACT_STATUS_SCHEDULED)):
+            for ready_queue in self.ready_queues.values():
+                compact_heap(ready_queue, self._is_ready)
+
+    def _is_ready(self, entry):
+        """Check if a ready queue entry is up-to-date
+
+        :param entry: ready queue entry
+        :type entry: tuple
+        :return: True if the action is still scheduled at the entry launch time
+        :rtype: bool
+        """
+        t_to_go, _, action = entry
+        return self.get(action.uuid) is action and action.status == ACT_STATUS_SCHEDULED \
+            and action.t_to_go == t_to_go
+
+    def pop_launchable(self, keys, timestamp):
+        """Pop the scheduled actions that are launchable at timestamp from the ready queues
+
+        The caller is in charge of pushing back the popped actions that it keeps scheduled
+
+        :param keys: ready queues keys
+        :type keys: list
+        :param timestamp: time to compare with the actions launch time
+        :type timestamp: float
+        :return: launchable actions ordered by their launch time for each queue
+        :rtype: list
+        """
+        res = []
+        popped = set()
+        for key in keys:
+            ready_queue = self.ready_queues.get(key)
+            while ready_queue and ready_queue[0][0] <= timestamp:
+                entry = heapq.heappop(ready_queue)
+                action = entry[-1]
+                # Action removed, launched or re-scheduled since it got pushed
+                if action.uuid in popped or not self._is_ready(entry):
+                    continue
+                popped.add(action.uuid)
+                res.append(action)
+        return res
+
+    def status_changed(self, action, old_status):
+        """Called by an action when its status changed
+
+        :param action: changed action
+        :type action: alignak.action.ActionBase
+        :param old_status: previous status of the action
+        :type old_status: str
+        :return: None
+        """
+        self.by_status[old_status].pop(action.uuid, None)
+        self.by_status[action.status][action.uuid] = action
+        self.push(action)
+        if old_status == ACT_STATUS_POLLED:
+            self.in_flight[action.my_worker].pop(action.uuid, None)
+        if action.status == ACT_STATUS_POLLED:
+            self.take_off(action)
+
+    def take_off(self, action):
+        """Track an action launched by a satellite
+
+        The satellite (my_worker) must be set before the action status changes
+
+        :param action: launched action
+        :type action: alignak.action.ActionBase
+        :return: None
+        """
+        self.in_flight[action.my_worker][action.uuid] = action
+        in_flight_queue = self.in_flight_queues[action.my_worker]
+        heapq.heappush(in_flight_queue,
+                       (action.t_to_go, next(self._counter), action.my_worker, action))
+        if len(in_flight_queue) > max(HEAP_COMPACTION_MIN_SIZE,
+                                      2 * len(self.in_flight[action.my_worker])):
+            compact_heap(in_flight_queue, self._is_taken_off)
+
+        if self.get_time_to_orphanage is None:
+            return
+        time_to_orphanage = self.get_time_to_orphanage(action)
+        if not time_to_orphanage:
+            return
+        heapq.heappush(self.orphans_queue, (action.t_to_go + time_to_orphanage,
+                                            next(self._counter), action.t_to_go, action))
+
+        if len(self.orphans_queue) > max(HEAP_COMPACTION_MIN_SIZE,
+                                         2 * self.count_by_status(ACT_STATUS_POLLED)):
+            compact_heap(self.orphans_queue, self._is_in_flight)
+
+    def _is_in_flight(self, entry):
+        """Check if an orphans queue entry is up-to-date
+
+        :param entry: orphans queue entry
+        :type entry: tuple
+        :return: True if the action is still in-flight since the entry launch time
+        :rtype: bool
+        """
+        _, _, t_to_go, action = entry
+        return self.get(action.uuid) is action and action.status == ACT_STATUS_POLLED \
+            and action.t_to_go == t_to_go
+
+    def _is_taken_off(self, entry):
+        """Check if an in-flight queue entry is up-to-date
+
+        :param entry: in-flight queue entry
+        :type entry: tuple
+        :return: True if the action is still in-flight on the satellite since the entry
+                 launch time
+        :rtype: bool
+        """
+        t_to_go, _, worker, action = entry
+        return self.get(action.uuid) is action and action.status == ACT_STATUS_POLLED \
+            and action.my_worker == worker and action.t_to_go == t_to_go
+
+    def pop_orphans(self, timestamp):
+        """Pop the in-flight actions that are orphans at timestamp
+
+        :param timestamp: time to compare with the actions orphanage time
+        :type timestamp: float
+        :return: orphaned actions ordered by their orphanage time
+        :rtype: list
+        """
+        res = []
+        popped = set()
+        while self.orphans_queue and self.orphans_queue[0][0] <= timestamp:
+            entry = heapq.heappop(self.orphans_queue)
+            action = entry[-1]
+            # Action removed, came back or launched again since it got pushed
+            if action.uuid in popped or not self._is_in_flight(entry):
+                continue
+            popped.add(action.uuid)
+            res.append(action)
+        return res
+
+    def get_in_flight_stats(self, timestamp):
+        """Get the count of in-flight actions and the age of the oldest one for each satellite
+
+        The satellites that launched some actions before are still reported, with no
+        in-flight actions. The oldest in-flight action is the top of the satellite
+        in-flight queue once the stale entries are dropped.
+
+        :param timestamp: time to compute the age from
+        :type timestamp: float
+        :return: satellite name -> (in-flight count, oldest in-flight action age)
+        :rtype: dict
+        """
+        res = {}
+        for worker, actions in self.in_flight.items():
+            in_flight_queue = self.in_flight_queues[worker]
+            while in_flight_queue and not self._is_taken_off(in_flight_queue[0]):
+                heapq.heappop(in_flight_queue)
+            if not actions or not in_flight_queue:
+                res[worker] = (0, 0)
+                continue
+            res[worker] = (len(actions), max(0, timestamp - in_flight_queue[0][0]))
+        return res
+
+    def t_to_go_changed(self, action):
+        """Called by an action when its launch time changed
+
+        :param action: changed action
+        :type action: alignak.action.ActionBase
+        :return: None
+        """
+        self.push(action)
+        if action.status == ACT_STATUS_POLLED:
+            self.take_off(action)
+
+
+class DeadlinesHeap(object):
+    """A heap of the scheduler hosts and services ordered by their next deadline
+
+    The deadline of an item is computed by the function provided to the heap, eg. the
+    next time one of its downtimes starts or ends. The items notify the heap when their
+    deadline may have changed (see SchedulingItem.deadlines_changed), thus a recurrent work
+    only pops the items that have something to do instead of iterating over all the items.
+
+    As for the actions ready queues, the heap entries are not removed when the deadline of
+    an item changes: they are checked when they are popped and dropped if they are not
+    up-to-date anymore, and the heap is compacted when they outnumber the up-to-date ones.
+    """
+
+    def __init__(self, get_deadline):
+        """The deadline function is called with an item and returns None if the item
+        has no deadline
+
+        :param get_deadline: function to get the deadline of an item
+        :type get_deadline: function
+        """
+        self.get_deadline = get_deadline
+        self.heap = []
+        self._counter = itertools.count()
+        # Item uuid -> deadline of its up-to-date heap entry
+        self.deadlines = {}
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def push(self, item):
+        """Push an item with its current deadline
+
+        :param item: item to push
+        :type item: alignak.objects.schedulingitem.SchedulingItem
+        :return: None
+        """
+        deadline = self.get_deadline(item)
+        if deadline is None:
+            self.deadlines.pop(item.uuid, None)
+            return
+        if self.deadlines.get(item.uuid) == deadline:
+            return
+        self.deadlines[item.uuid] = deadline
+        heapq.heappush(self.heap, (deadline, next(self._counter), item))
+
+        if len(self.heap) > max(HEAP_COMPACTION_MIN_SIZE, 2 * len(self.deadlines)):
+            compact_heap(self.heap, self._is_up_to_date)
+
+    def _is_up_to_date(self, entry):
+        """Check if a heap entry is up-to-date
+
+        :param entry: heap entry
+        :type entry: tuple
+        :return: True if the entry deadline is the current deadline of its item
+        :rtype: bool
+        """
+        deadline, _, item = entry
+        return self.deadlines.get(item.uuid) == deadline
+
+    def pop_due(self, timestamp):
+        """Pop the items which deadline is before timestamp
+
+        The caller is in charge of pushing back the popped items once it managed them
+
+        :param timestamp: time to compare with the items deadline
+        :type timestamp: float
+        :return: due items ordered by their deadline
+        :rtype: list
+        """
+        res = []
+        while self.heap and self.heap[0][0] <= timestamp:
+            entry = heapq.heappop(self.heap)
+            item = entry[-1]
+            # Deadline changed since the item got pushed
+            if not self._is_up_to_date(entry):
+                continue
+            del self.deadlines[item.uuid]
+            res.append(item)
+        return res
+
+
+class PendingList(list):
+    """A list of the actions or broks waiting in an item to be collected by the scheduler
+
+    The list registers its item in the scheduler dirty items when something is added to it,
+    thus the scheduler only visits the items that got new actions or broks.
+    """
+    __slots__ = ('item', 'dirty_items')
+
+    def __init__(self, item, dirty_items, iterable=()):
+        super(PendingList, self).__init__(iterable)
+        self.item = item
+        self.dirty_items = dirty_items
+        if self:
+            dirty_items.add(item)
+
+    def __reduce__(self):
+        # Copies and pickles are simple lists, the dirty items only make sense here
+        return list, (list(self),)
+
+    def append(self, value):
+        super(PendingList, self).append(value)
+        self.dirty_items.add(self.item)
+
+    def extend(self, iterable):
+        super(PendingList, self).extend(iterable)
+        if self:
+            self.dirty_items.add(self.item)
+
+    def insert(self, index, value):
+        super(PendingList, self).insert(index, value)
+        self.dirty_items.add(self.item)
+
+    def __iadd__(self, iterable):
+        self.extend(iterable)
+        return self
+
+
+class DirtyItems(object):
+    """The items which got new actions or broks since the last collection
+
+    The items are registered by their PendingList (see the track function).
+    """
+
+    def __init__(self, name):
+        """The name is the attribute of the items holding their pending actions or broks
+
+        :param name: item attribute name
+        :type name: str
+        """
+        self.name = name
+        # Item uuid -> item
+        self.items = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def track(self, item):
+        """Replace the item pending list with a list that registers the item when it changes
+
+        :param item: item to track
+        :type item: alignak.objects.item.Item
+        :return: None
+        """
+        setattr(item, self.name, PendingList(item, self, getattr(item, self.name, [])))
+
+    def add(self, item):
+        """Register an item
+
+        :param item: item which got something new
+        :type item: alignak.objects.item.Item
+        :return: None
+        """
+        self.items[item.uuid] = item
+
+    def pop_all(self):
+        """Get the registered items and forget about them
+
+        :return: the registered items
+        :rtype: list
+        """
+        items = list(self.items.values())
+        self.items.clear()
+        return items
+
 
 class Scheduler(object):  # pylint: disable=too-many-instance-attributes
     """Scheduler class. Mostly handle scheduling items (host service) to schedule checks
@@ -159,7 +680,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
             10: ('update_retention',
                  self.update_retention, 3600),
             11: ('check_orphaned',
-                 self.check_orphaned, 60),
+                 self.check_orphaned, 1),
             12: ('update_program_status',
                  self.update_program_status, 10),
             13: ('check_for_system_time_change',
@@ -209,6 +730,10 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         self.nb_broks_dropped = 0
         self.nb_actions_dropped = 0
 
+        # Objects found by their uuid, and not found in the uuid registry
+        self.nb_uuid_lookups = 0
+        self.nb_uuid_lookups_missed = 0
+
         self.stats = {
             'latency': {
                 'avg': 0.0,
@@ -225,9 +750,29 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         # And a dummy push flavor
         self.push_flavor = 0
 
+        # All our objects indexed by their uuid: hosts, services, groups, contacts,
+        # checks and actions
+        self.uuid_registry = {}
+
         # Our queues
-        self.checks = {}
-        self.actions = {}
+        self.checks = ActionsRegistry('poller_tag', self.uuid_registry,
+                                      self.get_action_time_to_orphanage)
+        self.actions = ActionsRegistry('reactionner_tag', self.uuid_registry,
+                                       self.get_action_time_to_orphanage)
+
+        # Our hosts and services with downtimes, maintenance periods and acknowledgements
+        # ordered by their next deadline
+        self.downtimes_deadlines = DeadlinesHeap(self.get_downtimes_deadline)
+        self.acknowledgements_deadlines = DeadlinesHeap(self.get_acknowledgement_deadline)
+        # and our passively checked hosts and services ordered by their freshness expiry
+        self.hosts_freshness_deadlines = DeadlinesHeap(self.get_freshness_deadline)
+        self.services_freshness_deadlines = DeadlinesHeap(self.get_freshness_deadline)
+        # and our hosts and services ordered by their next business impact modulation change
+        self.business_impact_deadlines = DeadlinesHeap(self.get_business_impact_deadline)
+
+        # Our hosts, services and contacts which got new actions or broks
+        self.items_actions = DirtyItems('actions')
+        self.items_broks = DirtyItems('broks')
 
         # self.program_start = int(time.time())
         self.program_start = self.my_daemon.program_start
@@ -343,6 +888,42 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         for item in self.all_my_hosts_and_services():
             item.instance_id = self.instance_id
 
+        # Index our objects by their uuid, the checks and actions are indexed by their registry
+        self.uuid_registry.clear()
+        self.uuid_registry.update(self.checks)
+        self.uuid_registry.update(self.actions)
+        for items in [self.hosts, self.services, self.hostgroups, self.servicegroups,
+                      self.contacts, self.contactgroups]:
+            for item in items:
+                self.uuid_registry[item.uuid] = item
+
+        # Index our monitored hosts/services deadlines
+        self.downtimes_deadlines = DeadlinesHeap(self.get_downtimes_deadline)
+        self.acknowledgements_deadlines = DeadlinesHeap(self.get_acknowledgement_deadline)
+        self.hosts_freshness_deadlines = DeadlinesHeap(self.get_freshness_deadline)
+        self.services_freshness_deadlines = DeadlinesHeap(self.get_freshness_deadline)
+        self.business_impact_deadlines = DeadlinesHeap(self.get_business_impact_deadline)
+        for item in self.all_my_hosts_and_services():
+            freshness_deadlines = self.services_freshness_deadlines
+            if item.my_type == 'host':
+                freshness_deadlines = self.hosts_freshness_deadlines
+            item._deadlines = {
+                'downtimes': self.downtimes_deadlines,
+                'acknowledgements': self.acknowledgements_deadlines,
+                'freshness': freshness_deadlines,
+                'business_impact': self.business_impact_deadlines
+            }
+            item.deadlines_changed()
+
+        # Track our monitored hosts/services and contacts new actions and broks
+        self.items_actions = DirtyItems('actions')
+        self.items_broks = DirtyItems('broks')
+        for item in self.all_my_hosts_and_services():
+            self.items_actions.track(item)
+            self.items_broks.track(item)
+        for contact in self.contacts:
+            self.items_broks.track(contact)
+
     def update_recurrent_works_tick(self, conf):
         """Modify the tick value for the scheduler recurrent work
 
@@ -597,7 +1178,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         """
         if elt is None:
             return
-        logger.debug("Adding: %s / %s", elt.my_type, elt.__dict__)
+        logger.debug("Adding: %s / %s", elt.my_type, elt)
         fun = self.__add_actions.get(elt.__class__, None)
         if fun:
             fun(self, elt)
@@ -646,10 +1227,10 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         # We want id of lower than max_id - 2*max_checks
         self.nb_checks_dropped = 0
         if max_checks and len(self.checks) > max_checks:
-            # keys does not ensure sorted keys. Max is slow but we have no other way.
-            to_del_checks = [c for c in list(self.checks.values())]
-            to_del_checks.sort(key=lambda x: x.creation_time)
-            to_del_checks = to_del_checks[:-max_checks]
+            # Only get the oldest checks, no need to sort all the checks
+            to_del_checks = heapq.nsmallest(len(self.checks) - max_checks,
+                                            list(self.checks.values()),
+                                            key=lambda x: x.creation_time)
             self.nb_checks_dropped = len(to_del_checks)
             if to_del_checks:
                 logger.warning("I have to drop some checks (%d)..., sorry :(",
@@ -676,31 +1257,74 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
                 logger.warning("I have to drop some broks (%d > %d) for the broker %s "
                                "..., sorry :(", len(broker_link.broks), max_broks, broker_link)
 
-                kept_broks = sorted(broker_link.broks, key=lambda x: x.creation_time)
-                # Delete the oldest broks to keep the max_broks most recent...
-                # todo: is it a good choice !
-                broker_link.broks = kept_broks[0:max_broks]
+                broker_link.broks, dropped = self.shed_broks(broker_link.broks, max_broks)
+                for brok_type, count in dropped.items():
+                    statsmgr.counter('broks.dropped.%s' % brok_type, count)
+                    self.nb_broks_dropped += count
 
         self.nb_actions_dropped = 0
         if max_actions and len(self.actions) > max_actions:
             logger.warning("I have to del some actions (currently: %d, max: %d)..., sorry :(",
                            len(self.actions), max_actions)
-            to_del_actions = [c for c in list(self.actions.values())]
-            to_del_actions.sort(key=lambda x: x.creation_time)
-            to_del_actions = to_del_actions[:-max_actions]
+            # Only get the oldest actions, no need to sort all the actions
+            to_del_actions = heapq.nsmallest(len(self.actions) - max_actions,
+                                             list(self.actions.values()),
+                                             key=lambda x: x.creation_time)
             self.nb_actions_dropped = len(to_del_actions)
             for act in to_del_actions:
                 if act.is_a == 'notification':
                     self.find_item_by_id(act.ref).remove_in_progress_notification(act)
                 del self.actions[act.uuid]
 
+    def shed_broks(self, broks, max_broks):
+        """Drop broks from a broker broks list to keep at most max_broks broks
+
+        The broks are appended to the list in their creation order, so the oldest broks are
+        dropped first without sorting the list:
+
+        * first the low value broks (broks_shedding_types configuration parameter),
+        * then any brok, except the broks which type must never be dropped
+          (broks_kept_types configuration parameter, default is the monitoring logs)
+
+        :param broks: broker broks list, oldest first
+        :type broks: list
+        :param max_broks: maximum number of broks to keep
+        :type max_broks: int
+        :return: kept broks and count of the dropped broks per type
+        :rtype: tuple(list, dict)
+        """
+        shedding_types = set(getattr(self.pushed_conf, 'broks_shedding_types', []))
+        kept_types = set(getattr(self.pushed_conf, 'broks_kept_types', [u'monitoring_log']))
+
+        dropped = defaultdict(int)
+        excess = len(broks) - max_broks
+        for droppable_types in (shedding_types, None):
+            if excess <= 0:
+                break
+            kept_broks = []
+            for brok in broks:
+                if excess > 0 and brok.type not in kept_types and \
+                        (droppable_types is None or brok.type in droppable_types):
+                    dropped[brok.type] += 1
+                    excess -= 1
+                else:
+                    kept_broks.append(brok)
+            broks = kept_broks
+
+        return broks, dropped
+
     def clean_caches(self):
-        """Clean timperiods caches
+        """Clean timperiods caches and send the caches hits and misses counters
 
         :return: None
         """
+        hits = misses = 0
         for timeperiod in self.timeperiods:
-            timeperiod.clean_cache()
+            tp_hits, tp_misses = timeperiod.clean_cache()
+            hits += tp_hits
+            misses += tp_misses
+        statsmgr.counter('timeperiods.cache.hits', hits)
+        statsmgr.counter('timeperiods.cache.misses', misses)
 
     def get_and_register_status_brok(self, item):
         """Get a update status brok for item and add it
@@ -720,43 +1344,106 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         """
         self.add(item.get_check_result_brok())
 
+    def get_acknowledgement_deadline(self, item):  # pylint: disable=no-self-use
+        """Get the time when the acknowledgement of an item expires
+
+        :param item: host or service
+        :type item: alignak.objects.schedulingitem.SchedulingItem
+        :return: None if the item acknowledgement does not expire
+        :rtype: None | int
+        """
+        if item.acknowledgement and item.acknowledgement.end_time:
+            return item.acknowledgement.end_time
+        return None
+
     def check_for_expire_acknowledge(self):
-        """Iter over host and service and check if any acknowledgement has expired
+        """Check if any acknowledgement has expired for the host and services
+        which acknowledgement end time is passed
 
         :return: None
         """
-        for elt in self.all_my_hosts_and_services():
+        for elt in self.acknowledgements_deadlines.pop_due(time.time()):
             elt.check_for_expire_acknowledge()
+            self.acknowledgements_deadlines.push(elt)
+
+    def get_business_impact_deadline(self, item):
+        """Get the next time when one of the business impact modulations of an item
+        starts or ends
+
+        :param item: host or service
+        :type item: alignak.objects.schedulingitem.SchedulingItem
+        :return: None if the item business impact is not modulated
+        :rtype: None | int
+        """
+        if not item.business_impact_modulations:
+            return None
+        # The modulations were never applied
+        if item.my_own_business_impact == -1:
+            return 0
+
+        now = time.time()
+        deadlines = []
+        for bi_modulation_id in item.business_impact_modulations:
+            bi_modulation = self.businessimpactmodulations[bi_modulation_id]
+            period = self.timeperiods[bi_modulation.modulation_period]
+            if period is None:
+                continue
+            if period.is_time_valid(now):
+                deadline = period.get_next_invalid_time_from_t(now)
+            else:
+                deadline = period.get_next_valid_time_from_t(now)
+            if deadline:
+                deadlines.append(deadline)
+        if not deadlines:
+            return None
+        return min(deadlines)
 
     def update_business_values(self):
-        """Iter over host and service and update business_impact
+        """Update the business_impact of the hosts and services which business impact
+        modulation starts or ends, and of the problems they are an impact of
+
+        The business impact of the other hosts and services only changes when they become or
+        are no more a problem or an impact, it is updated when it happens.
 
         :return: None
         """
-        for elt in self.all_my_hosts_and_services():
-            if not elt.is_problem:
-                was = elt.business_impact
-                elt.update_business_impact_value(self.hosts, self.services,
-                                                 self.timeperiods, self.businessimpactmodulations)
-                new = elt.business_impact
-                # Ok, the business_impact change, we can update the broks
-                if new != was:
-                    self.get_and_register_status_brok(elt)
+        items = self.business_impact_deadlines.pop_due(time.time())
+        if not items:
+            return
+
+        problems = {}
+        for elt in items:
+            if elt.is_problem:
+                problems[elt.uuid] = elt
+                continue
+            was = elt.business_impact
+            elt.update_business_impact_value(self.hosts, self.services,
+                                             self.timeperiods, self.businessimpactmodulations)
+            new = elt.business_impact
+            # Ok, the business_impact change, we can update the broks
+            if new != was:
+                self.get_and_register_status_brok(elt)
+                # and the problems it is an impact of
+                for problem_id in elt.source_problems:
+                    problem = self.find_item_by_id(problem_id)
+                    if problem is not None:
+                        problems[problem.uuid] = problem
 
         # When all impacts and classic elements are updated,
         # we can update problems (their value depend on impacts, so
         # they must be done after)
-        for elt in self.all_my_hosts_and_services():
-            # We first update impacts and classic elements
-            if elt.is_problem:
-                was = elt.business_impact
-                elt.update_business_impact_value(self.hosts, self.services,
-                                                 self.timeperiods, self.businessimpactmodulations)
-                new = elt.business_impact
-                # Maybe one of the impacts change it's business_impact to a high value
-                # and so ask for the problem to raise too
-                if new != was:
-                    self.get_and_register_status_brok(elt)
+        for elt in problems.values():
+            was = elt.business_impact
+            elt.update_business_impact_value(self.hosts, self.services,
+                                             self.timeperiods, self.businessimpactmodulations)
+            new = elt.business_impact
+            # Maybe one of the impacts change it's business_impact to a high value
+            # and so ask for the problem to raise too
+            if new != was:
+                self.get_and_register_status_brok(elt)
+
+        for elt in items:
+            self.business_impact_deadlines.push(elt)
 
     def scatter_master_notifications(self):
         """Generate children notifications from a master notification
@@ -773,9 +1460,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         """
         now = time.time()
         # We only want the master scheduled notifications that are immediately launchable
-        notifications = [a for a in self.actions.values()
-                         if a.is_a == u'notification' and a.status == ACT_STATUS_SCHEDULED
-                         and not a.contact and a.is_launchable(now)]
+        notifications = self.actions.pop_launchable([ACTIONS_QUEUE_MASTER], now)
         if notifications:
             logger.debug("Scatter master notification: %d notifications",
                          len(notifications))
@@ -842,6 +1527,9 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
                 # We don't repeat recover/downtime/flap/etc...
                 item.remove_in_progress_notification(notification)
 
+            # A still scheduled master notification must stay in its ready queue
+            self.actions.push(notification)
+
     def get_to_run_checks(self, do_checks=False, do_actions=False,
                           poller_tags=None, reactionner_tags=None,
                           worker_name='none', module_types=None):
@@ -883,50 +1571,31 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
             if self.checks:
                 logger.debug("I have %d prepared checks", len(self.checks))
 
-            for check in list(self.checks.values()):
-                logger.debug("Check: %s (%s / %s)", check.uuid, check.poller_tag, check.module_type)
-
-                if check.internal:
-                    # Do not care about Alignak internally executed checks
-                    continue
-
-                #  If the command is untagged, and the poller too, or if both are tagged
-                #  with same name, go for it
-                # if do_check, call for poller, and so poller_tags by default is ['None']
-                # by default poller_tag is 'None' and poller_tags is ['None']
-                # and same for module_type, the default is the 'fork' type
-                if check.poller_tag not in poller_tags:
-                    logger.debug(" -> poller tag do not match")
-                    continue
-                if check.module_type not in module_types:
-                    logger.debug(" -> module type do not match")
-                    continue
-
-                logger.debug(" -> : %s %s (%s)",
-                             'worker' if not check.internal else 'internal',
-                             check.status,
-                             'now' if check.is_launchable(now) else 'not yet')
-                if check._is_orphan and check.status == ACT_STATUS_SCHEDULED \
-                        and os.getenv('ALIGNAK_LOG_CHECKS', None):
+            #  If the command is untagged, and the poller too, or if both are tagged
+            #  with same name, go for it
+            # if do_check, call for poller, and so poller_tags by default is ['None']
+            # by default poller_tag is 'None' and poller_tags is ['None']
+            # and same for module_type, the default is the 'fork' type
+            # Internally executed checks are not in those ready queues
+            queues = [(tag, module_type) for tag in poller_tags for module_type in module_types]
+            for check in self.checks.pop_launchable(queues, now):
+                if check._is_orphan and os.getenv('ALIGNAK_LOG_CHECKS', None):
                     logger.info("--ALC-- orphan check: %s -> : %s %s (%s)",
-                                check, 'worker' if not check.internal else 'internal',
-                                check.status, 'now' if check.is_launchable(now) else 'not yet')
+                                check, 'worker', check.status, 'now')
 
-                # must be ok to launch, and not an internal one (business rules based)
-                if check.status == ACT_STATUS_SCHEDULED and check.is_launchable(now):
-                    logger.debug("Check to run: %s", check)
-                    check.status = ACT_STATUS_POLLED
-                    check.my_worker = worker_name
-                    res.append(check)
+                logger.debug("Check to run: %s", check)
+                check.my_worker = worker_name
+                check.status = ACT_STATUS_POLLED
+                res.append(check)
 
-                    # Stats
-                    self.nb_checks_launched += 1
+                # Stats
+                self.nb_checks_launched += 1
 
-                    if 'ALIGNAK_LOG_ACTIONS' in os.environ:
-                        if os.environ['ALIGNAK_LOG_ACTIONS'] == 'WARNING':
-                            logger.warning("Check to run: %s", check)
-                        else:
-                            logger.info("Check to run: %s", check)
+                if 'ALIGNAK_LOG_ACTIONS' in os.environ:
+                    if os.environ['ALIGNAK_LOG_ACTIONS'] == 'WARNING':
+                        logger.warning("Check to run: %s", check)
+                    else:
+                        logger.info("Check to run: %s", check)
 
             if res:
                 logger.debug("-> %d checks to start now", len(res))
@@ -938,52 +1607,30 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
             if self.actions:
                 logger.debug("I have %d prepared actions", len(self.actions))
 
-            for action in list(self.actions.values()):
-                logger.debug("Action: %s (%s / %s)",
-                             action.uuid, action.reactionner_tag, action.module_type)
-
-                if action.internal:
-                    # Do not care about Alignak internally executed checks
-                    continue
-
-                is_master = (action.is_a == 'notification' and not action.contact)
-                if is_master:
-                    continue
-
-                # if do_action, call the reactionner,
-                # and so reactionner_tags by default is ['None']
-                # by default reactionner_tag is 'None' and reactionner_tags is ['None'] too
-                # So if not the good one, loop for next :)
-                if action.reactionner_tag not in reactionner_tags:
-                    logger.debug(" -> reactionner tag do not match")
-                    continue
-
-                # same for module_type
-                if action.module_type not in module_types:
-                    logger.debug(" -> module type do not match")
-                    continue
-
-                # And now look if we can launch or not :)
-                logger.debug(" -> : worker %s (%s)",
-                             action.status, 'now' if action.is_launchable(now) else 'not yet')
-                if action._is_orphan and action.status == ACT_STATUS_SCHEDULED and \
-                        os.getenv('ALIGNAK_LOG_CHECKS', None):
+            # if do_action, call the reactionner,
+            # and so reactionner_tags by default is ['None']
+            # by default reactionner_tag is 'None' and reactionner_tags is ['None'] too
+            # and same for module_type.
+            # Master notifications are not in those ready queues
+            queues = [(tag, module_type)
+                      for tag in reactionner_tags for module_type in module_types]
+            for action in self.actions.pop_launchable(queues, now):
+                if action._is_orphan and os.getenv('ALIGNAK_LOG_CHECKS', None):
                     logger.info("--ALC-- orphan action: %s", action)
 
-                if action.status == ACT_STATUS_SCHEDULED and action.is_launchable(now):
-                    # This is for child notifications and eventhandlers
-                    action.status = ACT_STATUS_POLLED
-                    action.my_worker = worker_name
-                    res.append(action)
+                # This is for child notifications and eventhandlers
+                action.my_worker = worker_name
+                action.status = ACT_STATUS_POLLED
+                res.append(action)
 
-                    # Stats
-                    self.nb_actions_launched += 1
+                # Stats
+                self.nb_actions_launched += 1
 
-                    if 'ALIGNAK_LOG_ACTIONS' in os.environ:
-                        if os.environ['ALIGNAK_LOG_ACTIONS'] == 'WARNING':
-                            logger.warning("Action to run: %s", action)
-                        else:
-                            logger.info("Action to run: %s", action)
+                if 'ALIGNAK_LOG_ACTIONS' in os.environ:
+                    if os.environ['ALIGNAK_LOG_ACTIONS'] == 'WARNING':
+                        logger.warning("Action to run: %s", action)
+                    else:
+                        logger.info("Action to run: %s", action)
 
             if res:
                 logger.debug("-> %d actions to start now", len(res))
@@ -992,6 +1639,31 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
 
         return res
 
+    def get_action_from_result(self, result):
+        """Get an action from a result received in the compact format
+
+        The result is applied to a copy of our own action, so the received result is
+        managed as if the whole action had been received.
+
+        :param result: result in the compact format (see ActionBase.get_result)
+        :type result: dict
+        :return: the action with its result or None if the action is not known
+        :rtype: alignak.action.Action | None
+        """
+        actions = self.checks if result.get('is_a') == 'check' else self.actions
+        try:
+            own_action = actions[result['uuid']]
+        except KeyError:
+            logger.warning('manage_results:: got a result for an unknown %s: %s',
+                           result.get('is_a'), result.get('uuid'))
+            return None
+
+        # The copy is not known by our actions registry
+        action = copy.copy(own_action)
+        for prop, value in result.items():
+            setattr(action, prop, value)
+        return action
+
     def manage_results(self, action):  # pylint: disable=too-many-branches,too-many-statements
         """Get result from pollers/reactionners (actives ones)
 
@@ -1000,6 +1672,12 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         :return: None
         """
         logger.debug('manage_results: %s ', action)
+        if isinstance(action, dict):
+            # A result in the compact format
+            action = self.get_action_from_result(action)
+            if action is None:
+                return
+
         if action.is_a == 'notification':
             try:
                 _ = self.actions[action.uuid]
@@ -1192,7 +1870,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
                     logger.debug("-> no passive results from %s", link.name)
                     continue
 
-                results = unserialize(results, no_load=True)
+                results = get_results_from_json(results)
                 if results:
                     logger.info("Received %d passive results from %s", len(results), link.name)
 
@@ -1210,15 +1888,8 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         if os.getenv('ALIGNAK_MANAGE_INTERNAL', '1') != '1':
             return
         now = time.time()
-        for chk in list(self.checks.values()):
-            if not chk.internal:
-                # Exclude checks that are not internal ones
-                continue
-
-            # Exclude checks that are not yet ready to launch
-            if not chk.is_launchable(now) or chk.status not in [ACT_STATUS_SCHEDULED]:
-                continue
-
+        # Only the internal checks that are ready to launch
+        for chk in self.checks.pop_launchable([ACTIONS_QUEUE_INTERNAL], now):
             item = self.find_item_by_id(chk.ref)
             # Only if active checks are enabled
             if not item or not item.active_checks_enabled:
@@ -1438,8 +2109,14 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         # todo: is it useful? We do not save/restore checks in the retention data...
         item.update_in_checking()
 
+        if item.acknowledgement is not None:
+            # Update the comment referenced object
+            item.acknowledgement['ref'] = item.uuid
+            item.acknowledgement = Acknowledge(item.acknowledgement)
+
         # And also add downtimes and comments
         # Downtimes are in a list..
+        item.downtimes = {}
         for downtime_uuid in data['downtimes']:
             downtime = data['downtimes'][downtime_uuid]
 
@@ -1464,11 +2141,6 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
             comment['ref'] = item.uuid
             item.add_comment(Comment(comment))
 
-        if item.acknowledgement is not None:
-            # Update the comment referenced object
-            item.acknowledgement['ref'] = item.uuid
-            item.acknowledgement = Acknowledge(item.acknowledgement)
-
         # Relink the notified_contacts as a set() of true contacts objects
         # if it was loaded from the retention, it's now a list of contacts
         # names
@@ -1482,6 +2154,9 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         item.notified_contacts = new_notified_contacts
         item.notified_contacts_ids = new_notified_contacts_ids
 
+        # Restored downtimes and acknowledgement
+        item.deadlines_changed()
+
     def fill_initial_broks(self, broker_name):
         # pylint: disable=too-many-branches
         """Create initial broks for a specific broker
@@ -1625,7 +2300,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         logger.debug("Program status brok %s data: %s", brok_type, data)
         return Brok({'type': brok_type, 'data': data})
 
-    def consume_results(self):  # pylint: disable=too-many-branches
+    def consume_results(self):
         """Handle results waiting in waiting_results list.
         Check ref will call consume result and update their status
 
@@ -1638,94 +2313,131 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
             self.manage_results(self.waiting_results.get())
 
         # Then we consume them
-        for chk in list(self.checks.values()):
+        for chk in self.checks.get_by_status(ACT_STATUS_WAIT_CONSUME):
+            # The status may have changed while consuming another check
             if chk.status == ACT_STATUS_WAIT_CONSUME:
                 logger.debug("Consuming: %s", chk)
-                item = self.find_item_by_id(chk.ref)
-
-                notification_period = None
-                if getattr(item, 'notification_period', None) is not None:
-                    notification_period = self.timeperiods[item.notification_period]
-
-                dep_checks = item.consume_result(chk, notification_period, self.hosts,
-                                                 self.services, self.timeperiods,
-                                                 self.macromodulations, self.checkmodulations,
-                                                 self.businessimpactmodulations,
-                                                 self.resultmodulations, self.checks,
-                                                 self.pushed_conf.log_active_checks and
-                                                 not chk.passive_check)
-
-                # # Raise the log only when the check got consumed!
-                # # Else the item information are not up-to-date :/
-                # if self.pushed_conf.log_active_checks and not chk.passive_check:
-                #     item.raise_check_result()
-                #
-                for check in dep_checks:
-                    logger.debug("-> raised a dependency check: %s", check)
-                    self.add(check)
-
-        # loop to resolve dependencies
-        have_resolved_checks = True
-        while have_resolved_checks:
-            have_resolved_checks = False
-            # All 'finished' checks (no more dep) raise checks they depend on
-            for chk in list(self.checks.values()):
-                if chk.status == ACT_STATUS_WAITING_ME:
-                    for dependent_checks in chk.depend_on_me:
-                        # Ok, now dependent will no more wait
-                        dependent_checks.depend_on.remove(chk.uuid)
-                        have_resolved_checks = True
-                    # REMOVE OLD DEP CHECK -> zombie
-                    chk.status = ACT_STATUS_ZOMBIE
-
-            # Now, inclmude dependent checks
-            for chk in list(self.checks.values()):
-                if chk.status == ACT_STATUS_WAIT_DEPEND and not chk.depend_on:
-                    item = self.find_item_by_id(chk.ref)
-                    notification_period = None
-                    if getattr(item, 'notification_period', None) is not None:
-                        notification_period = self.timeperiods[item.notification_period]
-                    dep_checks = item.consume_result(chk, notification_period, self.hosts,
-                                                     self.services, self.timeperiods,
-                                                     self.macromodulations, self.checkmodulations,
-                                                     self.businessimpactmodulations,
-                                                     self.resultmodulations, self.checks,
-                                                     self.pushed_conf.log_active_checks and
-                                                     not chk.passive_check)
-                    for check in dep_checks:
-                        self.add(check)
+                self.consume_check_result(chk)
+
+        # Resolve dependencies
+        # The dependent checks that do not wait for any other check are consumed
+        for chk in self.checks.get_by_status(ACT_STATUS_WAIT_DEPEND):
+            if chk.status == ACT_STATUS_WAIT_DEPEND and not chk.depend_on:
+                self.consume_check_result(chk)
+
+        # Then all 'finished' checks (no more dep) directly wake up the checks that depend
+        # on them. A dependent check that does not wait anymore is consumed and, if some
+        # other checks depend on it, it is appended to the finished checks
+        finished_checks = deque(self.checks.get_by_status(ACT_STATUS_WAITING_ME))
+        while finished_checks:
+            chk = finished_checks.popleft()
+            if chk.status != ACT_STATUS_WAITING_ME:
+                continue
+
+            for dependent_check in chk.depend_on_me:
+                # Ok, now dependent will no more wait
+                dependent_check.depend_on.remove(chk.uuid)
+            # REMOVE OLD DEP CHECK -> zombie
+            chk.status = ACT_STATUS_ZOMBIE
+
+            for dependent_check in chk.depend_on_me:
+                if dependent_check.status != ACT_STATUS_WAIT_DEPEND or dependent_check.depend_on:
+                    continue
+                if self.checks.get(dependent_check.uuid) is not dependent_check:
+                    continue
+                self.consume_check_result(dependent_check)
+                if dependent_check.status == ACT_STATUS_WAITING_ME:
+                    finished_checks.append(dependent_check)
+
+    def consume_check_result(self, chk):
+        """Make the check host/service consume the check result and add the
+        dependency checks that it may have raised
+
+        :param chk: check to consume
+        :type chk: alignak.check.Check
+        :return: None
+        """
+        item = self.find_item_by_id(chk.ref)
+
+        notification_period = None
+        if getattr(item, 'notification_period', None) is not None:
+            notification_period = self.timeperiods[item.notification_period]
+
+        dep_checks = item.consume_result(chk, notification_period, self.hosts,
+                                         self.services, self.timeperiods,
+                                         self.macromodulations, self.checkmodulations,
+                                         self.businessimpactmodulations,
+                                         self.resultmodulations, self.checks,
+                                         self.pushed_conf.log_active_checks and
+                                         not chk.passive_check)
+
+        # # Raise the log only when the check got consumed!
+        # # Else the item information are not up-to-date :/
+        # if self.pushed_conf.log_active_checks and not chk.passive_check:
+        #     item.raise_check_result()
+        #
+        for check in dep_checks:
+            logger.debug("-> raised a dependency check: %s", check)
+            self.add(check)
 
     def delete_zombie_checks(self):
         """Remove checks that have a zombie status (usually timeouts)
 
         :return: None
         """
-        id_to_del = []
-        for chk in list(self.checks.values()):
-            if chk.status == ACT_STATUS_ZOMBIE:
-                id_to_del.append(chk.uuid)
         # une petite tape dans le dos et tu t'en vas, merci...
         # *pat pat* GFTO, thks :)
-        for c_id in id_to_del:
-            del self.checks[c_id]  # ZANKUSEN!
+        for chk in self.checks.get_by_status(ACT_STATUS_ZOMBIE):
+            del self.checks[chk.uuid]  # ZANKUSEN!
 
     def delete_zombie_actions(self):
         """Remove actions that have a zombie status (usually timeouts)
 
         :return: None
         """
-        id_to_del = []
-        for act in list(self.actions.values()):
-            if act.status == ACT_STATUS_ZOMBIE:
-                id_to_del.append(act.uuid)
         # une petite tape dans le dos et tu t'en vas, merci...
         # *pat pat* GFTO, thks :)
-        for a_id in id_to_del:
-            del self.actions[a_id]  # ZANKUSEN!
+        for act in self.actions.get_by_status(ACT_STATUS_ZOMBIE):
+            del self.actions[act.uuid]  # ZANKUSEN!
+
+    def get_downtimes_deadline(self, item):
+        """Get the next time when the downtimes or the maintenance period of an item
+        must be managed:
+
+        * a downtime is to be deleted (now)
+        * a downtime ends or a fixed downtime starts
+        * the maintenance period starts or its downtime was deleted (now)
+
+        :param item: host or service
+        :type item: alignak.objects.schedulingitem.SchedulingItem
+        :return: None if nothing is to be done for the item
+        :rtype: None | float
+        """
+        now = time.time()
+        deadlines = []
+        if item.maintenance_period:
+            if not item.in_maintenance:
+                timeperiod = self.timeperiods[item.maintenance_period]
+                deadlines.append(timeperiod.get_next_valid_time_from_t(now))
+            elif item.in_maintenance not in item.downtimes:
+                deadlines.append(now)
+
+        for downtime in item.downtimes.values():
+            if downtime.can_be_deleted:
+                deadlines.append(now)
+                continue
+            deadlines.append(downtime.real_end_time)
+            if downtime.fixed and not downtime.is_in_effect:
+                deadlines.append(downtime.start_time)
+
+        deadlines = [deadline for deadline in deadlines if deadline is not None]
+        if not deadlines:
+            return None
+        return min(deadlines)
 
     def update_downtimes_and_comments(self):
         # pylint: disable=too-many-branches
-        """Iter over all hosts and services::
+        """Iter over the hosts and services which downtimes deadline is passed::
 
         TODO: add some unit tests for the maintenance period feature.
 
@@ -1736,9 +2448,10 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         """
         broks = []
         now = time.time()
+        items = self.downtimes_deadlines.pop_due(now)
 
         # Check maintenance periods
-        for elt in self.all_my_hosts_and_services():
+        for elt in items:
             if not elt.maintenance_period:
                 continue
 
@@ -1773,7 +2486,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
 
         # A loop where those downtimes are removed
         # which were marked for deletion (mostly by dt.exit())
-        for elt in self.all_my_hosts_and_services():
+        for elt in items:
             for downtime in list(elt.downtimes.values()):
                 if not downtime.can_be_deleted:
                     continue
@@ -1791,7 +2504,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
                 broks.append(elt.get_update_status_brok())
 
         # Check start and stop times
-        for elt in self.all_my_hosts_and_services():
+        for elt in items:
             for downtime in list(elt.downtimes.values()):
                 if downtime.real_end_time < now:
                     # this one has expired
@@ -1801,6 +2514,9 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
                     broks.extend(downtime.enter(self.timeperiods, self.hosts, self.services))
                     broks.append(self.find_item_by_id(downtime.ref).get_update_status_brok())
 
+        for elt in items:
+            self.downtimes_deadlines.push(elt)
+
         for brok in broks:
             self.add(brok)
 
@@ -1825,7 +2541,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
 
     def get_new_actions(self):
         """Call 'get_new_actions' hook point
-        Iter over all hosts and services to add new actions in internal lists
+        Iter over the hosts and services which got new actions to add them in internal lists
 
         :return: None
         """
@@ -1833,37 +2549,56 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         self.hook_point('get_new_actions')
         statsmgr.timer('hook.get-new-actions', time.time() - _t0)
         # ask for service and hosts their next check
-        for elt in self.all_my_hosts_and_services():
+        for elt in self.items_actions.pop_all():
             for action in elt.actions:
                 logger.debug("Got a new action for %s: %s", elt, action)
                 self.add(action)
             # We take all, we can clear it
-            elt.actions = []
+            del elt.actions[:]
 
     def get_new_broks(self):
-        """Iter over all hosts and services to add new broks in internal lists
+        """Iter over the hosts, services and contacts which got new broks to add them
+        in internal lists
 
         :return: None
         """
         # ask for service and hosts their broks waiting
-        # be eaten
-        for elt in self.all_my_hosts_and_services():
+        # be eaten, also fetch broks from contact (like contactdowntime)
+        for elt in self.items_broks.pop_all():
             for brok in elt.broks:
                 self.add(brok)
             # We got all, clear item broks list
-            elt.broks = []
+            del elt.broks[:]
 
-        # Also fetch broks from contact (like contactdowntime)
-        for contact in self.contacts:
-            for brok in contact.broks:
-                self.add(brok)
-            # We got all, clear contact broks list
-            contact.broks = []
+    def get_freshness_deadline(self, item):
+        """Get the time when the freshness of a passively checked item expires
+
+        The deadline is postponed to the next valid time of the item check period
+        because no freshness check is raised out of this period.
+
+        :param item: host or service
+        :type item: alignak.objects.schedulingitem.SchedulingItem
+        :return: None if the item freshness is not checked
+        :rtype: None | int
+        """
+        if not item.check_freshness or not item.freshness_threshold or \
+                not item.passive_checks_enabled or item.active_checks_enabled:
+            return None
+        # Never updated items start their freshness period on the next check and
+        # expired items get their output updated on each check
+        if item.freshness_expired or not item.last_state_update:
+            return 0
+
+        deadline = item.last_state_update + item.freshness_threshold + \
+            item.__class__.additional_freshness_latency
+        timeperiod = self.timeperiods[item.check_period] if self.timeperiods else None
+        if timeperiod is not None:
+            deadline = timeperiod.get_next_valid_time_from_t(deadline) or deadline
+        return deadline
 
     def check_freshness(self):
         """
-        Iter over all hosts and services to check freshness if check_freshness enabled and
-        passive_checks_enabled are set
+        Check freshness of the hosts and services which freshness deadline is passed
 
         For the host items, the list of hosts to check contains hosts that:
         - have freshness check enabled
@@ -1876,6 +2611,9 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         - are not yet freshness expired
         - are only passively checked
 
+        The items are popped from the freshness deadlines heaps (see get_freshness_deadline),
+        thus the items which freshness did not expire are not iterated.
+
         :return: None
         """
         # Get tick count
@@ -1885,6 +2623,7 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         now = int(_t0)
 
         items = []
+        popped = []
 
         # May be self.ticks is not set (unit tests context!)
         ticks = getattr(self, 'ticks', self.pushed_conf.host_freshness_check_interval)
@@ -1892,13 +2631,15 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
                 and ticks % self.pushed_conf.host_freshness_check_interval == 0:
             # Freshness check is configured for hosts - get the list of concerned hosts:
             # host check freshness is enabled and the host is only passively checked
-            hosts = [h for h in self.hosts if h.check_freshness and not h.freshness_expired and
+            due = self.hosts_freshness_deadlines.pop_due(now)
+            popped.append((self.hosts_freshness_deadlines, due))
+            hosts = [h for h in due if h.check_freshness and not h.freshness_expired and
                      h.passive_checks_enabled and not h.active_checks_enabled]
             statsmgr.gauge('freshness.hosts-count', len(hosts))
             items.extend(hosts)
             logger.debug("Freshness check is enabled for %d hosts", len(hosts))
 
-            hosts = [h for h in self.hosts if h.check_freshness and h.freshness_expired]
+            hosts = [h for h in due if h.check_freshness and h.freshness_expired]
             logger.debug("Freshness still expired for %d hosts", len(hosts))
             for h in hosts:
                 h.last_chk = now
@@ -1918,14 +2659,16 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
             # Freshness check is configured for services - get the list of concerned services:
             # service check freshness is enabled and the service is only passively checked and
             # the depending host is not freshness expired
-            services = [s for s in self.services if not self.hosts[s.host].freshness_expired and
+            due = self.services_freshness_deadlines.pop_due(now)
+            popped.append((self.services_freshness_deadlines, due))
+            services = [s for s in due if not self.hosts[s.host].freshness_expired and
                         s.check_freshness and not s.freshness_expired and
                         s.passive_checks_enabled and not s.active_checks_enabled]
             statsmgr.gauge('freshness.services-count', len(services))
             items.extend(services)
             logger.debug("Freshness check is enabled for %d services", len(services))
 
-            services = [s for s in self.services if not self.hosts[s.host].freshness_expired and
+            services = [s for s in due if not self.hosts[s.host].freshness_expired and
                         s.check_freshness and s.freshness_expired]
             logger.debug("Freshness still expired for %d services", len(services))
             for s in services:
@@ -1943,21 +2686,38 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
 
         if not items:
             logger.debug("No freshness enabled item.")
-            return
-
-        _t0 = time.time()
-        raised_checks = 0
-        for elt in items:
-            chk = elt.do_check_freshness(self.hosts, self.services, self.timeperiods,
-                                         self.macromodulations, self.checkmodulations,
-                                         self.checks, _t0)
-            if chk is not None:
-                self.add(chk)
-                self.waiting_results.put(chk)
-                raised_checks += 1
-        logger.info("Raised %d checks for freshness", raised_checks)
-        statsmgr.gauge('freshness.raised-checks', raised_checks)
-        statsmgr.timer('freshness.do-check', time.time() - _t0)
+        else:
+            _t0 = time.time()
+            raised_checks = 0
+            for elt in items:
+                chk = elt.do_check_freshness(self.hosts, self.services, self.timeperiods,
+                                             self.macromodulations, self.checkmodulations,
+                                             self.checks, _t0)
+                if chk is not None:
+                    self.add(chk)
+                    self.waiting_results.put(chk)
+                    raised_checks += 1
+            logger.info("Raised %d checks for freshness", raised_checks)
+            statsmgr.gauge('freshness.raised-checks', raised_checks)
+            statsmgr.timer('freshness.do-check', time.time() - _t0)
+
+        # Push back the popped items with their new deadline
+        for deadlines, due in popped:
+            for elt in due:
+                deadlines.push(elt)
+
+    def get_action_time_to_orphanage(self, action):
+        """Get the time to orphanage of a check or an action: the one of its host or service
+
+        :param action: check or action
+        :type action: alignak.action.ActionBase
+        :return: time to orphanage, 0 if orphans are not checked for
+        :rtype: int
+        """
+        item = self.find_item_by_id(action.ref)
+        if item is None or not hasattr(item, 'get_time_to_orphanage'):
+            return 0
+        return item.get_time_to_orphanage()
 
     def check_orphaned(self):
         """Check for orphaned checks/actions::
@@ -1966,36 +2726,38 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
 
         if so raise a warning log.
 
+        The in-flight checks and actions are ordered by the time they become orphans,
+        so only the orphaned ones are got.
+
+        Also send the count of in-flight checks and actions, and the age of the oldest one,
+        for each satellite.
+
         :return: None
         """
         orphans_count = {}
         now = int(time.time())
-        actions = list(self.checks.values()) + list(self.actions.values())
-        for chk in actions:
-            if chk.status not in [ACT_STATUS_POLLED]:
-                continue
-
-            time_to_orphanage = self.find_item_by_id(chk.ref).get_time_to_orphanage()
-            if not time_to_orphanage:
-                continue
-
-            if chk.t_to_go > now - time_to_orphanage:
-                continue
-
-            logger.info("Orphaned %s (%d s / %s / %s) check for: %s (%s)",
-                        chk.is_a, time_to_orphanage, chk.t_to_go, now,
-                        self.find_item_by_id(chk.ref).get_full_name(), chk)
-            chk._is_orphan = True
-            chk.status = ACT_STATUS_SCHEDULED
-            if chk.my_worker not in orphans_count:
-                orphans_count[chk.my_worker] = 0
-            orphans_count[chk.my_worker] += 1
+        for registry in (self.checks, self.actions):
+            for chk in registry.pop_orphans(now):
+                time_to_orphanage = self.get_action_time_to_orphanage(chk)
+                logger.info("Orphaned %s (%d s / %s / %s) check for: %s (%s)",
+                            chk.is_a, time_to_orphanage, chk.t_to_go, now,
+                            self.find_item_by_id(chk.ref).get_full_name(), chk)
+                chk._is_orphan = True
+                chk.status = ACT_STATUS_SCHEDULED
+                if chk.my_worker not in orphans_count:
+                    orphans_count[chk.my_worker] = 0
+                orphans_count[chk.my_worker] += 1
 
         for sta_name in orphans_count:
             logger.warning("%d actions never came back for the satellite '%s'. "
                            "I reenable them for polling.",
                            orphans_count[sta_name], sta_name)
 
+        for kind, registry in (('checks', self.checks), ('actions', self.actions)):
+            for sta_name, (count, age) in registry.get_in_flight_stats(now).items():
+                statsmgr.gauge('in-flight.%s.%s.count' % (sta_name, kind), count)
+                statsmgr.gauge('in-flight.%s.%s.oldest' % (sta_name, kind), age)
+
     def send_broks_to_modules(self):
         """Put broks into module queues
         Only broks without sent_to_externals to True are sent
@@ -2217,6 +2979,12 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
 
         res = defaultdict(int)
         res["total"] = len(checks)
+        if isinstance(checks, ActionsRegistry):
+            # The registry already knows the checks of each status
+            for status in checks.by_status:
+                res[status] = checks.count_by_status(status)
+            return res
+
         for chk in checks.values():
             res[chk.status] += 1
         return res
@@ -2229,6 +2997,14 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         :return:
         :rtype: alignak.objects.item.Item | None
         """
+        # Item id should be a uuid string indexed in our registry
+        try:
+            item = self.uuid_registry[object_id]
+            self.nb_uuid_lookups += 1
+            return item
+        except (KeyError, TypeError):
+            pass
+
         # Item id may be an item
         if isinstance(object_id, Item):
             return object_id
@@ -2238,6 +3014,8 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
             logger.debug("Find an item by id, object_id is not int nor string: %s", object_id)
             return object_id
 
+        # Objects that are not registered, eg. created after the configuration load
+        self.nb_uuid_lookups_missed += 1
         for items in [self.hosts, self.services, self.actions, self.checks, self.hostgroups,
                       self.servicegroups, self.contacts, self.contactgroups]:
             if object_id in items:
@@ -2353,6 +3131,11 @@ class Scheduler(object):  # pylint: disable=too-many-instance-attributes
         statsmgr.gauge('activity.notifications', self.nb_notifications)
         statsmgr.gauge('activity.event_handlers', self.nb_event_handlers)
 
+        # - objects lookups by uuid during this loop
+        statsmgr.gauge('loop.uuid_lookups', self.nb_uuid_lookups)
+        statsmgr.gauge('loop.uuid_lookups_missed', self.nb_uuid_lookups_missed)
+        self.nb_uuid_lookups = self.nb_uuid_lookups_missed = 0
+
         if self.my_daemon.need_dump_environment:
             _ts = time.time()
             logger.debug('I must dump my memory...')
@@ -410,8 +410,8 @@ def to_best_int_float(val):
     >>> to_best_int_float("20")
     20
     """
-    integer = int(float(val))
     flt = float(val)
+    integer = int(flt)
     # If the f is a .0 value,
     # best match is int
     if integer == flt:
@@ -62,6 +62,7 @@ from alignak.action import ACT_STATUS_QUEUED, ACT_STATUS_LAUNCHED, \
 from alignak.action import ActionError
 from alignak.message import Message
 from alignak.misc.common import setproctitle, SIGNALS_TO_NAMES_DICT
+from alignak.stats import statsmgr
 
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -86,7 +87,7 @@ class Worker(object):  # pylint: disable=too-many-instance-attributes
     # pylint: disable=too-many-arguments
     def __init__(self, module_name, actions_queue, returns_queue, processes_by_worker,
                  timeout=300, max_plugins_output_length=8192, target=None,
-                 loaded_into='unknown'):
+                 loaded_into='unknown', results_ring=None):
         """
 
         :param module_name:
@@ -100,6 +101,9 @@ class Worker(object):  # pylint: disable=too-many-instance-attributes
         :type max_plugins_output_length: int
         :param target:
         :param loaded_into:
+        :param results_ring: shared memory ring for the actions results, else the results
+                             are sent in the returns queue
+        :type results_ring: alignak.misc.results_ring.ResultsRing
         """
         # Set our own identifier
         cls = self.__class__
@@ -128,6 +132,7 @@ class Worker(object):  # pylint: disable=too-many-instance-attributes
         self.control_queue = None
 
         self.max_plugins_output_length = max_plugins_output_length
+        self.results_ring = results_ring
         self.i_am_dying = False
         # Keep a trace where the worker is launched from (poller or reactionner?)
         self.loaded_into = loaded_into
@@ -238,6 +243,24 @@ class Worker(object):  # pylint: disable=too-many-instance-attributes
         """
         return self._process.is_alive()
 
+    def get_ring_results(self):
+        """Get the actions results written in the results ring, called by the satellite
+
+        :return: list of the results properties, see `ResultsRing.get_results`
+        :rtype: list
+        """
+        if self.results_ring is None:
+            return []
+        results = self.results_ring.get_results()
+        if results is None:
+            logger.warning("The worker %s results ring is locked, the results are not read",
+                           self.get_id())
+            return []
+        statsmgr.gauge('worker.%s.results-ring-size' % self.get_id(), len(results))
+        statsmgr.gauge('worker.%s.results-ring-overflows' % self.get_id(),
+                       self.results_ring.overflows)
+        return results
+
     def get_new_checks(self, queue, return_queue):
         """Get new checks if less than nb_checks_max
         If no new checks got and no check in queue, sleep for 1 sec
@@ -324,7 +347,10 @@ class Worker(object):  # pylint: disable=too-many-instance-attributes
                 logger.debug("--- check done/timeout: %s", action.uuid)
                 self.actions_finished += 1
                 to_del.append(action)
-                # We answer to our master
+                # We answer to our master, through the shared memory if possible
+                if self.results_ring is not None and self.results_ring.put(action):
+                    logger.debug("Result written in the results ring: %s", action.uuid)
+                    continue
                 try:
                     msg = Message(_type='Done', data=action, source=self._id)
                     logger.debug("Queuing message: %s", msg)
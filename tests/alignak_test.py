@@ -45,6 +45,7 @@ import threading
 from copy import deepcopy
 
 import unittest2
+import pytest
 
 import logging
 from logging import Handler, Formatter
@@ -84,6 +85,11 @@ from alignak.daemons.brokerdaemon import Broker
 from alignak.daemons.arbiterdaemon import Arbiter
 from alignak.daemons.receiverdaemon import Receiver
 
+# The benchmarks are only run when this environment variable is set, eg:
+# ALIGNAK_BENCHMARKS=1 pytest -s test_brok_format.py
+benchmark = pytest.mark.skipif(not os.environ.get('ALIGNAK_BENCHMARKS'),
+                               reason="Set ALIGNAK_BENCHMARKS to run the benchmarks")
+
 
 class AlignakTest(unittest2.TestCase):
 
@@ -1263,7 +1269,7 @@ define host {
 
         :return:
         """
-        self._scheduler.actions = {}
+        self._scheduler.actions.clear()
 
     def clear_checks(self):
         """
@@ -1271,7 +1277,7 @@ define host {
 
         :return:
         """
-        self._scheduler.checks = {}
+        self._scheduler.checks.clear()
 
     def clear_events(self, daemon=None):
         """
@@ -258,6 +258,9 @@ class TestConfig(PropertiesTester, AlignakTest):
         ('max_plugins_output_length', 8192),
         ('no_event_handlers_during_downtimes', True),
         ('cleaning_queues_interval', 900),
+        ('broks_shedding_types', ['update_program_status', 'host_next_schedule',
+                                  'service_next_schedule']),
+        ('broks_kept_types', ['monitoring_log']),
         ('enable_problem_impacts_states_change', True),
         ('resource_macros_names', []),
 
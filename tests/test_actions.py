@@ -223,7 +223,10 @@ class TestAction(AlignakTest):
             'last_poll': 0,
             'wait_time': 0.001
         })
-        assert check.__dict__ == parameters
+        # The check properties are stored in its slots
+        state, slots = check.__getstate__()
+        state.update(slots)
+        assert state == parameters
 
     def test_action(self):
         """ Test simple action execution
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+This file test the __slots__ of the most used objects
+"""
+
+import sys
+import copy
+import pickle
+from .alignak_test import AlignakTest, benchmark
+from alignak.action import ACT_STATUS_POLLED
+from alignak.brok import Brok
+from alignak.check import Check
+from alignak.commandcall import CommandCall
+from alignak.eventhandler import EventHandler
+from alignak.notification import Notification
+from alignak.objects.host import Host
+from alignak.objects.service import Service
+from alignak.misc.serialization import serialize, unserialize
+
+
+class DictObject(object):
+    """An object storing its attributes in its instance dictionary"""
+    pass
+
+
+class Listener(object):
+    """A listener as the scheduler actions registry"""
+    def status_changed(self, action, old_status):
+        pass
+
+    def t_to_go_changed(self, action):
+        pass
+
+
+class TestAutoSlots(AlignakTest):
+    """
+    This class test the __slots__ of the most used objects
+    """
+    def setUp(self):
+        super(TestAutoSlots, self).setUp()
+
+    @staticmethod
+    def _service(index):
+        service = Service({'host_name': u'host_%d' % index,
+                           'service_description': u'service_%d' % index,
+                           'check_command': u'check_service!%d' % index})
+        service.fill_default()
+        return service
+
+    def test_slots(self):
+        """ Test the objects properties are stored in slots
+
+        :return: None
+        """
+        for cls in [Check, Notification, EventHandler, CommandCall, Host, Service]:
+            assert cls.__slots__
+            # Some properties are not declared in the slots
+            assert 'uuid' not in cls.__slots__
+            assert 'status' not in cls.__slots__
+            assert 't_to_go' not in cls.__slots__
+
+        service = self._service(0)
+        assert service.service_description == u'service_0'
+        assert 'service_description' not in service.__dict__
+        # Class inherited values are still available
+        assert 'check_timeout' not in Service.__slots__
+
+        # Broks do not have any instance dictionary
+        brok = Brok({'type': u'log', 'data': {'message': u'Hello'}})
+        assert not hasattr(brok, '__dict__')
+        assert getattr(brok, 'sent_to_externals', False) is False
+        brok.sent_to_externals = True
+        assert pickle.loads(pickle.dumps(brok)).sent_to_externals is True
+
+    def test_serialization(self):
+        """ Test the objects with slots are still serialized, copied and pickled
+
+        :return: None
+        """
+        service = self._service(1)
+        service.output = u'Service output é'
+        received = unserialize(serialize(service))
+        assert isinstance(received, Service)
+        assert received.uuid == service.uuid
+        assert received.output == u'Service output é'
+        assert received.check_command == service.check_command
+
+        check = Check({'command': u'check_me', 'ref': service.uuid})
+        check._listener = Listener()
+        check.status = ACT_STATUS_POLLED
+        check.output = u'Check output'
+        for received in [copy.copy(check), pickle.loads(pickle.dumps(check)),
+                         unserialize(serialize(check))]:
+            assert received.uuid == check.uuid
+            assert received.status == ACT_STATUS_POLLED
+            assert received.command == u'check_me'
+            assert received.output == u'Check output'
+            # The scheduler listener is not copied
+            assert received._listener is None
+
+    @staticmethod
+    def _storage_size(obj):
+        """Size of an object and of its instance dictionary, not of its attributes values"""
+        return sys.getsizeof(obj) + (sys.getsizeof(obj.__dict__) if hasattr(obj, '__dict__') else 0)
+
+    @staticmethod
+    def _dict_object(obj):
+        """An object with the same attributes in its instance dictionary"""
+        dict_object = DictObject()
+        for prop in obj.__class__.__slots__:
+            if hasattr(obj, prop):
+                setattr(dict_object, prop, getattr(obj, prop))
+        dict_object.__dict__.update(obj.__dict__)
+        return dict_object
+
+    def test_slots_memory(self):
+        """ Test that a service with slots uses less memory than without slots
+
+        :return: None
+        """
+        service = self._service(0)
+        assert self._storage_size(service) < self._storage_size(self._dict_object(service))
+
+    @benchmark
+    def test_slots_memory_benchmark(self):
+        """ Compare the memory used by 100k services and checks with and without slots
+
+        The size of the attributes values is the same, only the storage is compared. The
+        checks have few attributes, the gain depends on the instance dictionaries keys sharing.
+
+        :return: None
+        """
+        count = 100000
+        for name, create in [('service', self._service),
+                             ('check', lambda index: Check({'command': u'check_%d' % index,
+                                                            'ref': u'host'}))]:
+            # Services are long to create, the size of 1k services is extrapolated
+            created = 1000 if name == 'service' else count
+            with_slots = without_slots = 0
+            for index in range(created):
+                obj = create(index)
+                with_slots += self._storage_size(obj)
+
+                without_slots += self._storage_size(self._dict_object(obj))
+
+            print("%d %ss: %.1f MB with slots, %.1f MB without slots, %d bytes saved per object"
+                  % (count, name, with_slots * count / created / 1024.0 / 1024.0,
+                     without_slots * count / created / 1024.0 / 1024.0,
+                     (without_slots - with_slots) // created))
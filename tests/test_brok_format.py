@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+This file test the broks format exchanged between the daemons
+"""
+
+import json
+import time
+import requests_mock
+from .alignak_test import AlignakTest, benchmark
+from alignak.brok import (Brok, BROKS_FORMAT_SERIALIZED, BROKS_FORMAT_JSON,
+                          get_broks_from_json)
+from alignak.http.generic_interface import GenericInterface
+
+
+class TestBrokFormat(AlignakTest):
+    """
+    This class test the broks format exchanged between the daemons
+    """
+    def setUp(self):
+        super(TestBrokFormat, self).setUp()
+
+    def _check_result_brok(self, index=0):
+        return Brok({'type': 'service_check_result', 'data': {
+            'host_name': u'host_%d' % index, 'service_description': u'service é',
+            'state': u'OK', 'state_id': 0, 'state_type': u'HARD', 'return_code': 0,
+            'attempt': 1, 'last_chk': 1473597375, 'latency': 0.2317881584,
+            'execution_time': 3.1496069431000002, 'passive_check': False,
+            'output': u'PING OK - Packet loss = 0%, RTA = 0.05 ms',
+            'long_output': u'Long "output" ...',
+            'perf_data': u'rta=0.049000ms;2.000000;3.000000;0.000000 pl=0%;50;80;0'
+        }})
+
+    def _transfer(self, broks, broks_format):
+        """Encode the broks as the daemon HTTP interface and decode them as the broker
+
+        :return: (response body, received broks)
+        """
+        body = GenericInterface._broks_response(broks, broks_format)
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        return body, get_broks_from_json(json.loads(body.decode('utf-8')))
+
+    def test_broks_formats(self):
+        """ Test that the broks are the same whatever the format
+
+        :return: None
+        """
+        for broks_format in [BROKS_FORMAT_SERIALIZED, BROKS_FORMAT_JSON]:
+            brok = self._check_result_brok()
+            _, received = self._transfer([brok], broks_format)
+            assert len(received) == 1
+            got = received[0]
+            assert isinstance(got, Brok)
+            assert got.uuid == brok.uuid
+            assert got.type == brok.type
+            assert got.creation_time == brok.creation_time
+            assert got.prepared is False
+
+            # As done by the broker
+            got.instance_id = u'scheduler-id'
+            got.prepare()
+            brok.prepare()
+            assert got.prepared is True
+            assert got.data['instance_id'] == u'scheduler-id'
+            del got.data['instance_id']
+            assert got.data == brok.data
+
+        # A prepared brok can also be sent
+        brok = self._check_result_brok()
+        brok.prepare()
+        _, received = self._transfer([brok], BROKS_FORMAT_JSON)
+        received[0].prepare()
+        assert received[0].data == brok.data
+
+        # Empty list
+        assert [] == self._transfer([], BROKS_FORMAT_JSON)[1]
+
+    def test_broks_format_negotiation(self):
+        """ Test that the json broks are only requested from the daemons advertising
+        this format in their identity
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_default.cfg',
+                             dispatching=True)
+        assert self._scheduler_daemon.get_id()['broks_format'] == BROKS_FORMAT_JSON
+
+        link = list(self._broker_daemon.schedulers.values())[0]
+        link.create_connection()
+        base_url = 'http://%s:%s' % (link.address, link.port)
+        brok = self._check_result_brok()
+        for identity, broks_format in [
+                ({"running_id": 1.0}, BROKS_FORMAT_SERIALIZED),
+                ({"running_id": 2.0, "broks_format": BROKS_FORMAT_JSON}, BROKS_FORMAT_JSON)]:
+            with requests_mock.mock() as mr:
+                mr.get('%s/identity' % base_url, json=identity)
+                mr.get('%s/_broks' % base_url,
+                       content=self._transfer([brok], broks_format)[0])
+                assert link.get_running_id()
+                assert link.broks_format == broks_format
+
+                # The json broks are only requested from a daemon that understands them
+                received = link.get_broks(u'broker-master')
+                assert [got.uuid for got in received] == [brok.uuid]
+                query = mr.request_history[-1].qs
+                assert ('broks_format' in query) == (broks_format == BROKS_FORMAT_JSON)
+
+    @benchmark
+    def test_broks_formats_benchmark(self):
+        """ Compare the size and time needed to transfer 100k broks
+
+        :return: None
+        """
+        count = 100000
+        for broks_format in [BROKS_FORMAT_SERIALIZED, BROKS_FORMAT_JSON]:
+            broks = [self._check_result_brok(index) for index in range(count)]
+
+            now = time.time()
+            body, received = self._transfer(broks, broks_format)
+            for brok in received:
+                brok.prepare()
+            elapsed = time.time() - now
+
+            assert len(received) == count
+            print("Format %s, %d broks: %d bytes, encoding and decoding: %.3f s"
+                  % (broks_format, count, len(body), elapsed))
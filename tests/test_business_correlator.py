@@ -1470,6 +1470,50 @@ class TestBusinessCorrelator(AlignakTest):
         assert svc_db2.uuid in all_elements
         assert svc_db1.uuid in all_elements
 
+    def test_dep_node_cached_state(self):
+        """ BR - the node states are cached while the watched items do not change
+
+        :return:
+        """
+        hosts = self._sched.hosts
+        services = self._sched.services
+        svc_db1 = services.find_srv_by_name_and_hostname("test_host_0", "db1")
+        svc_db2 = services.find_srv_by_name_and_hostname("test_host_0", "db2")
+        svc_cor = services.find_srv_by_name_and_hostname("test_host_0", "Simple_And")
+        bp_rule = svc_cor.business_rule
+        assert '&' == bp_rule.operand
+
+        # Not watched, nothing cached
+        assert 0 == bp_rule.get_state(hosts, services)
+        assert bp_rule.cached_state is None
+
+        bp_rule.watch_items(hosts, services)
+        assert svc_db1._business_rule_nodes == [bp_rule.sons[0]]
+        assert 0 == bp_rule.get_state(hosts, services)
+        assert 0 == bp_rule.cached_state
+        assert 0 == bp_rule.sons[1].cached_state
+
+        # A leaf state change only invalidates its own branch
+        svc_db1.last_hard_state_id = 2
+        assert bp_rule.cached_state is None
+        assert bp_rule.sons[0].cached_state is None
+        assert 0 == bp_rule.sons[1].cached_state
+        assert 2 == bp_rule.get_state(hosts, services)
+
+        # As an acknowledgement or a downtime
+        svc_db1.problem_has_been_acknowledged = True
+        assert 0 == bp_rule.get_state(hosts, services)
+        svc_db2.in_scheduled_downtime = True
+        assert bp_rule.cached_state is None
+        assert 0 == bp_rule.get_state(hosts, services)
+
+        bp_rule.unwatch_items(hosts, services)
+        assert not svc_db1._business_rule_nodes
+        svc_db2.in_scheduled_downtime = False
+        svc_db2.last_hard_state_id = 2
+        assert 2 == bp_rule.get_state(hosts, services)
+        assert bp_rule.cached_state is None
+
     def test_full_erp_rule_with_schedule(self):
         """ Full ERP rule with real checks scheduled
 
@@ -47,6 +47,7 @@
 # This file is used to test reading and processing of config files
 #
 
+from freezegun import freeze_time
 from .alignak_test import *
 
 
@@ -78,3 +79,37 @@ class TestBusinessImpactModulation(AlignakTest):
         self.scheduler_loop(2, [])
         # Service BI is defined as 2 but the BI modulation makes it be 5!
         assert svc.business_impact == 5
+
+    def test_business_impact_modulation_deadlines(self):
+        """ Tests business impact only updated when a modulation starts or ends """
+        deadlines = self._scheduler.business_impact_deadlines
+        host = self._scheduler.hosts.find_by_name("test_host_0")
+        svc = self._scheduler.services.find_srv_by_name_and_hostname("test_host_0", "test_ok_00")
+        # Only the items with modulations are indexed, not yet updated
+        assert host.uuid not in deadlines.deadlines
+        assert deadlines.deadlines[svc.uuid] == 0
+
+        initial_datetime = datetime.datetime(year=2018, month=6, day=1,
+                                             hour=18, minute=30, second=0)
+        with freeze_time(initial_datetime) as frozen_datetime:
+            self._scheduler.update_business_values()
+            assert svc.business_impact == 5
+            # The modulation period is 24x7, it ends after the one year search limit
+            assert deadlines.deadlines[svc.uuid] > time.time() + 300 * 86400
+
+            # Nothing to update
+            svc.business_impact = 2
+            self._scheduler.update_business_values()
+            assert svc.business_impact == 2
+
+            # The host is a problem and the service is its impact
+            host.is_problem = True
+            host.impacts = [svc.uuid]
+            svc.source_problems = [host.uuid]
+            assert host.business_impact == 2
+
+            # The modulation period end is passed, the impact and its problem are updated
+            frozen_datetime.tick(delta=datetime.timedelta(days=400))
+            self._scheduler.update_business_values()
+            assert svc.business_impact == 5
+            assert host.business_impact == 5
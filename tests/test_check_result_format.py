@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+This file test the actions results format sent back to the scheduler by the satellites
+"""
+
+import copy
+import json
+import time
+import requests_mock
+from .alignak_test import AlignakTest, benchmark
+from alignak.action import (ACT_STATUS_DONE, ACT_STATUS_WAIT_CONSUME,
+                            RESULT_PROP, RESULTS_FORMAT_SERIALIZED, RESULTS_FORMAT_COMPACT,
+                            get_results_from_json)
+from alignak.check import Check
+from alignak.misc.serialization import serialize
+
+
+class TestCheckResultFormat(AlignakTest):
+    """
+    This class test the actions results format sent back to the scheduler by the satellites
+    """
+    def setUp(self):
+        super(TestCheckResultFormat, self).setUp()
+        self.setup_with_file('cfg/cfg_default.cfg', dispatching=True)
+        assert self.conf_is_correct
+
+    def _executed(self, check, exit_status, output):
+        """Get a copy of the check as executed by a poller"""
+        executed = copy.copy(check)
+        executed.status = ACT_STATUS_DONE
+        executed.exit_status = exit_status
+        executed.output = output
+        executed.check_time = time.time()
+        executed.execution_time = 0.5
+        return executed
+
+    @staticmethod
+    def _transfer(results):
+        """Encode the results as the satellite and decode them as the scheduler"""
+        body = json.dumps(serialize(results, True))
+        return get_results_from_json(json.loads(body))
+
+    def test_compact_results(self):
+        """ Test that the compact results are applied to the scheduler checks
+
+        :return: None
+        """
+        host = self._scheduler.hosts.find_by_name("test_host_0")
+        host.checks_in_progress = []
+        host.act_depend_of = []
+        host.event_handler_enabled = False
+
+        self.scheduler_loop(1, [[host, 0, 'UP']])
+        self.scheduler_loop(1)
+        assert host.checks_in_progress
+        check = self._scheduler.checks[host.checks_in_progress[0]]
+
+        executed = self._executed(check, 2, u'Host is DOWN é')
+        result = executed.get_result()
+        assert sorted(RESULT_PROP) == sorted(result.keys())
+
+        received = self._transfer([result])
+        assert received == [result]
+        self._scheduler.manage_results(received[0])
+
+        # Our own check got the result
+        assert self._scheduler.checks[check.uuid] is check
+        assert check.status == ACT_STATUS_WAIT_CONSUME
+        assert check.exit_status == 2
+        assert check.output == u'Host is DOWN é'
+        assert check.execution_time == 0.5
+
+        self.scheduler_loop(1)
+        assert host.output == u'Host is DOWN é'
+        assert host.state == 'DOWN'
+
+        # A result for an unknown check is ignored
+        result['uuid'] = u'unknown'
+        self._scheduler.manage_results(result)
+
+        # Serialized checks are still accepted
+        received = self._transfer([Check({'command': u'check_me', 'ref': host.uuid})])
+        assert isinstance(received[0], Check)
+
+    def test_results_format_negotiation(self):
+        """ Test that the compact results are only exchanged with the daemons advertising
+        this format in their identity
+
+        :return: None
+        """
+        assert self._scheduler_daemon.get_id()['results_format'] == RESULTS_FORMAT_COMPACT
+
+        link = list(self._scheduler_daemon.pollers.values())[0]
+        link.create_connection()
+        base_url = 'http://%s:%s' % (link.address, link.port)
+        for identity, results_format in [
+                ({"running_id": 1.0}, RESULTS_FORMAT_SERIALIZED),
+                ({"running_id": 2.0, "results_format": RESULTS_FORMAT_COMPACT},
+                 RESULTS_FORMAT_COMPACT)]:
+            with requests_mock.mock() as mr:
+                mr.get('%s/identity' % base_url, json=identity)
+                mr.get('%s/_results' % base_url, json=[])
+                assert link.get_running_id()
+                assert link.results_format == results_format
+
+                # The compact results are only requested from a satellite that understands them
+                assert link.get_results(u'scheduler') == []
+                query = mr.request_history[-1].qs
+                assert ('results_format' in query) == (results_format == RESULTS_FORMAT_COMPACT)
+
+    @benchmark
+    def test_compact_results_benchmark(self):
+        """ Compare the time needed to transfer 10k results
+
+        :return: None
+        """
+        count = 10000
+        checks = [self._executed(Check({'command': u'check_me', 'ref': u'host'}),
+                                 0, u'OK - all is fine') for _ in range(count)]
+
+        for compact in [False, True]:
+            now = time.time()
+            results = [check.get_result() for check in checks] if compact else checks
+            received = self._transfer(results)
+            elapsed = time.time() - now
+
+            assert len(received) == count
+            print("Compact %s, %d results: encoding and decoding: %.3f s"
+                  % (compact, count, elapsed))
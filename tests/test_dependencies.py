@@ -28,7 +28,9 @@ import datetime
 from freezegun import freeze_time
 
 from copy import copy
-from .alignak_test import AlignakTest
+from .alignak_test import AlignakTest, benchmark
+from alignak.check import Check
+from alignak.action import ACT_STATUS_WAIT_CONSUME, ACT_STATUS_WAIT_DEPEND, ACT_STATUS_ZOMBIE
 import pytest
 
 
@@ -1586,3 +1588,96 @@ class TestDependencies(AlignakTest):
         print("Load: %s\n- %s" % (svc_load, svc_load.act_depend_of))
 
         assert svc_nrpe.uuid in [e[0] for e in svc_load.act_depend_of]
+
+    def test_a_m_host_chain_resolution(self):
+        """ Test the dependencies resolution along a deep host parents chain
+
+        Each host check waits for the check of its parent host. When the root host check
+        result is consumed, all the chain is resolved in the same scheduler tick.
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_dependencies_chain.cfg',
+                             dispatching=True)
+        assert self.conf_is_correct
+
+        hosts = [self._scheduler.hosts.find_by_name("host_chain_%02d" % idx)
+                 for idx in range(20)]
+        checks = self._checks_chain(hosts)
+
+        self._scheduler.consume_results()
+
+        for chk in checks:
+            assert chk.status == ACT_STATUS_ZOMBIE
+            assert not chk.depend_on
+        assert "UP" == hosts[0].state
+        assert "DOWN" == hosts[1].state
+        for host in hosts[2:]:
+            assert "UNREACHABLE" == host.state
+
+        # The zombies are deleted on the next scheduler tick
+        self.scheduler_loop(1)
+        for chk in checks:
+            assert chk.uuid not in self._scheduler.checks
+
+    @benchmark
+    def test_a_m_host_chain_resolution_benchmark(self):
+        """ Measure the dependencies chain resolution and the scheduler tick times
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_dependencies_chain.cfg',
+                             dispatching=True)
+        assert self.conf_is_correct
+
+        hosts = [self._scheduler.hosts.find_by_name("host_chain_%02d" % idx)
+                 for idx in range(20)]
+        rounds = 100
+        resolution = tick = 0.0
+        for _ in range(rounds):
+            checks = self._checks_chain(hosts)
+
+            _t0 = time.time()
+            self._scheduler.consume_results()
+            resolution += time.time() - _t0
+
+            # Scheduler tick time with the deleted zombies
+            _t0 = time.time()
+            self.scheduler_loop(1)
+            tick += time.time() - _t0
+            for chk in checks:
+                assert chk.uuid not in self._scheduler.checks
+
+        print("Resolved a %d checks chain in %.6f seconds, scheduler tick in %.6f seconds"
+              % (len(hosts), resolution / rounds, tick / rounds))
+
+    def _checks_chain(self, hosts):
+        """ Build a checks chain for the hosts, each check depends on the previous one
+
+        The root host check result is waiting to be consumed, it is UP and all the other
+        ones are DOWN
+
+        :param hosts: hosts chain, root host first
+        :type hosts: list
+        :return: chain checks
+        :rtype: list
+        """
+        for host in hosts:
+            host.checks_in_progress = []
+        self.clear_checks()
+
+        now = time.time()
+        checks = []
+        for host in hosts:
+            chk = Check({'command': 'check_host', 'ref': host.uuid, 'ref_type': 'host',
+                         't_to_go': now, 'check_time': now, 'exit_status': 2,
+                         'output': 'DOWN', 'status': ACT_STATUS_WAIT_DEPEND})
+            if checks:
+                chk.depend_on.append(checks[-1].uuid)
+                checks[-1].depend_on_me.append(chk)
+            checks.append(chk)
+            self._scheduler.add(chk)
+        checks[0].exit_status = 0
+        checks[0].output = 'UP'
+        checks[0].status = ACT_STATUS_WAIT_CONSUME
+        return checks
@@ -127,6 +127,49 @@ class TestDowntime(AlignakTest):
         unserialized_item = Downtime(params=downtime.serialize())
         assert downtime.__dict__ == unserialized_item.__dict__
 
+    def test_downtimes_deadlines(self):
+        """ The scheduler only manages the items which downtimes deadline is passed """
+        svc = self._scheduler.services.find_srv_by_name_and_hostname("test_host_0", "test_ok_0")
+        svc.checks_in_progress = []
+        svc.act_depend_of = []
+        svc.event_handler_enabled = False
+        deadlines = self._scheduler.downtimes_deadlines
+        assert 0 == len(deadlines)
+
+        initial_datetime = datetime.datetime(year=2018, month=6, day=1,
+                                             hour=18, minute=30, second=0)
+        with freeze_time(initial_datetime) as frozen_datetime:
+            # schedule a fixed downtime in 5 minutes, for 15 minutes
+            now = int(time.time())
+            cmd = "[%lu] SCHEDULE_SVC_DOWNTIME;test_host_0;test_ok_0;%d;%d;1;0;%d;" \
+                  "downtime author;downtime comment" % (now, now + 300, now + 1200, 900)
+            self._scheduler.run_external_commands([cmd])
+            downtime = list(svc.downtimes.values())[0]
+            # The service is indexed with its downtime start
+            assert 1 == len(deadlines)
+            assert now + 300 == deadlines.deadlines[svc.uuid]
+
+            # Nothing to do before the downtime start
+            assert [] == deadlines.pop_due(now + 299)
+            self._scheduler.update_downtimes_and_comments()
+            assert not downtime.is_in_effect
+
+            # The downtime starts, the service is indexed with the downtime end
+            frozen_datetime.tick(delta=datetime.timedelta(seconds=300))
+            self._scheduler.update_downtimes_and_comments()
+            assert downtime.is_in_effect
+            assert svc.in_scheduled_downtime
+            assert now + 1200 == deadlines.deadlines[svc.uuid]
+
+            # The downtime ends and is deleted on the next loop
+            frozen_datetime.tick(delta=datetime.timedelta(seconds=901))
+            self._scheduler.update_downtimes_and_comments()
+            assert downtime.can_be_deleted
+            assert not svc.in_scheduled_downtime
+            self._scheduler.update_downtimes_and_comments()
+            assert svc.downtimes == {}
+            assert 0 == len(deadlines)
+
     def test_schedule_fixed_svc_downtime(self):
         """ Schedule a fixed downtime for a service """
         # Get the service
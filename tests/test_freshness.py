@@ -26,6 +26,7 @@ import time
 import datetime
 from freezegun import freeze_time
 from .alignak_test import AlignakTest
+from alignak.scheduler import HEAP_COMPACTION_MIN_SIZE
 
 
 class TestPassiveChecks(AlignakTest):
@@ -326,6 +327,68 @@ class TestPassiveChecks(AlignakTest):
         # Not defined, so default value - default is 0 for no freshness check!
         assert 60 == svc6.freshness_threshold
 
+    def test_freshness_deadlines(self):
+        """ Only the items which freshness deadline is passed are checked
+
+        :return: None
+        """
+        # Check freshness on each scheduler tick
+        self._scheduler.update_recurrent_works_tick({'tick_check_freshness': 1})
+
+        deadlines = self._scheduler.hosts_freshness_deadlines
+        host = self._scheduler.hosts.find_by_name("test_host_0")
+        host_a = self._scheduler.hosts.find_by_name("test_host_A")
+        latency = host_a.__class__.additional_freshness_latency
+
+        # Actively checked host is not indexed
+        assert host.uuid not in deadlines.deadlines
+        assert host_a.uuid in deadlines.deadlines
+
+        initial_datetime = datetime.datetime(year=2018, month=6, day=1,
+                                             hour=18, minute=30, second=0)
+        with freeze_time(initial_datetime) as frozen_datetime:
+            now = int(time.time())
+
+            # The deadline follows the last state update
+            host_a.last_state_update = now
+            assert now + 2400 + latency == deadlines.deadlines[host_a.uuid]
+
+            self._scheduler.check_freshness()
+            assert not host_a.freshness_expired
+            assert not [chk for chk in self._scheduler.checks.values()
+                        if chk.ref == host_a.uuid]
+            assert now + 2400 + latency == deadlines.deadlines[host_a.uuid]
+
+            # Time warp after the deadline
+            frozen_datetime.tick(delta=datetime.timedelta(seconds=2400 + latency + 1))
+            self._scheduler.check_freshness()
+            assert [chk for chk in self._scheduler.checks.values()
+                    if chk.ref == host_a.uuid and chk.freshness_expiry_check]
+
+            # Freshness check disabled, the host is not indexed anymore
+            host_a.check_freshness = False
+            assert host_a.uuid not in deadlines.deadlines
+
+    def test_freshness_deadlines_compaction(self):
+        """ The stale deadlines do not accumulate in the deadlines heap
+
+        :return: None
+        """
+        deadlines = self._scheduler.hosts_freshness_deadlines
+        host_a = self._scheduler.hosts.find_by_name("test_host_A")
+        now = int(time.time())
+
+        # Each state update pushes a new deadline
+        for index in range(10 * HEAP_COMPACTION_MIN_SIZE):
+            host_a.last_state_update = now + index
+        assert len(deadlines.heap) <= max(HEAP_COMPACTION_MIN_SIZE, 2 * len(deadlines))
+        assert len([entry for entry in deadlines.heap if entry[-1] is host_a]) < \
+            HEAP_COMPACTION_MIN_SIZE
+
+        # Only the up-to-date deadline is popped
+        assert host_a in deadlines.pop_due(now + 100000)
+        assert host_a.uuid not in deadlines.deadlines
+
     def test_freshness_expiration_repeat_host(self):
         """ We test the running property freshness_expired to know if we are in
         expiration freshness or not - test for an host
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+This file test the compressed and streamed HTTP exchanges between the daemons
+"""
+
+import zlib
+import json
+import threading
+import requests
+from wsgiref.simple_server import make_server, WSGIRequestHandler
+
+import cherrypy
+
+from .alignak_test import AlignakTest
+from alignak.brok import Brok, BROKS_FORMAT_JSON, get_broks_from_json
+from alignak.check import Check
+from alignak.action import RESULTS_FORMAT_COMPACT, get_results_from_json
+from alignak.http.client import HTTPClient
+from alignak.http import cherrypy_extend
+from alignak.http.daemon import HTTPDaemon
+from alignak.http.generic_interface import GenericInterface
+from alignak.misc.serialization import unserialize
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class FakeDaemon(object):
+    """A daemon providing what the HTTP interface needs"""
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.conf_lock = threading.RLock()
+        self.broks_lock = threading.RLock()
+        self.new_conf = None
+        self.broks = []
+        self.results = []
+
+    def get_broks(self):
+        res = self.broks
+        self.broks = []
+        return res
+
+    def get_results_from_passive(self, scheduler_instance_id, results_format):
+        if results_format == RESULTS_FORMAT_COMPACT:
+            return [action.get_result() for action in self.results]
+        return self.results
+
+
+class TestHttpTransport(AlignakTest):
+    """
+    This class test the compressed and streamed HTTP exchanges between the daemons
+    """
+    def setUp(self):
+        super(TestHttpTransport, self).setUp()
+
+        self.app = FakeDaemon()
+        HTTPDaemon('127.0.0.1', 0, GenericInterface(self.app), False, None, None, None, None, 1)
+        self.server = make_server('127.0.0.1', 0, cherrypy.tree, handler_class=QuietHandler)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        cherrypy.tree.apps.clear()
+        super(TestHttpTransport, self).tearDown()
+
+    def test_compressed_requests(self):
+        """ Test the compressed requests
+
+        :return: None
+        """
+        conf = {'data': u'A big configuration é' * 10000}
+        for compression in ['', 'gzip', 'unknown']:
+            self.app.new_conf = None
+            client = HTTPClient(address='127.0.0.1', port=self.port, compression=compression)
+            assert client.compression == ('gzip' if compression == 'gzip' else '')
+            assert b'true' == client.post('_push_configuration', {'conf': conf})
+            assert self.app.new_conf == conf
+
+        # Small requests are not compressed
+        client = HTTPClient(address='127.0.0.1', port=self.port, compression='gzip')
+        assert b'true' == client.post('_push_configuration', {'conf': {'data': 'small'}})
+        assert self.app.new_conf == {'data': 'small'}
+
+    def test_compressed_requests_limit(self):
+        """ Test that a too large decompressed request body is rejected
+
+        :return: None
+        """
+        body = zlib.compress(json.dumps({'conf': {'data': 'x' * 100000}}).encode('utf-8'))
+        url = 'http://127.0.0.1:%d/_push_configuration' % self.port
+        headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+
+        max_size = cherrypy_extend.MAX_DECOMPRESSED_SIZE
+        cherrypy_extend.MAX_DECOMPRESSED_SIZE = 10000
+        try:
+            self.app.new_conf = None
+            assert requests.post(url, data=body, headers=headers).status_code == 413
+            assert self.app.new_conf is None
+        finally:
+            cherrypy_extend.MAX_DECOMPRESSED_SIZE = max_size
+
+        assert requests.post(url, data=body, headers=headers).status_code == 200
+        assert self.app.new_conf == {'data': 'x' * 100000}
+
+        # Invalid compressed data
+        assert requests.post(url, data=b'not gzip', headers=headers).status_code == 400
+
+    def test_streamed_responses(self):
+        """ Test the streamed responses
+
+        :return: None
+        """
+        client = HTTPClient(address='127.0.0.1', port=self.port)
+
+        # Broks
+        broks = [Brok({'type': 'log', 'data': {'message': u'Brok %d é' % index}})
+                 for index in range(1000)]
+        for stream in [False, True]:
+            self.app.broks = broks[:]
+            res = client.get('_broks', {'broker_name': 'broker',
+                                        'broks_format': BROKS_FORMAT_JSON}, stream=stream)
+            received = get_broks_from_json(res)
+            assert [brok.uuid for brok in broks] == [brok.uuid for brok in received]
+            for brok in received:
+                brok.prepare()
+            assert received[10].data['message'] == u'Brok 10 é'
+
+        # Results
+        self.app.results = [Check({'command': u'check_%d' % index, 'ref': 'host'})
+                            for index in range(100)]
+        res = client.get('_results', {'scheduler_instance_id': 'scheduler'}, stream=True)
+        received = unserialize(res, True)
+        assert [chk.uuid for chk in self.app.results] == [chk.uuid for chk in received]
+
+        # Results in the compact format
+        res = client.get('_results', {'scheduler_instance_id': 'scheduler',
+                                      'results_format': RESULTS_FORMAT_COMPACT}, stream=True)
+        assert [chk.get_result() for chk in self.app.results] == get_results_from_json(res)
+
+        # Nothing to stream
+        self.app.results = []
+        assert [] == client.get('_results', {'scheduler_instance_id': 'scheduler'}, stream=True)
@@ -49,6 +49,7 @@
 # This file is used to test reading and processing of config files
 #
 
+import time
 import pytest
 from .alignak_test import *
 from alignak.macroresolver import MacroResolver
@@ -921,6 +922,136 @@ class MacroResolverTester(object):
         assert 'plugins/nothing 127.0.0.1' == macros_command
 
 
+    def test_states_counters(self):
+        """ Test the items states counters used by the summary macros
+
+        :return: None
+        """
+        (svc, hst) = self.get_hst_svc()
+
+        def check_counters(items):
+            counters = items.get_states_counters()
+            expected = {}
+            for item in items:
+                states_key = item.get_states_key()
+                expected[states_key] = expected.get(states_key, 0) + 1
+            assert expected == dict((key, count) for key, count in counters.counts.items()
+                                    if count)
+            assert counters.total == len(items)
+
+        hst.checks_in_progress = []
+        hst.act_depend_of = []  # ignore the router
+        hst.event_handler_enabled = False
+        svc.checks_in_progress = []
+        svc.act_depend_of = []  # no hostchecks on critical checkresults
+
+        # Build the counters
+        check_counters(self._scheduler.hosts)
+        check_counters(self._scheduler.services)
+
+        self.scheduler_loop(3, [[hst, 2, 'DOWN'], [svc, 2, 'CRITICAL']])
+        check_counters(self._scheduler.hosts)
+        check_counters(self._scheduler.services)
+        assert self.mr._get_total_hosts_down(u'HARD') == 1
+        assert self.mr._get_total_services_critical(u'HARD') == 1
+        assert self.mr._get_total_services_problems_unhandled() == 1
+
+        # Acknowledge, downtime and disable the checks
+        now = int(time.time())
+        self._scheduler.run_external_commands([
+            '[%d] ACKNOWLEDGE_SVC_PROBLEM;test_host_0;test_ok_0;2;0;1;me;Ack' % now,
+            '[%d] SCHEDULE_HOST_DOWNTIME;test_host_0;%d;%d;1;0;1200;me;Downtime'
+            % (now, now, now + 1200),
+            '[%d] DISABLE_HOST_CHECK;test_host_0' % now,
+            '[%d] DISABLE_PASSIVE_HOST_CHECKS;test_host_0' % now])
+        self.scheduler_loop(1)
+        check_counters(self._scheduler.hosts)
+        check_counters(self._scheduler.services)
+        assert self.mr._get_total_services_problems_unhandled() == 0
+        assert self.mr._get_total_services_problems_handled() == 1
+        assert self.mr._get_total_hosts_downtimed() == 1
+        assert self.mr._get_total_hosts_not_monitored() == 1
+
+        # Items added or removed
+        self._scheduler.hosts.remove_item(hst)
+        assert self.mr._get_total_hosts_downtimed() == 0
+        self._scheduler.hosts.add_item(hst)
+        assert self.mr._get_total_hosts_downtimed() == 1
+
+    def test_templates_cache(self):
+        """ Test the compiled command lines templates cache
+
+        :return: None
+        """
+        (svc, hst) = self.get_hst_svc()
+        self.mr.templates.clear()
+        for _ in range(3):
+            macros_command = self.mr.resolve_command(svc.check_command, [hst, svc],
+                                                     self._scheduler.macromodulations,
+                                                     self._scheduler.timeperiods)
+            assert macros_command == "plugins/test_servicecheck.pl --type=ok --failchance=5% " \
+                                     "--previous-state=OK --state-duration=0 " \
+                                     "--total-critical-on-host=0 --total-warning-on-host=0 " \
+                                     "--hostname test_host_0 --servicedesc test_ok_0"
+        # Only one template for the service check command
+        assert len(self.mr.templates) == 1
+
+        # The values are evaluated for each resolution
+        hst.state = 'DOWN'
+        assert 'DOWN' == self.mr.resolve_simple_macros_in_string("$HOSTSTATE$", [hst, svc],
+                                                                 None, None)
+        hst.state = 'UP'
+        assert 'UP' == self.mr.resolve_simple_macros_in_string("$HOSTSTATE$", [hst, svc],
+                                                               None, None)
+        # The template depends upon the objects classes
+        assert '' == self.mr.resolve_simple_macros_in_string("$HOSTSTATE$", [svc], None, None)
+        assert len(self.mr.templates) == 3
+
+        # Nested macros and escaped $
+        assert 'plugins $ arg' == \
+            self.mr.resolve_simple_macros_in_string("$ARG1$ $ARG2$ $ARG3$", [], None, None,
+                                                    args=['$USER1$', '$$', 'arg'])
+        assert 'unterminated $ARG1' == \
+            self.mr.resolve_simple_macros_in_string("unterminated $ARG1", [], None, None,
+                                                    args=['arg'])
+
+        # The least recently used templates are forgotten
+        self.mr.templates_cache_size = 10
+        for index in range(20):
+            self.mr.resolve_simple_macros_in_string("$ARG1$ %d" % index, [], None, None,
+                                                    args=['arg'])
+        assert len(self.mr.templates) == 10
+        assert ('$ARG1$ 19', (MacroResolver, type(self.mr.my_conf))) in self.mr.templates
+        assert ('$ARG1$ 9', (MacroResolver, type(self.mr.my_conf))) not in self.mr.templates
+        del self.mr.templates_cache_size
+
+        # The cache is reset when the configuration is loaded
+        self.mr.init(self._scheduler.pushed_conf)
+        assert len(self.mr.templates) == 0
+
+    @benchmark
+    def test_templates_cache_benchmark(self):
+        """ Compare the number of command lines resolved per second with and without the
+        templates cache
+
+        :return: None
+        """
+        (svc, hst) = self.get_hst_svc()
+        count = 10000
+        for cache_size in [0, MacroResolver.templates_cache_size]:
+            self.mr.templates_cache_size = cache_size
+            self.mr.templates.clear()
+            now = time.time()
+            for _ in range(count):
+                self.mr.resolve_command(svc.check_command, [hst, svc],
+                                        self._scheduler.macromodulations,
+                                        self._scheduler.timeperiods)
+            elapsed = time.time() - now
+            print("Templates cache size: %d, %d resolutions per second"
+                  % (cache_size, count / elapsed))
+        del self.mr.templates_cache_size
+
+
 class TestMacroResolverWithEnv(MacroResolverTester, AlignakTest):
     """Test without enabled environment macros"""
 
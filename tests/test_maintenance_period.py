@@ -97,6 +97,8 @@ class TestMaintenancePeriod(AlignakTest):
         timeperiod.explode()
         self._scheduler.timeperiods[timeperiod.uuid] = timeperiod
         host.maintenance_period = timeperiod.uuid
+        # Notify the scheduler of the new host maintenance period
+        host.deadlines_changed()
 
         # Make the host be UP again
         self.scheduler_loop(1, [[host, 0, 'UP']])
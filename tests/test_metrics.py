@@ -23,12 +23,18 @@ This file contains the tests for the internal metrics module
 """
 
 import re
+import time
 import pickle
+import shutil
+import tempfile
 import threading
 import requests_mock
 from alignak.stats import *
 from alignak.modulesmanager import ModulesManager
 from alignak.brok import Brok
+from alignak.misc.metrics_batch import MetricsBatch
+from alignak.misc.metrics_sender import MetricsSender
+from alignak.misc.metrics_spool import MetricsSpool
 
 from .alignak_test import AlignakTest
 
@@ -750,3 +756,365 @@ class TestMetricsRun(AlignakTest):
         self.show_logs()
         self.assert_log_count(0)
         print(my_module.my_metrics)
+
+    def test_inner_module_broks_batch(self):
+        """ Test that the broker gives its broks to the inner metrics module by batches
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_metrics.cfg',
+                             dispatching=True)
+
+        my_module = self._broker_daemon.modules_manager.instances[0]
+        assert my_module.is_external is False
+
+        # A big backlog of broks
+        count = 10000
+        for index in range(count):
+            b = Brok({'data': {'host_name': 'host_%d' % index}, 'type': 'initial_host_status'},
+                     False)
+            b.to_be_sent = False
+            self._broker_daemon.external_broks.append(b)
+
+        # No time to manage the broks, at most one batch is managed
+        self._broker_daemon.broks_batch_size = 1000
+        self._broker_daemon.broks_management_max_duration = 0
+        managed = self._broker_daemon.manage_external_broks()
+        assert managed <= 1000
+        assert len(self._broker_daemon.external_broks) == count - managed
+
+        # Manage all the broks
+        self._broker_daemon.broks_management_max_duration = 60
+        managed += self._broker_daemon.manage_external_broks()
+        assert managed == count
+        assert not self._broker_daemon.external_broks
+        assert len(my_module.hosts_cache) == count
+        # The oldest broks are managed first
+        assert list(my_module.hosts_cache)[0] == 'host_0'
+
+    def test_inner_module_spool(self):
+        """ Test that the inner metrics module spools the metrics when the TSDB is not available
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_metrics.cfg',
+                             dispatching=True)
+
+        my_module = self._broker_daemon.modules_manager.instances[0]
+        my_module.graphite_enabled = False
+        my_module.influxdb_enabled = False
+        spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, spool_dir)
+        my_module.spool = MetricsSpool(spool_dir, segment_size=10, max_segments=3)
+        my_module.metrics_flush_count = 5
+        my_module.metrics_max_count = 8
+
+        def send(index):
+            my_module.send_to_tsdb('All', 'host', 'svc', [('metric', index, '')],
+                                   1000 + index, 'host.svc')
+
+        # The output file can not be written, the metrics are spooled on disk
+        my_module.output_file = os.path.join(spool_dir, 'missing', 'metrics.log')
+        for index in range(40):
+            send(index)
+        assert my_module.metrics_count == 4
+        # The oldest segment was dropped, it was closed by the first failed replay
+        assert my_module.spool_depth == 27
+        assert my_module.metrics_dropped == 9
+        assert len(my_module.spool.segments) == 3
+        # The spool is restored from its directory
+        assert MetricsSpool(spool_dir).depth == 27
+
+        # The output file is available, the oldest spooled segment is replayed
+        my_module.output_file = os.path.join(spool_dir, 'metrics.log')
+        my_module.last_failure = 0
+        send(40)
+        assert my_module.metrics_count == 0
+        assert my_module.metrics_replayed == 10
+        assert my_module.spool_depth == 17
+
+        my_module.spool_replay_segments = 5
+        send(41)
+        assert my_module.flush() is True
+        assert my_module.metrics_replayed == 27
+        assert my_module.spool_depth == 0
+        assert os.listdir(spool_dir) == ['metrics.log']
+
+        with open(my_module.output_file) as fp:
+            times = [int(line.split(';')[0]) for line in fp]
+        # The spooled metrics are sent before the inner stored ones
+        assert times == list(range(1009, 1019)) + list(range(1036, 1041)) + \
+            list(range(1019, 1036)) + [1041]
+
+        # Without spool, the oldest metrics are dropped
+        my_module.spool = None
+        my_module.output_file = os.path.join(spool_dir, 'missing', 'metrics.log')
+        for index in range(10):
+            send(index)
+        assert my_module.metrics_count == 8
+        assert my_module.metrics_dropped == 11
+        assert my_module.my_metrics.times[0] == 1002
+
+    def test_inner_module_influxdb_retry(self):
+        """ Test that a failed InfluxDB write does not modify the stored metrics
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_metrics.cfg',
+                             dispatching=True)
+
+        class FakeInflux(object):
+            def __init__(self):
+                self.points = []
+                self.available = False
+
+            def write_points(self, points, protocol='json'):
+                assert protocol == 'line'
+                if not self.available:
+                    raise Exception("InfluxDB is not available")
+                self.points.extend(points)
+                return True
+
+        my_module = self._broker_daemon.modules_manager.instances[0]
+        my_module.graphite_enabled = False
+        my_module.output_file = ''
+        my_module.influxdb_enabled = True
+        my_module.influx = FakeInflux()
+        my_module.metrics_flush_count = 100
+        my_module.send_to_tsdb('All', 'host', 'svc', [('metric', '12', '')], 1000, 'host.svc')
+
+        assert my_module.send_metrics(my_module.my_metrics) is False
+        assert my_module.send_metrics(my_module.my_metrics) is False
+        assert my_module.my_metrics.times == [1000]
+        assert my_module.my_metrics.values == ['12']
+
+        my_module.influx.available = True
+        assert my_module.send_metrics(my_module.my_metrics) is True
+        assert my_module.influx.points == [
+            'svc,host=host,path=host.svc,realm=All,service=svc metric=12.0 1000000000000'
+        ]
+
+    def test_inner_module_sender_thread(self):
+        """ Test that the inner metrics module sends the metrics from a thread for each target
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_metrics.cfg',
+                             dispatching=True)
+
+        my_module = self._broker_daemon.modules_manager.instances[0]
+        my_module.graphite_enabled = False
+        my_module.influxdb_enabled = False
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        my_module.output_file = os.path.join(output_dir, 'metrics.log')
+        my_module.metrics_flush_count = 5
+        my_module.metrics_flush_pause = 0.1
+        my_module.metrics_sender_queue_size = 2
+        my_module.start_senders()
+        self.addCleanup(my_module.quit)
+        sender = my_module.senders['file']
+
+        def send(count):
+            for _ in range(count):
+                my_module.send_to_tsdb('All', 'host', 'svc', [('metric', 1, '')],
+                                       1000, 'host.svc')
+
+        def wait_sent():
+            for _ in range(50):
+                if not sender.queue:
+                    break
+                time.sleep(0.1)
+            assert not sender.queue
+
+        def lines():
+            with open(my_module.output_file) as fp:
+                return len(fp.readlines())
+
+        send(10)
+        assert my_module.metrics_count == 0
+        wait_sent()
+        assert lines() == 10
+        assert sender.sent == 10
+
+        # The target is not available, the senders queues are filled, then the metrics
+        # are kept in the module
+        my_module.output_file = os.path.join(output_dir, 'missing', 'metrics.log')
+        send(15)
+        assert my_module.backpressure is True
+        assert my_module.metrics_count == 5
+        assert len(sender.queue) == 2
+        time.sleep(0.3)
+        assert sender.failing is True
+        assert sender.failures >= 1
+
+        # The target is available again
+        my_module.output_file = os.path.join(output_dir, 'metrics.log')
+        wait_sent()
+        assert my_module.flush() is True
+        assert my_module.backpressure is False
+        assert my_module.metrics_count == 0
+        wait_sent()
+        assert lines() == 25
+        assert sender.failing is False
+        assert sum([count for _, count in sender.get_latencies()]) == 5 + sender.failures
+
+        my_module.quit()
+        assert not sender.is_alive()
+        assert my_module.senders == {}
+
+    def test_inner_module_sender_thread_spool(self):
+        """ Test that the metrics not sent by the sender threads are spooled when they stop
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_metrics.cfg',
+                             dispatching=True)
+
+        my_module = self._broker_daemon.modules_manager.instances[0]
+        my_module.graphite_enabled = False
+        my_module.influxdb_enabled = False
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        my_module.spool = MetricsSpool(os.path.join(output_dir, 'spool'), segment_size=10)
+        my_module.spool_replay_segments = 5
+        my_module.metrics_flush_count = 100
+        # Do not retry sending during the test
+        my_module.metrics_flush_pause = 60
+        self.addCleanup(my_module.quit)
+
+        def send(start, count):
+            for index in range(start, start + count):
+                my_module.send_to_tsdb('All', 'host', 'svc', [('metric', index, '')],
+                                       1000 + index, 'host.svc')
+
+        # Some metrics were spooled before
+        send(0, 10)
+        my_module.spool.append(my_module.my_metrics.to_list())
+        my_module.my_metrics.drop_oldest(10)
+        assert my_module.spool_depth == 10
+
+        # The target is not available, the spooled metrics are handed off first
+        my_module.output_file = os.path.join(output_dir, 'missing', 'metrics.log')
+        my_module.start_senders()
+        sender = my_module.senders['file']
+        my_module.metrics_flush_count = 5
+        send(10, 5)
+        assert my_module.metrics_count == 0
+        assert my_module.spool_depth == 0
+        assert len(sender.queue) == 2
+        for _ in range(50):
+            if sender.failing:
+                break
+            time.sleep(0.1)
+        assert sender.failing is True
+
+        # The senders are stopped, their metrics are spooled again for their target only
+        my_module.stop_senders()
+        assert my_module.senders == {}
+        assert my_module.spool_depth == 15
+        assert len(my_module.spool) == 0
+        assert len(my_module.targets_spools['file']) == 15
+
+        # The target is available, the spooled metrics are sent before the new ones
+        my_module.output_file = os.path.join(output_dir, 'metrics.log')
+        my_module.metrics_flush_count = 1
+        send(15, 1)
+        assert my_module.spool_depth == 0
+        with open(my_module.output_file) as fp:
+            times = [int(line.split(';')[0]) for line in fp]
+        assert times == list(range(1000, 1016))
+
+    def test_inner_module_sender_thread_spool_targets(self):
+        """ Test that the metrics not sent by a sender thread are only replayed to its target
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_metrics.cfg',
+                             dispatching=True)
+
+        my_module = self._broker_daemon.modules_manager.instances[0]
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        my_module.spool = MetricsSpool(os.path.join(output_dir, 'spool'), segment_size=10)
+        my_module.spool_replay_segments = 5
+
+        def batch(start, count):
+            metrics = MetricsBatch()
+            for index in range(start, start + count):
+                metrics.add(1000 + index, 'svc', 'host', 'All', 'host.svc',
+                            [('metric', index, '')])
+            return metrics
+
+        # The first batch was sent to graphite but not to influxdb
+        graphite = MetricsSender('graphite', lambda batch: True)
+        influxdb = MetricsSender('influxdb', lambda batch: True)
+        graphite.put(batch(5, 5))
+        influxdb.put(batch(0, 5))
+        influxdb.put(batch(5, 5))
+
+        # The file sender is still sending its head batch when it is stopped
+        sending = threading.Event()
+        release = threading.Event()
+
+        def send_file(_):
+            sending.set()
+            release.wait(10)
+            return True
+        output_file = MetricsSender('file', send_file)
+        output_file.stop = lambda: MetricsSender.stop(output_file, timeout=0.1)
+        output_file.put(batch(0, 5))
+        output_file.put(batch(5, 5))
+        output_file.start()
+        self.addCleanup(release.set)
+        assert sending.wait(5)
+
+        my_module.senders = {'graphite': graphite, 'influxdb': influxdb, 'file': output_file}
+        my_module.stop_senders()
+        assert my_module.senders == {}
+        assert len(my_module.spool) == 0
+        assert sorted(my_module.targets_spools) == ['file', 'graphite', 'influxdb']
+        assert len(my_module.targets_spools['graphite']) == 5
+        assert len(my_module.targets_spools['influxdb']) == 10
+        # The batch being sent is not spooled
+        assert len(my_module.targets_spools['file']) == 5
+        assert my_module.spool_depth == 20
+        # The target spools are restored from the spool directory
+        assert MetricsSpool(os.path.join(output_dir, 'spool', 'target-influxdb')).depth == 10
+
+        # Each target spool is replayed to its own sender
+        my_module.senders = {
+            'graphite': MetricsSender('graphite', lambda batch: True),
+            'influxdb': MetricsSender('influxdb', lambda batch: True),
+            'file': MetricsSender('file', lambda batch: True)
+        }
+        my_module.my_metrics = batch(10, 1)
+        assert my_module.flush() is True
+        assert my_module.spool_depth == 0
+        assert [len(b) for b in my_module.senders['graphite'].queue] == [5, 1]
+        assert [len(b) for b in my_module.senders['influxdb'].queue] == [10, 1]
+        assert [len(b) for b in my_module.senders['file'].queue] == [5, 1]
+        my_module.senders = {}
+
+    def test_inner_module_broks_batch_exception(self):
+        """ Test that a brok raising an exception does not lose the next broks of the batch
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_metrics.cfg',
+                             dispatching=True)
+
+        my_module = self._broker_daemon.modules_manager.instances[0]
+        assert my_module.is_external is False
+
+        # The second brok has no host name
+        broks = []
+        for data in [{'host_name': 'host_0'}, {}, {'host_name': 'host_1'}]:
+            b = Brok({'data': data, 'type': 'initial_host_status'}, False)
+            b.to_be_sent = False
+            broks.append(b)
+
+        self._broker_daemon.manage_broks(broks)
+        assert list(my_module.hosts_cache) == ['host_0', 'host_1']
+        # The module is tagged to be restarted
+        assert my_module in self._broker_daemon.modules_manager.to_restart
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+This file tests the columnar metrics batch and its encoders
+"""
+
+import sys
+import time
+import struct
+import pickle
+from influxdb.line_protocol import make_lines
+from .alignak_test import AlignakTest, benchmark
+from alignak.misc.metrics_batch import MetricsBatch
+
+
+class TestMetricsBatch(AlignakTest):
+    """
+    This class tests the columnar metrics batch
+    """
+    def setUp(self):
+        super(TestMetricsBatch, self).setUp()
+
+    def _metrics(self, index=0):
+        return [('rta', 0.049 + index, 'ms'), ('uom_rta', 'ms', 'ms'),
+                ('pl', 0.0, '%'), ('uom_pl', '%', '%')]
+
+    def _sorted_fields(self, lines):
+        # The InfluxDB client sorts the fields by name
+        result = []
+        for line in lines:
+            series, fields, ts = line.rsplit(' ', 2)
+            result.append(' '.join([series, ','.join(sorted(fields.split(','))), ts]))
+        return result
+
+    def _batch(self, count=2):
+        batch = MetricsBatch()
+        for index in range(count):
+            batch.add(1000 + index, 'ping', 'host_%d' % index, 'All',
+                      'All.host_%d.ping' % index, self._metrics(index))
+        return batch
+
+    def test_encoders(self):
+        """ Test the metrics batch encoders
+
+        :return: None
+        """
+        batch = self._batch()
+        assert len(batch) == 2
+
+        message = batch.to_graphite_pickle('prefix')
+        assert struct.unpack("!L", message[:4])[0] == len(message) - 4
+        assert pickle.loads(message[4:]) == [
+            ('prefix.All.host_0.ping.rta', (1000, 0.049)),
+            ('prefix.All.host_0.ping.uom_rta', (1000, 'ms')),
+            ('prefix.All.host_0.ping.pl', (1000, 0.0)),
+            ('prefix.All.host_0.ping.uom_pl', (1000, '%')),
+            ('prefix.All.host_1.ping.rta', (1001, 1.049)),
+            ('prefix.All.host_1.ping.uom_rta', (1001, 'ms')),
+            ('prefix.All.host_1.ping.pl', (1001, 0.0)),
+            ('prefix.All.host_1.ping.uom_pl', (1001, '%'))
+        ]
+
+        # Only the numeric values
+        assert batch.to_graphite_plaintext('prefix') == \
+            b'prefix.All.host_0.ping.rta 0.049 1000\n' \
+            b'prefix.All.host_0.ping.pl 0.0 1000\n' \
+            b'prefix.All.host_1.ping.rta 1.049 1001\n' \
+            b'prefix.All.host_1.ping.pl 0.0 1001\n'
+
+        assert batch.to_text().splitlines()[:2] == [
+            '1000;All.host_0.ping.rta;0.049', '1000;All.host_0.ping.uom_rta;ms'
+        ]
+
+        # Same lines as the InfluxDB client for the same points
+        points = []
+        for index in range(2):
+            points.append({
+                'measurement': 'ping',
+                'tags': {'host': 'host_%d' % index, 'service': 'ping', 'realm': 'All',
+                         'path': 'All.host_%d.ping' % index, 'site': 'a b'},
+                'time': (1000 + index) * 1000000000,
+                'fields': {'rta': 0.049 + index, 'uom_rta': 'ms', 'pl': 0.0, 'uom_pl': '%'}
+            })
+        lines = batch.to_influxdb_lines({'site': 'a b'})
+        assert self._sorted_fields(lines) == make_lines({'points': points}).splitlines()
+
+        # Values converted to float, empty tags and unknown values ignored
+        batch = MetricsBatch()
+        batch.add(1000, 'my service', 'host', '', None,
+                  [('value', '12', ''), ('none', None, ''), ('uom_value', 'B"', '')])
+        batch.add(1000, 'my service', 'host', '', None, [('none', None, '')])
+        assert batch.to_influxdb_lines() == [
+            'my\\ service,host=host,service=my\\ service value=12.0,uom_value="B\\"" '
+            '1000000000000'
+        ]
+
+        # Non ASCII names, tags and values
+        batch = MetricsBatch()
+        batch.add(1000, u'Température', u'hôte', u'All', None, [(u'état', u'élevé', u'')])
+        assert batch.to_influxdb_lines({u'site': u'Zürich'}) == [
+            u'Température,host=hôte,realm=All,service=Température,site=Zürich '
+            u'état="élevé" 1000000000000'
+        ]
+
+    def test_drop_oldest(self):
+        """ Test the metrics batch entries removal and list conversion
+
+        :return: None
+        """
+        batch = self._batch(5)
+        batch.drop_oldest(2)
+        assert len(batch) == 3
+        assert batch.hosts == ['host_2', 'host_3', 'host_4']
+        assert batch.offsets == [0, 4, 8]
+        assert batch.values[0] == 2.049
+
+        entries = batch.to_list()
+        assert entries[0] == [1002, 'ping', 'host_2', 'All', 'All.host_2.ping',
+                              ['rta', 'uom_rta', 'pl', 'uom_pl'], [2.049, 'ms', 0.0, '%']]
+        assert MetricsBatch.from_list(entries).to_list() == entries
+
+        batch.drop_oldest(3)
+        assert len(batch) == 0
+        assert batch.names == []
+
+    @benchmark
+    def test_metrics_batch_benchmark(self):
+        """ Compare the time and memory blocks needed to store and encode
+        1M points as dictionaries and as a columnar batch
+
+        :return: None
+        """
+        count = 250000
+        results = {}
+
+        def store_dicts():
+            # As the former inner metrics module: a dictionary per check result
+            my_metrics = []
+            for index in range(count):
+                data = {
+                    "measurement": 'ping',
+                    "tags": {"host": 'host_%d' % index, "service": 'ping',
+                             "realm": 'All', "path": 'All.host_%d.ping' % index},
+                    "time": 1000 + index,
+                    "fields": {}
+                }
+                for metric, value, _ in self._metrics(index):
+                    data['fields'].update({metric: value})
+                my_metrics.append(data)
+            return my_metrics
+
+        def encode_dicts(my_metrics):
+            carbon_data = []
+            for metric in my_metrics:
+                path = metric['tags']['path']
+                for name, value in metric['fields'].items():
+                    carbon_data.append(('.'.join(['prefix', '.'.join([path, name])]),
+                                        (metric['time'], value)))
+            payload = pickle.dumps(carbon_data, protocol=2)
+            graphite = struct.pack("!L", len(payload)) + payload
+
+            for metric in my_metrics:
+                metric['time'] *= 1000000000
+                for name, value in metric['fields'].items():
+                    if name.startswith('uom_'):
+                        continue
+                    if not isinstance(value, float):
+                        try:
+                            value = float(value)
+                        except Exception:  # pylint: disable=broad-except
+                            pass
+                        metric['fields'][name] = value
+            # As done by the InfluxDB client for the JSON points
+            influx = make_lines({'points': my_metrics}).rstrip('\n')
+            return graphite, influx
+
+        def store_batch():
+            batch = MetricsBatch()
+            for index in range(count):
+                batch.add(1000 + index, 'ping', 'host_%d' % index, 'All',
+                          'All.host_%d.ping' % index, self._metrics(index))
+            return batch
+
+        def encode_batch(batch):
+            return batch.to_graphite_pickle('prefix'), '\n'.join(batch.to_influxdb_lines())
+
+        # Not available with Python 2
+        getallocatedblocks = getattr(sys, 'getallocatedblocks', lambda: 0)
+        for name, store, encode in [('dictionaries', store_dicts, encode_dicts),
+                                    ('columnar batch', store_batch, encode_batch)]:
+            blocks = getallocatedblocks()
+            now = time.time()
+            stored = store()
+            stored_blocks = getallocatedblocks() - blocks
+            graphite, influx = encode(stored)
+            elapsed = time.time() - now
+            del stored
+
+            results[name] = (len(graphite), len(influx))
+            print("%s, %d points: %.3f s, %d memory blocks stored"
+                  % (name, count * 4, elapsed, stored_blocks))
+
+        # Same encoded messages sizes
+        assert results['dictionaries'] == results['columnar batch']
@@ -49,9 +49,56 @@
 This file is used to test reading and processing of config files
 """
 
-from alignak.misc.perfdata import Metric, PerfDatas
+import re
+import time
+from alignak.util import to_best_int_float
+from alignak.misc.perfdata import (Metric, PerfDatas, PERFDATA_SPLIT_PATTERN, METRIC_PATTERN,
+                                   sanitize_name)
 
-from .alignak_test import AlignakTest
+from .alignak_test import AlignakTest, benchmark
+
+# Realistic plugins performance data
+PLUGINS_PERF_DATA = [
+    "rta=0.049000ms;2.000000;3.000000;0.000000 pl=0%;50;80;0",
+    "load1=0.150;15.000;30.000;0; load5=0.080;10.000;25.000;0; "
+    "load15=0.050;5.000;20.000;0;",
+    "/=2643MB;5948;5958;0;5968 /boot=68MB;88;93;0;98 /home=69357MB;253404;253409;0;253414",
+    "time=0.003403s;;;0.000000 size=1268B;;;0",
+    "'C:\\ Used Space'=35.07Gb;39.98;44.98;0.00;49.98 'C:\\ Utilisation'=70.17%;80;90;",
+    "users=3;5;10;0",
+    "procs=182;250;400;0;",
+    "ramused=1009MB;;;0;1982 swapused=540MB;;;0;3827 memused=1550MB;2973;3964;0;5810",
+    "inUsage=0.00%;85;98 outUsage=0.00%;85;98 inBandwidth=1013.52bps "
+    "outBandwidth=1203.96bps inAbsolut=25043417734 outAbsolut=42396498126",
+    "offset=-0.000261s;60.000000;120.000000;",
+]
+
+
+def to_number(val):
+    try:
+        return to_best_int_float(val)
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_regex(perf_data):
+    # As the former PerfDatas class
+    metrics = {}
+    for elem in [e for e in PERFDATA_SPLIT_PATTERN.findall(perf_data) if e != '']:
+        matches = METRIC_PATTERN.match(elem.strip())
+        if matches:
+            metric = [matches.group(1).replace("'", ""),
+                      to_number(matches.group(2)), matches.group(3)] + \
+                [to_number(matches.group(index)) for index in range(4, 8)]
+            if metric[2] == '%':
+                metric[5:7] = [0, 100]
+            metrics[metric[0]] = metric
+    return list(metrics.values())
+
+
+def parse(perf_data):
+    return [[metric.name, metric.value, metric.uom, metric.warning, metric.critical,
+             metric.min, metric.max] for metric in PerfDatas(perf_data)]
 
 
 class TestPerfdataParsing(AlignakTest):
@@ -253,3 +300,67 @@ class TestPerfdataParsing(AlignakTest):
         perf_data_string = ''
         perf_data = PerfDatas(perf_data_string)
         assert len(perf_data) == 0
+
+    def test_perfdata_unusual_strings(self):
+        """ Parse some unusual performance data as the regular expressions do
+        """
+        # Threshold directly after the unit
+        metric = Metric('load=42ab+4;5')
+        assert (metric.value, metric.uom, metric.warning, metric.critical) == (42, 'ab', 4, 5)
+        # The unit stops at the first unexpected character
+        metric = Metric('load=42ms(x);5')
+        assert (metric.value, metric.uom, metric.warning) == (42, 'ms', None)
+        # A threshold stops at the first unexpected character
+        metric = Metric('load=42;10x;20')
+        assert (metric.warning, metric.critical) == (10, None)
+        # Ranges are only allowed for warning and critical
+        metric = Metric('load=1;@5:10;~:20;0:1;2')
+        assert (metric.warning, metric.critical, metric.min, metric.max) == \
+            (None, None, 0, None)
+        # No value
+        metric = Metric('load=U;5')
+        assert metric.name is None
+
+        # Leading equal sign and empty values
+        perf_data = PerfDatas('=rta=5ms a= b=1 c =2')
+        assert sorted(perf_data.metrics) == ['b', 'c ', 'rta']
+
+    def test_perfdata_parsing_regex(self):
+        """ Test that the parser gets the same metrics as the former regular expressions
+
+        :return: None
+        """
+        for perf_data in PLUGINS_PERF_DATA:
+            assert parse(perf_data) == parse_regex(perf_data)
+
+    @benchmark
+    def test_perfdata_parsing_benchmark(self):
+        """ Compare the parsing of realistic plugins performance data with the regular
+        expressions and with the parser, and the metrics names sanitization with a cache
+        """
+        count = 100000
+        perf_datas = [PLUGINS_PERF_DATA[index % len(PLUGINS_PERF_DATA)]
+                      for index in range(count)]
+        multiple_values = re.compile(r'_(\d+)$')
+
+        names = {}
+
+        def sanitize(label):
+            return multiple_values.sub(r'.\1', sanitize_name(label))
+
+        def cached(label):
+            name = names.get(label)
+            if name is None:
+                name = names[label] = sanitize(label)
+            return name
+
+        for label, parser, get_name in [('regular expressions', parse_regex, sanitize),
+                                        ('parser and names cache', parse, cached)]:
+            now = time.time()
+            metrics = 0
+            for perf_data in perf_datas:
+                for metric in parser(perf_data):
+                    get_name(metric[0])
+                    metrics += 1
+            print("%s, %d performance data, %d metrics: %.3f s"
+                  % (label, count, metrics, time.time() - now))
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+This file tests the shared memory results ring between the workers and their satellite
+"""
+
+import os
+import time
+import pickle
+from multiprocessing import Process, Queue
+from .alignak_test import AlignakTest, benchmark
+from alignak.action import ACT_STATUS_DONE, ACT_STATUS_TIMEOUT, ACT_STATUS_QUEUED, RESULT_PROP
+from alignak.check import Check
+from alignak.message import Message
+from alignak.worker import Worker
+from alignak.misc.results_ring import ResultsRing
+
+
+def _check(index, output=u'OK - all is fine', status=ACT_STATUS_DONE):
+    check = Check({'command': 'libexec/dummy_command.sh 0 0'})
+    check.status = status
+    check.exit_status = index % 4
+    check.output = output
+    check.long_output = u'Line 1\nLine 2 é'
+    check.perf_data = u'rta=%dms' % index
+    check.check_time = 1500000000.5 + index
+    check.execution_time = 0.25
+    check.u_time = 0.125
+    check.s_time = 0.0625
+    return check
+
+
+def _put_checks(ring, count):
+    # Run in a child process, as a worker
+    for index in range(count):
+        while not ring.put(_check(index)):
+            time.sleep(0.001)
+
+
+def _die_locked(ring):
+    # Run in a child process, as a worker killed while writing a result
+    ring.lock.acquire()
+    os._exit(1)
+
+
+class TestResultsRing(AlignakTest):
+    """
+    This class tests the workers results ring
+    """
+    def setUp(self):
+        super(TestResultsRing, self).setUp()
+
+    def _result(self, check):
+        result = check.get_result()
+        del result['is_a']
+        return result
+
+    def test_results_ring(self):
+        """ Test writing and reading results in the ring
+
+        :return: None
+        """
+        ring = ResultsRing(slots=4, arena_size=1024)
+        assert len(ring) == 0
+        assert ring.get_results() == []
+
+        checks = [_check(0), _check(1, status=ACT_STATUS_TIMEOUT)]
+        for check in checks:
+            assert ring.put(check)
+        assert len(ring) == 2
+        assert ring.get_results() == [self._result(check) for check in checks]
+        assert len(ring) == 0
+
+        # Ring full
+        for index in range(4):
+            assert ring.put(_check(index))
+        assert not ring.put(_check(4))
+        assert ring.overflows == 1
+        assert len(ring.get_results()) == 4
+
+        # Output too long, not finished action or not an uuid
+        assert not ring.put(_check(0, output=u'x' * 300))
+        assert not ring.put(_check(0, status=ACT_STATUS_QUEUED))
+        check = _check(0)
+        check.uuid = 1
+        assert not ring.put(check)
+
+        # The texts are never split at the end of the arena
+        checks = []
+        for index in range(40):
+            check = _check(index, output=u'Output %d ' % index + u'x' * (index * 5))
+            assert ring.put(check)
+            checks.append(check)
+            if index % 3 == 2:
+                assert ring.get_results() == [self._result(check) for check in checks]
+                checks = []
+        assert ring.get_results() == [self._result(check) for check in checks]
+
+        # Arena full: the results are not read
+        ring = ResultsRing(slots=16, arena_size=1024)
+        for index in range(4):
+            assert ring.put(_check(index, output=u'x' * 200))
+        assert not ring.put(_check(4, output=u'x' * 200))
+        assert len(ring.get_results()) == 4
+        assert ring.put(_check(4, output=u'x' * 200))
+
+    def test_results_ring_processes(self):
+        """ Test the results written by another process
+
+        :return: None
+        """
+        ring = ResultsRing(slots=16, arena_size=1024)
+        process = Process(target=_put_checks, args=(ring, 200))
+        process.start()
+
+        results = []
+        start = time.time()
+        while len(results) < 200 and time.time() - start < 30:
+            results.extend(ring.get_results())
+            time.sleep(0.001)
+        process.join(10)
+
+        assert [result['perf_data'] for result in results] == \
+            [u'rta=%dms' % index for index in range(200)]
+        # The checks identifiers are created in the child process
+        expected = self._result(_check(199))
+        expected['uuid'] = results[-1]['uuid']
+        assert results[-1] == expected
+
+    def test_results_ring_dead_worker(self):
+        """ Test that the results of a worker that died holding the ring lock are not read
+
+        :return: None
+        """
+        ring = ResultsRing(slots=4, arena_size=1024)
+        assert ring.put(_check(0))
+        process = Process(target=_die_locked, args=(ring, ))
+        process.start()
+        process.join(10)
+        assert not process.is_alive()
+
+        start = time.time()
+        assert ring.get_results(timeout=0.1) is None
+        assert time.time() - start < 5
+
+    def test_worker_results_ring(self):
+        """ Test a worker sending its results in the ring, and in the returns queue
+        when the ring is full
+
+        :return: None
+        """
+        actions_queue = Queue()
+        returns_queue = Queue()
+        ring = ResultsRing(slots=1, arena_size=1024)
+
+        worker = Worker('fork', actions_queue, returns_queue, 2, results_ring=ring)
+        checks = []
+        for index in range(2):
+            check = Check({'command': 'libexec/dummy_command.sh %d 0' % index,
+                           'timeout': 10, 'module_type': 'fork'})
+            check.status = ACT_STATUS_QUEUED
+            checks.append(check)
+            actions_queue.put(Message(_type='Do', data=check))
+
+        start = time.time()
+        while len(worker.checks) < 2 and time.time() - start < 5:
+            worker.get_new_checks(actions_queue, returns_queue)
+        worker.launch_new_checks()
+        start = time.time()
+        while worker.checks and time.time() - start < 10:
+            worker.manage_finished_checks(returns_queue)
+
+        results = worker.get_ring_results()
+        assert len(results) == 1
+        returned = returns_queue.get(timeout=5).get_data()
+        assert returned.uuid != results[0]['uuid']
+        assert set([returned.uuid, results[0]['uuid']]) == set([check.uuid for check in checks])
+        assert set(results[0].keys()) == set(RESULT_PROP) - set(['is_a'])
+        assert results[0]['status'] == ACT_STATUS_DONE
+        assert results[0]['output'] == returned.output == \
+            u"Hi, I'm for testing only. Please do not use me directly, really"
+        assert results[0]['perf_data'] == returned.perf_data == u'Hip=99% Hop=34mm'
+
+        actions_queue.close()
+        returns_queue.close()
+
+    @benchmark
+    def test_results_ring_benchmark(self):
+        """ Compare the time needed to send back the actions results pickled
+        in messages and written in the results ring
+
+        :return: None
+        """
+        count = 20000
+        checks = [_check(index) for index in range(count)]
+        ring = ResultsRing(slots=count, arena_size=count * 64)
+
+        now = time.time()
+        for check in checks:
+            # As done by a queue: pickle the message, then un-pickle it
+            pickle.loads(pickle.dumps(Message(_type='Done', data=check, source='worker')))
+        pickled = time.time() - now
+
+        now = time.time()
+        for check in checks:
+            ring.put(check)
+        results = ring.get_results()
+        shared = time.time() - now
+        print("%d results, pickled messages: %.3f s, results ring: %.3f s"
+              % (count, pickled, shared))
+
+        assert len(results) == count
@@ -24,6 +24,7 @@ This file test the cleaning queue in scheduler
 
 import time
 from .alignak_test import AlignakTest
+from alignak.brok import Brok
 
 
 class TestSchedulerCleanQueue(AlignakTest):
@@ -90,6 +91,8 @@ class TestSchedulerCleanQueue(AlignakTest):
         assert len(broks) > broks_limit
 
         # Change broks cleaning period to force cleaning
+        # and allow to drop any brok, even the monitoring logs
+        self._scheduler.pushed_conf.broks_kept_types = []
         self._scheduler.pushed_conf.tick_clean_queues = 1
         self._scheduler.update_recurrent_works_tick({'tick_clean_queues': 1})
 
@@ -153,6 +156,43 @@ class TestSchedulerCleanQueue(AlignakTest):
         self.scheduler_loop(1, [[host, 0, 'UP'], [svc, 1, 'WARNING']])
         assert len(self._scheduler.checks) <= check_limit
 
+    def test_shed_broks(self):
+        """ Test the broks shedding policy
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_default.cfg',
+                             dispatching=True)
+
+        broks = [Brok({'type': brok_type, 'data': {}}) for brok_type in
+                 ['monitoring_log', 'host_check_result', 'update_program_status',
+                  'monitoring_log', 'service_next_schedule', 'host_check_result',
+                  'update_program_status', 'service_check_result']]
+
+        # Low value broks are dropped first, oldest first
+        kept, dropped = self._scheduler.shed_broks(broks, 6)
+        assert [broks.index(brok) for brok in kept] == [0, 1, 3, 5, 6, 7]
+        assert dropped == {'update_program_status': 1, 'service_next_schedule': 1}
+
+        # Then the oldest broks, except the monitoring logs
+        kept, dropped = self._scheduler.shed_broks(broks, 3)
+        assert [broks.index(brok) for brok in kept] == [0, 3, 7]
+        assert dropped == {'update_program_status': 2, 'service_next_schedule': 1,
+                           'host_check_result': 2}
+
+        # Monitoring logs are never dropped
+        kept, dropped = self._scheduler.shed_broks(broks, 1)
+        assert [broks.index(brok) for brok in kept] == [0, 3]
+
+        # The scheduler counts the dropped broks
+        broker_link = list(self._scheduler.my_daemon.brokers.values())[0]
+        self._scheduler.pushed_conf.tick_clean_queues = 1
+        broker_link.broks = [brok for brok in broks if brok.type != 'monitoring_log'] * 100
+        self._scheduler.clean_queues()
+        assert self._scheduler.nb_broks_dropped == 600 - len(broker_link.broks)
+        assert len(broker_link.broks) == 5 * (len(self._scheduler.hosts) +
+                                              len(self._scheduler.services))
+
     def test_clean_actions(self):
         """ Test clean actions in scheduler (like notifications)
 
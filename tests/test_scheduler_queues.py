@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2015-2018: Alignak team, see AUTHORS.txt file for contributors
+#
+# This file is part of Alignak.
+#
+# Alignak is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Alignak is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with Alignak.  If not, see <http://www.gnu.org/licenses/>.
+#
+"""
+This file test the scheduler checks and actions registry
+"""
+
+import copy
+import time
+from .alignak_test import AlignakTest
+from alignak.check import Check
+from alignak.eventhandler import EventHandler
+from alignak.notification import Notification
+from alignak.action import (ACT_STATUS_SCHEDULED, ACT_STATUS_POLLED, ACT_STATUS_ZOMBIE,
+                            ACT_STATUS_WAIT_CONSUME)
+from alignak.scheduler import (ActionsRegistry, ACTIONS_QUEUE_INTERNAL, ACTIONS_QUEUE_MASTER,
+                               HEAP_COMPACTION_MIN_SIZE)
+
+
+class TestSchedulerQueues(AlignakTest):
+    """
+    This class test the scheduler checks and actions registry
+    """
+    def setUp(self):
+        super(TestSchedulerQueues, self).setUp()
+
+    def _check(self, t_to_go, poller_tag=u'None', module_type=u'fork', command=u'check_me'):
+        return Check({'status': ACT_STATUS_SCHEDULED, 'command': command, 'ref': 'host',
+                      't_to_go': t_to_go, 'poller_tag': poller_tag,
+                      'module_type': module_type})
+
+    def test_ready_queues(self):
+        """ Test the checks ready queues
+
+        :return: None
+        """
+        now = time.time()
+        checks = ActionsRegistry('poller_tag')
+        chk_1 = self._check(now - 10)
+        chk_2 = self._check(now - 20)
+        chk_3 = self._check(now + 3600)
+        chk_4 = self._check(now - 10, poller_tag=u'north')
+        chk_5 = self._check(now - 10, module_type=u'nrpe')
+        chk_6 = self._check(now - 10, command=u'_internal_host_check')
+        for chk in [chk_1, chk_2, chk_3, chk_4, chk_5, chk_6]:
+            checks[chk.uuid] = chk
+
+        assert [(u'None', u'fork'), (u'north', u'fork'), (u'None', u'nrpe'),
+                ACTIONS_QUEUE_INTERNAL] == list(checks.ready_queues.keys())
+
+        # Launchable checks, oldest first
+        assert [chk_2, chk_1] == checks.pop_launchable([(u'None', u'fork')], now)
+        # Popped once
+        assert [] == checks.pop_launchable([(u'None', u'fork')], now)
+        assert [chk_4, chk_5] == checks.pop_launchable([(u'north', u'fork'),
+                                                        (u'None', u'nrpe')], now)
+        assert [chk_6] == checks.pop_launchable([ACTIONS_QUEUE_INTERNAL], now)
+
+        # Launch time changed
+        chk_3.t_to_go = now - 1
+        assert [chk_3] == checks.pop_launchable([(u'None', u'fork')], now)
+
+        # Re-scheduled (orphaned)
+        chk_1.status = ACT_STATUS_POLLED
+        chk_1.status = ACT_STATUS_SCHEDULED
+        assert [chk_1] == checks.pop_launchable([(u'None', u'fork')], now)
+
+        # Removed checks are not launched anymore
+        chk_2.t_to_go = now - 5
+        chk_1.t_to_go = now - 5
+        del checks[chk_2.uuid]
+        chk_1.status = ACT_STATUS_ZOMBIE
+        assert [] == checks.pop_launchable([(u'None', u'fork')], now)
+        assert chk_2._listener is None
+
+        checks.clear()
+        assert not checks.ready_queues
+        assert chk_1._listener is None
+
+    def test_ready_queues_compaction(self):
+        """ Test that the stale entries of the ready queues do not accumulate
+
+        :return: None
+        """
+        now = time.time()
+        checks = ActionsRegistry('poller_tag')
+        chk_1 = self._check(now - 10)
+        chk_2 = self._check(now - 10, poller_tag=u'north')
+        for chk in [chk_1, chk_2]:
+            checks[chk.uuid] = chk
+
+        # Each launch time change pushes a new entry
+        for index in range(10 * HEAP_COMPACTION_MIN_SIZE):
+            chk_1.t_to_go = now - index
+            chk_2.t_to_go = now - index
+        entries = sum([len(queue) for queue in checks.ready_queues.values()])
+        assert entries <= HEAP_COMPACTION_MIN_SIZE + 1
+
+        # Removed checks entries are dropped too
+        del checks[chk_2.uuid]
+        for index in range(HEAP_COMPACTION_MIN_SIZE):
+            chk_1.t_to_go = now - index
+        assert [] == checks.ready_queues[(u'north', u'fork')]
+        assert [chk_1] == checks.pop_launchable([(u'None', u'fork'), (u'north', u'fork')], now)
+        assert chk_1.t_to_go == now - HEAP_COMPACTION_MIN_SIZE + 1
+
+    def test_status_index(self):
+        """ Test the checks indexed by status
+
+        :return: None
+        """
+        now = time.time()
+        checks = ActionsRegistry('poller_tag')
+        chk_1 = self._check(now)
+        chk_2 = self._check(now)
+        chk_3 = self._check(now)
+        for chk in [chk_1, chk_2, chk_3]:
+            checks[chk.uuid] = chk
+        assert [chk_1, chk_2, chk_3] == checks.get_by_status(ACT_STATUS_SCHEDULED)
+        assert [] == checks.get_by_status(ACT_STATUS_ZOMBIE)
+
+        chk_3.status = ACT_STATUS_WAIT_CONSUME
+        chk_1.status = ACT_STATUS_WAIT_CONSUME
+        assert [chk_2] == checks.get_by_status(ACT_STATUS_SCHEDULED)
+        # In the order they got the status
+        assert [chk_3, chk_1] == checks.get_by_status(ACT_STATUS_WAIT_CONSUME)
+        assert 2 == checks.count_by_status(ACT_STATUS_WAIT_CONSUME)
+
+        chk_1.status = ACT_STATUS_ZOMBIE
+        assert [chk_1] == checks.get_by_status(ACT_STATUS_ZOMBIE)
+        del checks[chk_1.uuid]
+        assert [] == checks.get_by_status(ACT_STATUS_ZOMBIE)
+        # Not in the registry anymore
+        chk_1.status = ACT_STATUS_SCHEDULED
+        assert [chk_2] == checks.get_by_status(ACT_STATUS_SCHEDULED)
+
+        checks.pop(chk_3.uuid)
+        assert [] == checks.get_by_status(ACT_STATUS_WAIT_CONSUME)
+
+    def test_ready_queues_actions(self):
+        """ Test the actions ready queues
+
+        :return: None
+        """
+        now = time.time()
+        actions = ActionsRegistry('reactionner_tag')
+        master = Notification({'status': ACT_STATUS_SCHEDULED, 'command': 'VOID',
+                               't_to_go': now - 10, 'ref': 'host', 'contact': None})
+        child = Notification({'status': ACT_STATUS_SCHEDULED, 'command': 'notify',
+                              't_to_go': now - 10, 'ref': 'host', 'contact': 'contact'})
+        event_handler = EventHandler({'status': ACT_STATUS_SCHEDULED, 'command': 'handle',
+                                      't_to_go': now - 10, 'reactionner_tag': u'south'})
+        for action in [master, child, event_handler]:
+            actions[action.uuid] = action
+
+        assert [master] == actions.pop_launchable([ACTIONS_QUEUE_MASTER], now)
+        # An event handler is to be launched as soon as possible
+        assert [child] == actions.pop_launchable([(u'None', u'fork'), (u'south', u'fork')], now)
+        assert [event_handler] == actions.pop_launchable([(u'south', u'fork')], time.time())
+
+    def test_scheduler_get_to_run_checks(self):
+        """ Test the scheduler get checks for a poller
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_default.cfg',
+                             dispatching=True)
+        self._scheduler.schedule()
+        assert self._scheduler.checks
+
+        # All the checks are now to run
+        for check in list(self._scheduler.checks.values()):
+            check.t_to_go = 0
+        checks = self._scheduler.get_to_run_checks(do_checks=True, worker_name='tester')
+        assert len(checks) == len(self._scheduler.checks)
+        for check in checks:
+            assert check.status == ACT_STATUS_POLLED
+            assert check.my_worker == 'tester'
+
+        # Nothing left to run
+        assert not self._scheduler.get_to_run_checks(do_checks=True, worker_name='tester')
+
+        counts = self._scheduler.get_checks_status_counts()
+        assert counts['total'] == len(checks)
+        assert counts[ACT_STATUS_POLLED] == len(checks)
+        assert counts[ACT_STATUS_SCHEDULED] == 0
+
+        # Zombies are deleted
+        for check in checks:
+            check.status = ACT_STATUS_ZOMBIE
+        self._scheduler.delete_zombie_checks()
+        assert not self._scheduler.checks
+
+    def test_scheduler_dirty_items(self):
+        """ Test the scheduler only collects the actions and broks of the changed items
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_default.cfg',
+                             dispatching=True)
+        self._scheduler.get_new_actions()
+        self._scheduler.get_new_broks()
+        assert not self._scheduler.items_actions
+        assert not self._scheduler.items_broks
+
+        host = self._scheduler.hosts.find_by_name("test_host_0")
+        contact = self._scheduler.contacts.find_by_name("test_contact")
+        host.broks.append(host.get_update_status_brok())
+        contact.broks.extend([contact.get_update_status_brok()])
+        assert len(self._scheduler.items_broks) == 2
+        assert not self._scheduler.items_actions
+
+        self._scheduler.get_new_broks()
+        assert not self._scheduler.items_broks
+        assert not host.broks
+        assert not contact.broks
+
+        # A copy is a simple list
+        host.broks.append(host.get_update_status_brok())
+        assert copy.copy(host.broks).__class__ is list
+        assert copy.deepcopy(host).broks.__class__ is list
+
+    def test_scheduler_uuid_registry(self):
+        """ Test the scheduler objects uuid registry
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_default.cfg',
+                             dispatching=True)
+        registry = self._scheduler.uuid_registry
+        host = self._scheduler.hosts.find_by_name("test_host_0")
+        contact = self._scheduler.contacts.find_by_name("test_contact")
+        assert registry[host.uuid] is host
+        assert registry[contact.uuid] is contact
+
+        # Checks are registered and unregistered with the scheduler checks
+        self._scheduler.schedule()
+        chk = host.checks_in_progress and self._scheduler.checks[host.checks_in_progress[0]]
+        assert chk
+        assert registry[chk.uuid] is chk
+
+        self._scheduler.nb_uuid_lookups = self._scheduler.nb_uuid_lookups_missed = 0
+        assert self._scheduler.find_item_by_id(chk.ref) is host
+        assert self._scheduler.find_item_by_id(chk.uuid) is chk
+        assert self._scheduler.find_item_by_id(host) is host
+        assert self._scheduler.find_item_by_id(u'unknown') is None
+        assert self._scheduler.nb_uuid_lookups == 2
+        assert self._scheduler.nb_uuid_lookups_missed == 1
+
+        del self._scheduler.checks[chk.uuid]
+        assert chk.uuid not in registry
+        self._scheduler.checks.clear()
+        assert not [obj for obj in registry.values() if isinstance(obj, Check)]
+
+    def test_scheduler_orphaned_checks(self):
+        """ Test the scheduler in-flight checks and orphans detection
+
+        :return: None
+        """
+        self.setup_with_file('cfg/cfg_default.cfg',
+                             dispatching=True)
+        self._scheduler.schedule()
+        for check in list(self._scheduler.checks.values()):
+            check.t_to_go = 0
+        checks = self._scheduler.get_to_run_checks(do_checks=True, worker_name='tester')
+        assert checks
+
+        registry = self._scheduler.checks
+        assert list(registry.in_flight['tester'].values()) == checks
+        now = time.time()
+        count, age = registry.get_in_flight_stats(now)['tester']
+        assert count == len(checks)
+        assert age == now
+
+        # The checks are orphans after the time to orphanage (300 s by default)
+        assert not registry.pop_orphans(299)
+        checks[0].status = ACT_STATUS_WAIT_CONSUME
+        assert len(registry.in_flight['tester']) == len(checks) - 1
+        assert registry.pop_orphans(300) == checks[1:]
+        assert not registry.pop_orphans(300)
+
+        # The scheduler re-enables the orphans for polling
+        for check in checks:
+            check.status = ACT_STATUS_SCHEDULED
+        checks = self._scheduler.get_to_run_checks(do_checks=True, worker_name='other')
+        assert checks
+        assert len(checks) == len(registry.in_flight['other'])
+        self._scheduler.check_orphaned()
+        for check in checks:
+            assert check._is_orphan
+            assert check.status == ACT_STATUS_SCHEDULED
+        assert not registry.in_flight['other']
+        # The satellite is still reported, with no in-flight checks
+        assert registry.get_in_flight_stats(now)['other'] == (0, 0)
+
+    def test_orphans_queue(self):
+        """ Test the in-flight checks statistics and the orphans queue compaction
+
+        :return: None
+        """
+        now = time.time()
+        checks = ActionsRegistry('poller_tag', get_time_to_orphanage=lambda action: 300)
+        chk_1 = self._check(now - 10)
+        chk_2 = self._check(now - 20)
+        for chk in [chk_1, chk_2]:
+            checks[chk.uuid] = chk
+            chk.my_worker = u'tester'
+            chk.status = ACT_STATUS_POLLED
+
+        # The oldest check is the one with the oldest launch time
+        assert checks.get_in_flight_stats(now) == {u'tester': (2, 20)}
+
+        # Each launch time change of an in-flight check pushes a new entry
+        for index in range(10 * HEAP_COMPACTION_MIN_SIZE):
+            chk_1.t_to_go = now - index
+        assert len(checks.orphans_queue) <= HEAP_COMPACTION_MIN_SIZE + 1
+        assert len(checks.in_flight_queues[u'tester']) <= HEAP_COMPACTION_MIN_SIZE + 1
+        assert checks.get_in_flight_stats(now)[u'tester'] == \
+            (2, 10 * HEAP_COMPACTION_MIN_SIZE - 1)
+
+        assert [chk_1, chk_2] == checks.pop_orphans(now + 300)
+        assert not checks.pop_orphans(now + 300)
+
+        # The oldest check came back, the stale in-flight queue tops are dropped
+        chk_1.status = ACT_STATUS_WAIT_CONSUME
+        assert checks.get_in_flight_stats(now) == {u'tester': (1, 20)}
+        assert checks.in_flight_queues[u'tester'][0][-1] is chk_2
+        chk_2.status = ACT_STATUS_WAIT_CONSUME
+        assert checks.get_in_flight_stats(now) == {u'tester': (0, 0)}
+        assert not checks.in_flight_queues[u'tester']
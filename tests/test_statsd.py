@@ -36,6 +36,23 @@ from alignak.stats import *
 from .alignak_test import AlignakTest
 
 
+def brok_dict_for_test(brok):
+    """Prepare a brok and get its attributes, without the brok specific properties
+    (for test purpose only...)
+
+    :return: the brok attributes
+    :rtype: dict
+    """
+    brok.prepare()
+    # Brok attributes are stored in slots
+    brok_dict = dict((slot, getattr(brok, slot))
+                     for slot in brok.__slots__ if hasattr(brok, slot))
+    for prop in ['creation_time', 'instance_id', 'prepared', 'uuid']:
+        brok_dict.pop(prop)
+    brok_dict['data'].pop('ts')
+    return brok_dict
+
+
 class FakeStatsdServer(threading.Thread):
     def __init__(self, port=0):
         super(FakeStatsdServer, self).__init__()
@@ -318,19 +335,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:0|ms'
         # ), 3)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'timer',
-                                     'metric': 'alignak.arbiter-master.test',
-                                     'value': 0, 'uom': 'ms'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'timer',
+                                 'metric': 'alignak.arbiter-master.test',
+                                 'value': 0, 'uom': 'ms'
+                             }}
 
         # Increment
         brok = self.statsmgr.timer('test', 1)
@@ -340,19 +351,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:1000|ms'
         # ), 4)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'timer',
-                                     'metric': 'alignak.arbiter-master.test',
-                                     'value': 1000, 'uom': 'ms'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'timer',
+                                 'metric': 'alignak.arbiter-master.test',
+                                 'value': 1000, 'uom': 'ms'
+                             }}
 
         # Increment - the function is called 'incr' but it does not increment, it sets the value!
         brok = self.statsmgr.timer('test', 12)
@@ -362,19 +367,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:1000|ms'
         # ), 5)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'timer',
-                                     'metric': 'alignak.arbiter-master.test',
-                                     'value': 12000, 'uom': 'ms'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'timer',
+                                 'metric': 'alignak.arbiter-master.test',
+                                 'value': 12000, 'uom': 'ms'
+                             }}
 
     def test_statsmgr_counter(self):
         """ Test sending data for a counter
@@ -417,19 +416,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:0|ms'
         # ), 3)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'counter',
-                                     'metric': 'alignak.broker-master.test',
-                                     'value': 0, 'uom': 'c'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'counter',
+                                 'metric': 'alignak.broker-master.test',
+                                 'value': 0, 'uom': 'c'
+                             }}
 
         # Increment
         brok = self.statsmgr.counter('test', 1)
@@ -439,19 +432,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:1000|ms'
         # ), 4)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'counter',
-                                     'metric': 'alignak.broker-master.test',
-                                     'value': 1, 'uom': 'c'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'counter',
+                                 'metric': 'alignak.broker-master.test',
+                                 'value': 1, 'uom': 'c'
+                             }}
 
         # Increment - the function is called 'incr' but it does not increment, it sets the value!
         brok = self.statsmgr.counter('test', 12)
@@ -461,19 +448,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:1000|ms'
         # ), 5)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'counter',
-                                     'metric': 'alignak.broker-master.test',
-                                     'value': 12, 'uom': 'c'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'counter',
+                                 'metric': 'alignak.broker-master.test',
+                                 'value': 12, 'uom': 'c'
+                             }}
 
     def test_statsmgr_gauge(self):
         """ Test sending data for a gauge
@@ -516,19 +497,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:0|ms'
         # ), 3)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'gauge',
-                                     'metric': 'alignak.arbiter-master.test',
-                                     'value': 0, 'uom': 'g'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'gauge',
+                                 'metric': 'alignak.arbiter-master.test',
+                                 'value': 0, 'uom': 'g'
+                             }}
 
         # Increment
         brok = self.statsmgr.gauge('test', 1)
@@ -538,19 +513,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:1000|ms'
         # ), 4)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'gauge',
-                                     'metric': 'alignak.arbiter-master.test',
-                                     'value': 1, 'uom': 'g'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'gauge',
+                                 'metric': 'alignak.arbiter-master.test',
+                                 'value': 1, 'uom': 'g'
+                             }}
 
         # Increment - the function is called 'incr' but it does not increment, it sets the value!
         brok = self.statsmgr.gauge('test', 12)
@@ -560,19 +529,13 @@ class TestStatsD(AlignakTest):
         # self.assert_log_match(re.escape(
         #     'Sending data: alignak.arbiter-master.test:1000|ms'
         # ), 5)
-        # Prepare brok and remove specific brok properties (for test purpose only...
-        brok.prepare()
-        brok.__dict__.pop('creation_time')
-        brok.__dict__.pop('instance_id')
-        brok.__dict__.pop('prepared')
-        brok.__dict__.pop('uuid')
-        brok.__dict__['data'].pop('ts')
-        assert brok.__dict__ == {'type': 'alignak_stat',
-                                 'data': {
-                                     'type': 'gauge',
-                                     'metric': 'alignak.arbiter-master.test',
-                                     'value': 12, 'uom': 'g'
-                                 }}
+        brok_dict = brok_dict_for_test(brok)
+        assert brok_dict == {'type': 'alignak_stat',
+                             'data': {
+                                 'type': 'gauge',
+                                 'metric': 'alignak.arbiter-master.test',
+                                 'value': 12, 'uom': 'g'
+                             }}
 
 
 if os.sys.version_info > (2, 7):
@@ -760,19 +723,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:0|ms'
             # ), 3)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'timer',
-                                         'metric': 'alignak.arbiter-master.test',
-                                         'value': 0, 'uom': 'ms'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'timer',
+                                     'metric': 'alignak.arbiter-master.test',
+                                     'value': 0, 'uom': 'ms'
+                                 }}
 
             # Increment
             brok = self.statsmgr.timer('test', 1)
@@ -785,19 +742,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:1000|ms'
             # ), 4)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'timer',
-                                         'metric': 'alignak.arbiter-master.test',
-                                         'value': 1000, 'uom': 'ms'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'timer',
+                                     'metric': 'alignak.arbiter-master.test',
+                                     'value': 1000, 'uom': 'ms'
+                                 }}
 
             # Increment - the function is called 'incr' but it does not increment, it sets the value!
             brok = self.statsmgr.timer('test', 12)
@@ -810,19 +761,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:1000|ms'
             # ), 5)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'timer',
-                                         'metric': 'alignak.arbiter-master.test',
-                                         'value': 12000, 'uom': 'ms'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'timer',
+                                     'metric': 'alignak.arbiter-master.test',
+                                     'value': 12000, 'uom': 'ms'
+                                 }}
 
         def test_statsmgr_counter(self):
             """ Test sending data for a counter
@@ -860,19 +805,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:0|ms'
             # ), 3)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'counter',
-                                         'metric': 'alignak.broker-master.test',
-                                         'value': 0, 'uom': 'c'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'counter',
+                                     'metric': 'alignak.broker-master.test',
+                                     'value': 0, 'uom': 'c'
+                                 }}
 
             # Increment
             brok = self.statsmgr.counter('test', 1)
@@ -885,19 +824,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:1000|ms'
             # ), 4)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'counter',
-                                         'metric': 'alignak.broker-master.test',
-                                         'value': 1, 'uom': 'c'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'counter',
+                                     'metric': 'alignak.broker-master.test',
+                                     'value': 1, 'uom': 'c'
+                                 }}
 
             # Increment - the function is called 'incr' but it does not increment, it sets the value!
             brok = self.statsmgr.counter('test', 12)
@@ -907,19 +840,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:1000|ms'
             # ), 5)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'counter',
-                                         'metric': 'alignak.broker-master.test',
-                                         'value': 12, 'uom': 'c'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'counter',
+                                     'metric': 'alignak.broker-master.test',
+                                     'value': 12, 'uom': 'c'
+                                 }}
 
         def test_statsmgr_gauge(self):
             """ Test sending data for a gauge
@@ -957,19 +884,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:0|ms'
             # ), 3)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'gauge',
-                                         'metric': 'alignak.arbiter-master.test',
-                                         'value': 0, 'uom': 'g'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'gauge',
+                                     'metric': 'alignak.arbiter-master.test',
+                                     'value': 0, 'uom': 'g'
+                                 }}
 
             # Increment
             brok = self.statsmgr.gauge('test', 1)
@@ -982,19 +903,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:1000|ms'
             # ), 4)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'gauge',
-                                         'metric': 'alignak.arbiter-master.test',
-                                         'value': 1, 'uom': 'g'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'gauge',
+                                     'metric': 'alignak.arbiter-master.test',
+                                     'value': 1, 'uom': 'g'
+                                 }}
 
             # Increment - the function is called 'incr' but it does not increment, it sets the value!
             brok = self.statsmgr.gauge('test', 12)
@@ -1007,19 +922,13 @@ if os.sys.version_info > (2, 7):
             # self.assert_log_match(re.escape(
             #     'Sending data: alignak.arbiter-master.test:1000|ms'
             # ), 5)
-            # Prepare brok and remove specific brok properties (for test purpose only...
-            brok.prepare()
-            brok.__dict__.pop('creation_time')
-            brok.__dict__.pop('instance_id')
-            brok.__dict__.pop('prepared')
-            brok.__dict__.pop('uuid')
-            brok.__dict__['data'].pop('ts')
-            assert brok.__dict__ == {'type': 'alignak_stat',
-                                     'data': {
-                                         'type': 'gauge',
-                                         'metric': 'alignak.arbiter-master.test',
-                                         'value': 12, 'uom': 'g'
-                                     }}
+            brok_dict = brok_dict_for_test(brok)
+            assert brok_dict == {'type': 'alignak_stat',
+                                 'data': {
+                                     'type': 'gauge',
+                                     'metric': 'alignak.arbiter-master.test',
+                                     'value': 12, 'uom': 'g'
+                                 }}
 
         def test_statsmgr_flush(self):
             """ Test sending several data at once to a Graphite server
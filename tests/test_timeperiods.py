@@ -249,7 +249,8 @@ class TestTimeperiods(AlignakTest):
         t_next_inv = tp_all.get_next_invalid_time_from_t(july_the_12)
         t_next_inv = time.asctime(time.localtime(t_next_inv))
         print("RES:", t_next_inv) #, t.is_time_valid(july_the_12)
-        self.assertEqual('Tue Jul 19 00:00:00 2011', t_next_inv)
+        # The search limit is one year
+        self.assertEqual('Thu Jul 14 00:00:00 2011', t_next_inv)
 
     def test_simple_timeperiod_with_exclude(self):
         """
@@ -538,6 +539,63 @@ class TestTimeperiods(AlignakTest):
         print("T next", t_next)
         self.assertEqual("Wed Jul 14 00:00:00 2010", t_next)
 
+    def test_intervals_table(self):
+        """
+        Test the valid intervals table of a timeperiod
+
+        :return: None
+        """
+        # Get the 12 of july 2010 at 15:00, monday
+        july_the_12 = time.mktime(time.strptime("12 Jul 2010 15:00:00", "%d %b %Y %H:%M:%S"))
+
+        timeperiod = Timeperiod({})
+        for day in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday']:
+            timeperiod.resolve_daterange(timeperiod.dateranges, '%s 09:00-17:00' % day)
+        t2 = Timeperiod({})
+        t2.resolve_daterange(t2.dateranges, 'wednesday 12:00-14:00')
+        timeperiod.exclude = [t2]
+
+        self.assertTrue(timeperiod.is_time_valid(july_the_12))
+        table = timeperiod.cache
+        # Intervals are computed from the beginning of the day to the horizon
+        self.assertEqual(time.mktime(time.strptime("12 Jul 2010", "%d %b %Y")), table.start)
+        self.assertEqual(table.start + timeperiod.intervals_horizon, table.end)
+        # 2 weeks of working days, wednesdays are split by the exclusion,
+        # and the first interval after the horizon
+        self.assertEqual(13, len(table.starts))
+        self.assertEqual('Mon Jul 26 09:00:00 2010', time.asctime(time.localtime(table.starts[-1])))
+        self.assertEqual(sorted(table.starts), table.starts)
+        self.assertEqual('Wed Jul 14 12:00:00 2010', time.asctime(time.localtime(table.ends[2])))
+        self.assertEqual('Wed Jul 14 14:00:01 2010', time.asctime(time.localtime(table.starts[3])))
+
+        # Lookups in the horizon use the same table
+        wednesday = july_the_12 + 2 * 86400 - 2 * 3600
+        self.assertFalse(timeperiod.is_time_valid(wednesday))
+        self.assertEqual('Wed Jul 14 14:00:01 2010',
+                         time.asctime(time.localtime(
+                             timeperiod.get_next_valid_time_from_t(wednesday))))
+        self.assertEqual('Wed Jul 14 17:00:01 2010',
+                         time.asctime(time.localtime(
+                             timeperiod.get_next_invalid_time_from_t(wednesday + 3 * 3600))))
+        self.assertEqual(wednesday, timeperiod.get_next_invalid_time_from_t(wednesday))
+        self.assertIs(table, timeperiod.cache)
+
+        # The table is rebuilt when the horizon is exhausted...
+        timeperiod.get_next_valid_time_from_t(table.end)
+        self.assertIsNot(table, timeperiod.cache)
+        self.assertEqual(table.end, timeperiod.cache.start)
+
+        # ... or when the timeperiod changed
+        table = timeperiod.cache
+        timeperiod.exclude = []
+        self.assertTrue(timeperiod.is_time_valid(table.end - 6 * 86400 + 13 * 3600))
+        self.assertIsNot(table, timeperiod.cache)
+
+        # Old tables are cleaned, the lookups counters are reset
+        self.assertEqual((4, 3), timeperiod.clean_cache())
+        self.assertIsNone(timeperiod.cache)
+        self.assertEqual((0, 0), timeperiod.clean_cache())
+
     def test_issue_1385(self):
         """
         https://github.com/naparuba/shinken/issues/1385